@@ -4,21 +4,36 @@ EndowmentIQ API - Flask backend for nonprofit endowment analysis.
 Provides Monte Carlo simulation and PDF generation endpoints.
 """
 
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file, stream_with_context
 from flask_cors import CORS
 import json
 import os
 import io
+import uuid
 from datetime import datetime
+from typing import Dict, Optional
+import numpy as np
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
 from lib.core import MonteCarloSimulator, PortfolioPreset
+from lib.core.cache import MemoryCacheBackend, create_result_cache, make_cache_key
+from lib.core.executor import SimulationExecutor
+from lib.core.jobs import ArtifactStore, JobQueue, QueueFullError
+from lib.core.kernels import resolve_engine
+from lib.core.metrics import METRIC_PREFIX, registry as metrics_registry
+from lib.core.metrics import request_timings, start_request_timings, stop_request_timings, timed
+from lib.core.monte_carlo import DTYPES, PERCENTILE_MODES, spawn_streams
+from lib.core.sampling import SAMPLING_METHODS
+from lib.core.spending import FixedSpending, MovingAverageSpending, SpendingPolicy, YaleTobinSpending
 from lib.core.portfolio import Portfolio
+from lib.core.return_models import (
+    BlockBootstrapReturns, BootstrapReturns, HistoricalSeries, LognormalReturns,
+    MultiAssetReturns, NormalReturns, ReturnModel, StudentTReturns
+)
 from lib.reporters.chart_generator_simple import generate_projection_data
-from lib.simple_pdf_generator import simple_pdf_generator
 
 app = Flask(__name__)
 app.secret_key = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
@@ -37,6 +52,154 @@ else:
 with open('data/portfolios.json', 'r') as f:
     portfolio_file = json.load(f)
     PORTFOLIO_DATA = portfolio_file['presets']
+    HISTORICAL_DATA = portfolio_file['historical_data']
+
+# Simulation settings
+SIMULATION_ITERATIONS = 5000
+MAX_SIMULATION_ITERATIONS = 100000
+COMMON_SHOCKS_STREAM = 'common'
+STREAM_BATCH_SIZE = 500
+MAX_ADAPTIVE_ITERATIONS = 50000
+MAX_GRID_CELLS = 2500
+MAX_GRID_HORIZON = 100
+DEFAULT_GRID_RATES = [2.0, 2.5, 3.0, 3.5, 4.0, 4.5, 5.0, 5.5, 6.0, 6.5, 7.0]
+DEFAULT_GRID_HORIZONS = [10, 20, 30, 40, 50]
+RETURN_MODELS = ('normal', 'multi_asset', 'student_t', 'lognormal', 'bootstrap', 'block_bootstrap')
+BOOTSTRAP_MODELS = ('bootstrap', 'block_bootstrap')
+RETURN_MODEL_PARAMS = ('return_model', 'rebalance', 'block_length', 'degrees_of_freedom', 'historical_returns')
+# percentage and fixed spend a fixed (inflation-adjusted) amount; the others
+# spend withdrawal_rate of the trailing average or blend it with last year's spending
+WITHDRAWAL_METHODS = ('percentage', 'fixed', 'moving_average', 'yale_tobin')
+RATE_WITHDRAWAL_METHODS = ('percentage', 'moving_average', 'yale_tobin')
+SPENDING_POLICY_PARAMS = ('withdrawal_method', 'averaging_years', 'spending_smoothing', 'spending_floor', 'spending_cap')
+
+# Execution backend: serial, thread or process (workers are persistent and shared)
+simulation_executor = SimulationExecutor(
+    backend=os.getenv('SIMULATION_BACKEND', 'serial'),
+    max_workers=int(os.getenv('SIMULATION_WORKERS')) if os.getenv('SIMULATION_WORKERS') else None,
+    chunk_size=int(os.getenv('SIMULATION_CHUNK_SIZE')) if os.getenv('SIMULATION_CHUNK_SIZE') else None
+)
+
+# Path loop engine: numpy, numba (compiled) or auto; results are identical
+SIMULATION_ENGINE = resolve_engine(os.getenv('SIMULATION_ENGINE', 'auto'))
+
+# Result cache in front of the simulation step: memory, sqlite (shared across workers) or none
+result_cache = create_result_cache(
+    backend=os.getenv('RESULT_CACHE_BACKEND', 'memory'),
+    path=os.getenv('RESULT_CACHE_PATH', os.path.join('data', 'cache', 'results.sqlite3')),
+    max_entries=int(os.getenv('RESULT_CACHE_MAX_ENTRIES', 256)),
+    ttl=float(os.getenv('RESULT_CACHE_TTL', 3600))
+)
+
+# Complete results of recent calculations, kept in this process so reports can be
+# generated from a result_id without the client uploading the results again
+result_store = MemoryCacheBackend(
+    max_entries=int(os.getenv('RESULT_STORE_MAX_ENTRIES', 128)),
+    ttl=float(os.getenv('RESULT_STORE_TTL', 3600))
+)
+
+# Background PDF reports: a bounded worker pool writing to a local artifact directory
+job_queue = JobQueue(
+    ArtifactStore(
+        os.getenv('JOB_ARTIFACT_DIR', os.path.join('data', 'jobs')),
+        ttl=float(os.getenv('JOB_ARTIFACT_TTL', 3600)),
+        suffix='.pdf'
+    ),
+    max_workers=int(os.getenv('JOB_WORKERS', 2)),
+    max_pending=int(os.getenv('JOB_MAX_PENDING', 32)),
+    timeout=float(os.getenv('JOB_TIMEOUT', 120))
+)
+
+# Stage timing: histograms served at /metrics, and an optional Server-Timing
+# header on every response. Both are off by default.
+metrics_registry.enabled = os.getenv('METRICS_ENABLED', 'false').lower() == 'true'
+SERVER_TIMING = os.getenv('SERVER_TIMING', 'false').lower() == 'true'
+
+
+def _cache_metrics():
+    """Result cache statistics, read when /metrics is scraped."""
+    stats = result_cache.stats()
+    return [
+        (f'{METRIC_PREFIX}_result_cache_hits_total', 'counter', 'Result cache hits.', stats['hits']),
+        (f'{METRIC_PREFIX}_result_cache_misses_total', 'counter', 'Result cache misses.', stats['misses']),
+        (f'{METRIC_PREFIX}_result_cache_entries', 'gauge', 'Entries in the result cache.', stats['entries'])
+    ]
+
+
+metrics_registry.add_collector(_cache_metrics)
+
+
+def get_pdf_generator():
+    """
+    PDF report generator, imported on first use.
+    
+    ReportLab (and matplotlib for raster charts) are only needed by report
+    endpoints, so API workers start and fork without them.
+    """
+    from lib.simple_pdf_generator import simple_pdf_generator
+    return simple_pdf_generator
+
+
+# Annual asset returns for the bootstrap models, loaded on first use
+_historical_series: Optional[HistoricalSeries] = None
+
+
+def get_historical_series() -> Optional[HistoricalSeries]:
+    """
+    Load the CSV named by HISTORICAL_RETURNS_CSV once per process (None if unset).
+    
+    Its parsed cache goes to HISTORICAL_CACHE_DIR, or next to the CSV if unset.
+    """
+    global _historical_series
+    path = os.getenv('HISTORICAL_RETURNS_CSV')
+    if not path:
+        return None
+    if _historical_series is None:
+        _historical_series = HistoricalSeries.from_csv(path, os.getenv('HISTORICAL_CACHE_DIR'))
+    return _historical_series
+
+
+def _select_portfolios(selection) -> Optional[Dict[str, Portfolio]]:
+    """
+    Resolve a portfolio selection to presets, in preset order.
+    
+    Args:
+        selection: 'all', a single portfolio id or a list of ids
+        
+    Returns:
+        Selected presets keyed by id, or None if the selection is invalid
+    """
+    presets = PortfolioPreset.get_all()
+    if selection == 'all':
+        return dict(presets)
+    if isinstance(selection, str):
+        selection = [selection]
+    if not isinstance(selection, list) or not selection:
+        return None
+    if any(not isinstance(key, str) or key not in presets for key in selection):
+        return None
+    return {key: portfolio for key, portfolio in presets.items() if key in selection}
+
+
+@app.before_request
+def _start_server_timing():
+    """Collect this request's stage timings when Server-Timing is enabled."""
+    if SERVER_TIMING:
+        start_request_timings()
+
+
+@app.after_request
+def _add_server_timing(response):
+    """Report the collected stage timings in a Server-Timing header."""
+    timings = request_timings()
+    if timings is not None and timings.stages:
+        response.headers['Server-Timing'] = timings.header()
+    return response
+
+
+@app.teardown_request
+def _stop_server_timing(exc):
+    stop_request_timings()
 
 
 @app.route('/health')
@@ -69,126 +232,947 @@ def api_get_portfolios():
         return jsonify({'error': str(e)}), 500
 
 
+class CalculationError(ValueError):
+    """Invalid calculation request (reported as HTTP 400)."""
+
+
+class UnknownResultError(LookupError):
+    """Unknown or expired result_id (reported as HTTP 404)."""
+
+
+def _parse_return_model(data: Dict) -> Dict:
+    """
+    Validate the return model settings of a payload.
+    
+    Args:
+        data: Request JSON
+        
+    Returns:
+        Dictionary with 'return_model', 'rebalance', 'block_length',
+        'degrees_of_freedom' and 'historical_returns' (series digest)
+        
+    Raises:
+        CalculationError: If the model or its settings are invalid
+    """
+    return_model = data.get('return_model', 'normal')
+    if return_model not in RETURN_MODELS:
+        raise CalculationError(f"return_model must be one of {', '.join(RETURN_MODELS)}")
+    
+    block_length = float(data.get('block_length', 5))
+    if block_length < 1:
+        raise CalculationError('block_length must be at least 1')
+    degrees_of_freedom = float(data.get('degrees_of_freedom', 5))
+    if degrees_of_freedom <= 2:
+        raise CalculationError('degrees_of_freedom must be greater than 2')
+    
+    historical_returns = None
+    if return_model in BOOTSTRAP_MODELS:
+        series = get_historical_series()
+        if series is None:
+            raise CalculationError('Bootstrap return models need HISTORICAL_RETURNS_CSV to be configured')
+        historical_returns = series.digest()
+    
+    return {
+        'return_model': return_model,
+        'rebalance': bool(data.get('rebalance', True)),
+        'block_length': block_length,
+        'degrees_of_freedom': degrees_of_freedom,
+        'historical_returns': historical_returns
+    }
+
+
+def _parse_spending_policy(data: Dict) -> Dict:
+    """
+    Validate the spending policy settings of a payload.
+    
+    Args:
+        data: Request JSON
+        
+    Returns:
+        Dictionary with 'averaging_years', 'spending_smoothing' and the
+        'spending_floor' / 'spending_cap' rates (fractions, or None)
+        
+    Raises:
+        CalculationError: If the settings are invalid
+    """
+    averaging_years = int(data.get('averaging_years', 3))
+    if averaging_years < 1:
+        raise CalculationError('averaging_years must be at least 1')
+    spending_smoothing = float(data.get('spending_smoothing', 0.7))
+    if not 0 <= spending_smoothing <= 1:
+        raise CalculationError('spending_smoothing must be between 0 and 1')
+    
+    # Floors and caps are given in percent of the start-of-year balance, like withdrawal_rate
+    bounds = {}
+    for name in ('spending_floor', 'spending_cap'):
+        value = data.get(name)
+        if value is not None:
+            value = float(value) / 100
+            if value < 0:
+                raise CalculationError(f'{name} must be non-negative')
+        bounds[name] = value
+    if None not in bounds.values() and bounds['spending_floor'] > bounds['spending_cap']:
+        raise CalculationError('spending_floor must not exceed spending_cap')
+    
+    return {
+        'averaging_years': averaging_years,
+        'spending_smoothing': spending_smoothing,
+        **bounds
+    }
+
+
+def _parse_seed(seed) -> Optional[int]:
+    """Validate an optional request seed as a non-negative integer."""
+    if seed is None:
+        return None
+    try:
+        seed = int(seed)
+    except (TypeError, ValueError):
+        raise CalculationError('seed must be an integer')
+    if seed < 0:
+        raise CalculationError('seed must be a non-negative integer')
+    return seed
+
+
+def _parse_calculation_request(data: Optional[Dict]) -> Dict:
+    """
+    Validate a calculation payload and resolve its parameters.
+    
+    Args:
+        data: Request JSON
+        
+    Returns:
+        Dictionary of simulation parameters
+        
+    Raises:
+        CalculationError: If the payload is invalid
+    """
+    data = data or {}
+    
+    # Extract parameters
+    starting_balance = float(data.get('starting_balance', 1000000))
+    
+    # Validate starting balance
+    if starting_balance <= 0:
+        raise CalculationError('Starting balance must be greater than 0')
+        
+    withdrawal_method = data.get('withdrawal_method', 'percentage')
+    withdrawal_rate = data.get('withdrawal_rate')
+    withdrawal_amount = data.get('withdrawal_amount')
+    years = int(data.get('years', 30))
+    inflation_rate = float(data.get('inflation_rate', 0.03))
+    management_fee = float(data.get('management_fee', 0.01))
+    adjust_for_inflation = data.get('adjust_for_inflation', True)
+    seed = data.get('seed')
+    common_random_numbers = bool(data.get('common_random_numbers', False))
+    tolerance = data.get('tolerance')
+    percentile_tolerance = data.get('percentile_tolerance')
+    max_iterations = int(data.get('max_iterations', MAX_ADAPTIVE_ITERATIONS))
+    iterations = int(data.get('iterations', SIMULATION_ITERATIONS))
+    percentile_mode = data.get('percentile_mode', 'full')
+    dtype = data.get('dtype', 'float64')
+    
+    # Validate run size; large runs should use a memory-lean percentile mode
+    if not 0 < iterations <= MAX_SIMULATION_ITERATIONS:
+        raise CalculationError(f'iterations must be between 1 and {MAX_SIMULATION_ITERATIONS}')
+    if percentile_mode not in PERCENTILE_MODES:
+        raise CalculationError(f"percentile_mode must be one of {', '.join(PERCENTILE_MODES)}")
+    if dtype not in DTYPES:
+        raise CalculationError(f"dtype must be one of {', '.join(DTYPES)}")
+    
+    # Validate variance reduction (fixed-size runs with stored paths only)
+    sampling = data.get('sampling', 'random')
+    control_variate = bool(data.get('control_variate', False))
+    if sampling not in SAMPLING_METHODS:
+        raise CalculationError(f"sampling must be one of {', '.join(SAMPLING_METHODS)}")
+    if sampling != 'random' or control_variate:
+        if tolerance is not None:
+            raise CalculationError('Variance reduction is not supported in adaptive mode (tolerance)')
+        if percentile_mode != 'full':
+            raise CalculationError("Variance reduction needs percentile_mode 'full'")
+    
+    # Validate adaptive mode settings
+    if tolerance is not None:
+        tolerance = float(tolerance)
+        if not 0 < tolerance < 0.5:
+            raise CalculationError('tolerance must be between 0 and 0.5')
+        if percentile_tolerance is not None:
+            percentile_tolerance = float(percentile_tolerance)
+            if percentile_tolerance <= 0:
+                raise CalculationError('percentile_tolerance must be greater than 0')
+        if not 0 < max_iterations <= MAX_ADAPTIVE_ITERATIONS:
+            raise CalculationError(f'max_iterations must be between 1 and {MAX_ADAPTIVE_ITERATIONS}')
+    
+    # Validate portfolio selection
+    selected = _select_portfolios(data.get('portfolios', 'all'))
+    if selected is None:
+        raise CalculationError(
+            f"portfolios must be 'all', a portfolio id or a list of ids ({', '.join(PortfolioPreset.get_all())})"
+        )
+    
+    # Validate seed
+    seed = _parse_seed(seed)
+    
+    # Calculate withdrawal amount (the first year's for balance-based methods)
+    if withdrawal_method not in WITHDRAWAL_METHODS:
+        raise CalculationError(f"withdrawal_method must be one of {', '.join(WITHDRAWAL_METHODS)}")
+    if withdrawal_method in RATE_WITHDRAWAL_METHODS:
+        if withdrawal_rate is None:
+            raise CalculationError(f'withdrawal_rate required for {withdrawal_method} method')
+        withdrawal = starting_balance * (float(withdrawal_rate) / 100)
+    else:
+        if withdrawal_amount is None:
+            raise CalculationError('withdrawal_amount required for fixed method')
+        withdrawal = float(withdrawal_amount)
+    
+    params = {
+        **_parse_return_model(data),
+        **_parse_spending_policy(data),
+        'starting_balance': starting_balance,
+        'withdrawal_method': withdrawal_method,
+        'withdrawal': withdrawal,
+        'years': years,
+        'inflation_rate': inflation_rate,
+        'management_fee': management_fee,
+        'adjust_for_inflation': adjust_for_inflation,
+        'seed': seed,
+        'common_random_numbers': common_random_numbers,
+        'tolerance': tolerance,
+        'percentile_tolerance': percentile_tolerance if tolerance is not None else None,
+        'max_iterations': max_iterations if tolerance is not None else None,
+        'iterations': iterations,
+        'percentile_mode': percentile_mode,
+        'dtype': dtype,
+        'sampling': sampling,
+        'control_variate': control_variate,
+        'selected': selected
+    }
+    
+    # Building each simulator also checks that the portfolios' assets exist in
+    # the data and that the return and spending models support the sampling options
+    for portfolio in selected.values():
+        try:
+            simulator = _build_simulator(params, portfolio, 0)
+        except ValueError as e:
+            raise CalculationError(str(e))
+        if percentile_mode == 'exact' and not simulator.return_model.serially_independent:
+            raise CalculationError("percentile_mode 'exact' needs serially independent returns; use 'sketch'")
+    
+    return params
+
+
+def _resolve_streams(seed: Optional[int]):
+    """
+    Resolve the request seed and spawn one random stream per preset plus the common stream.
+    
+    Unseeded requests draw a fresh seed every time, so only seeded (or
+    resubmitted with the returned seed) requests can hit the result cache.
+    
+    Args:
+        seed: Requested seed, or None
+        
+    Returns:
+        Tuple of (root seed, mapping of stream name to SeedSequence)
+    """
+    # One independent random stream per portfolio, derived from the request seed.
+    # Streams are spawned from every preset so a portfolio's numbers don't
+    # depend on which others were requested alongside it
+    return spawn_streams(seed, list(PortfolioPreset.get_all()) + [COMMON_SHOCKS_STREAM])
+
+
+def _plan_calculation(params: Dict, chunk_size: Optional[int]) -> Dict:
+    """
+    Resolve seeds, random streams and cached results for a calculation.
+    
+    Args:
+        params: Parsed calculation parameters
+        chunk_size: Iteration chunk size the missing results will be computed with
+        
+    Returns:
+        Plan with the response envelope, per-portfolio streams, cache keys,
+        cached results and the ids still to simulate
+    """
+    starting_balance = params['starting_balance']
+    withdrawal = params['withdrawal']
+    years = params['years']
+    inflation_rate = params['inflation_rate']
+    adjust_for_inflation = params['adjust_for_inflation']
+    selected = params['selected']
+    
+    results = {
+        'balance': starting_balance,
+        'years': years,
+        'inflation_rate': inflation_rate,
+        'withdrawal_method': params['withdrawal_method'],
+        'adjust_for_inflation': adjust_for_inflation,
+        'calculation_details': {
+            'starting_balance': starting_balance,
+            'annual_withdrawal': withdrawal,
+            'withdrawal_rate_percent': (withdrawal / starting_balance) * 100,
+            'total_withdrawals': withdrawal * years,
+            'inflation_adjusted_final_withdrawal': withdrawal * ((1 + inflation_rate) ** years) if adjust_for_inflation else withdrawal
+        },
+        'portfolios': {}
+    }
+    
+    # Everything besides the seed and portfolio that determines a simulated result
+    cache_params = {
+        'starting_balance': starting_balance,
+        'withdrawal': withdrawal,
+        'years': years,
+        'inflation_rate': inflation_rate,
+        'management_fee': params['management_fee'],
+        'adjust_for_inflation': adjust_for_inflation,
+        'iterations': params['iterations'],
+        'percentile_mode': params['percentile_mode'],
+        'dtype': params['dtype'],
+        'sampling': params['sampling'],
+        'control_variate': params['control_variate'],
+        **{name: params[name] for name in RETURN_MODEL_PARAMS},
+        **{name: params[name] for name in SPENDING_POLICY_PARAMS},
+        'chunk_size': chunk_size,
+        'common_random_numbers': params['common_random_numbers'],
+        'tolerance': params['tolerance'],
+        'percentile_tolerance': params['percentile_tolerance'],
+        'max_iterations': params['max_iterations']
+    }
+    
+    seed, streams = _resolve_streams(params['seed'])
+    results['seed'] = seed
+    results['common_random_numbers'] = params['common_random_numbers']
+    results['adaptive'] = params['tolerance'] is not None
+    results['iterations'] = params['iterations']
+    results['percentile_mode'] = params['percentile_mode']
+    results['dtype'] = params['dtype']
+    results['sampling'] = params['sampling']
+    results['control_variate'] = params['control_variate']
+    results['return_model'] = params['return_model']
+    
+    cache_keys = {
+        portfolio_id: make_cache_key(
+            'portfolio',
+            seed=seed,
+            portfolio_id=portfolio_id,
+            expected_return=portfolio.expected_return,
+            std_deviation=portfolio.std_deviation,
+            **cache_params
+        )
+        for portfolio_id, portfolio in selected.items()
+    }
+    cached = {
+        portfolio_id: result_cache.get(cache_keys[portfolio_id])
+        for portfolio_id in selected
+    }
+    
+    return {
+        'results': results,
+        'streams': streams,
+        'cache_keys': cache_keys,
+        'cached': cached,
+        'missing': [portfolio_id for portfolio_id in selected if cached[portfolio_id] is None]
+    }
+
+
+def _build_return_model(params: Dict, portfolio: Portfolio) -> ReturnModel:
+    """
+    Return model for one portfolio of a calculation.
+    
+    Raises:
+        CalculationError: If the portfolio's assets are missing from the data
+    """
+    model = params['return_model']
+    try:
+        if model == 'multi_asset':
+            return MultiAssetReturns.from_historical_data(
+                HISTORICAL_DATA,
+                portfolio.asset_weights(),
+                rebalance=params['rebalance']
+            )
+        if model == 'bootstrap':
+            return BootstrapReturns(get_historical_series(), portfolio.asset_weights(), rebalance=params['rebalance'])
+        if model == 'block_bootstrap':
+            return BlockBootstrapReturns(
+                get_historical_series(),
+                portfolio.asset_weights(),
+                mean_block_length=params['block_length'],
+                rebalance=params['rebalance']
+            )
+    except ValueError as e:
+        raise CalculationError(str(e))
+    if model == 'student_t':
+        return StudentTReturns(portfolio.expected_return, portfolio.std_deviation, params['degrees_of_freedom'])
+    if model == 'lognormal':
+        return LognormalReturns(portfolio.expected_return, portfolio.std_deviation)
+    return NormalReturns(portfolio.expected_return, portfolio.std_deviation)
+
+
+def _build_spending_policy(params: Dict) -> SpendingPolicy:
+    """Spending policy of a calculation."""
+    bounds = {'floor_rate': params['spending_floor'], 'cap_rate': params['spending_cap']}
+    rate = params['withdrawal'] / params['starting_balance']
+    if params['withdrawal_method'] == 'moving_average':
+        return MovingAverageSpending(rate, params['averaging_years'], **bounds)
+    if params['withdrawal_method'] == 'yale_tobin':
+        return YaleTobinSpending(rate, params['spending_smoothing'], **bounds)
+    return FixedSpending(**bounds)
+
+
+def _common_shocks(params: Dict, plan: Dict) -> Optional[np.ndarray]:
+    """Common random numbers: one shock matrix per request, shared by every portfolio."""
+    if not params['common_random_numbers'] or not plan['missing']:
+        return None
+    # Shock shapes depend on the model type, not the portfolio
+    model = _build_return_model(params, params['selected'][plan['missing'][0]])
+    return model.draw_shocks(
+        np.random.default_rng(plan['streams'][COMMON_SHOCKS_STREAM]),
+        params['iterations'],
+        params['years'],
+        params['dtype']
+    )
+
+
+def _build_simulator(params: Dict, portfolio: Portfolio, stream) -> MonteCarloSimulator:
+    """Create the simulator for one portfolio of a calculation."""
+    return MonteCarloSimulator(
+        starting_balance=params['starting_balance'],
+        annual_return=portfolio.expected_return,
+        annual_std_dev=portfolio.std_deviation,
+        withdrawal_amount=params['withdrawal'],
+        years=params['years'],
+        inflation_rate=params['inflation_rate'],
+        management_fee=params['management_fee'],
+        adjust_for_inflation=params['adjust_for_inflation'],
+        seed=stream,
+        return_model=_build_return_model(params, portfolio),
+        sampling=params['sampling'],
+        control_variate=params['control_variate'],
+        engine=SIMULATION_ENGINE,
+        spending_policy=_build_spending_policy(params),
+        dtype=params['dtype']
+    )
+
+
+def _format_portfolio_result(params: Dict, portfolio: Portfolio, sim_results: Dict) -> Dict:
+    """Shape one portfolio's simulation results for the API response."""
+    # Generate chart data
+    with timed('projection'):
+        projection_data = generate_projection_data(
+            sim_results['percentile_paths'],
+            params['years']
+        )
+    
+    formatted = {
+        'portfolio': {
+            'name': portfolio.name,
+            'expected_return': portfolio.expected_return,
+            'std_deviation': portfolio.std_deviation
+        },
+        'success_rate': sim_results['success_rate'],
+        'median_final_balance': float(sim_results['median_final_balance']),
+        'percentile_10': sim_results['percentile_paths']['p10'][-1],
+        'percentile_90': sim_results['percentile_paths']['p90'][-1],
+        'annual_withdrawal': params['withdrawal'],
+        'withdrawal_rate': sim_results['withdrawal_rate'],
+        'projection_data': projection_data
+    }
+    
+    # Adaptive runs report how many iterations they needed and the precision reached
+    if 'converged' in sim_results:
+        formatted['iterations'] = sim_results['iterations']
+        formatted['converged'] = sim_results['converged']
+        formatted['standard_error'] = sim_results['standard_error']
+    
+    # Variance-reduced runs report how many plain paths they were worth
+    if 'effective_sample_size' in sim_results:
+        formatted['effective_sample_size'] = sim_results['effective_sample_size']
+        if 'raw_success_rate' in sim_results:
+            formatted['raw_success_rate'] = sim_results['raw_success_rate']
+    
+    return formatted
+
+
+def _run_per_portfolio(params: Dict, plan: Dict) -> Dict[str, Dict]:
+    """
+    Run adaptive, memory-lean or variance-reduced simulations for the missing
+    portfolios of a calculation, one portfolio at a time without a pre-drawn
+    shock matrix.
+    """
+    results = {}
+    for portfolio_id in plan['missing']:
+        # Common random numbers: every portfolio replays the same shock stream
+        stream = plan['streams'][COMMON_SHOCKS_STREAM if params['common_random_numbers'] else portfolio_id]
+        simulator = _build_simulator(params, params['selected'][portfolio_id], stream)
+        if params['tolerance'] is not None:
+            results[portfolio_id] = simulator.run_adaptive(
+                tolerance=params['tolerance'],
+                percentile_tolerance=params['percentile_tolerance'],
+                max_iterations=params['max_iterations']
+            )
+        else:
+            results[portfolio_id] = simulator.run_simulation(
+                params['iterations'],
+                percentile_mode=params['percentile_mode']
+            )
+    return results
+
+
+def _store_result(results: Dict) -> str:
+    """
+    Keep a calculation's results for report generation.
+    
+    Args:
+        results: Response envelope with every portfolio's results (gains a result_id)
+        
+    Returns:
+        Id to pass to /api/generate-pdf
+    """
+    result_id = uuid.uuid4().hex
+    results['result_id'] = result_id
+    result_store.set(result_id, results)
+    return result_id
+
+
 @app.route('/api/calculate', methods=['POST'])
 def api_calculate():
-    """Run Monte Carlo simulation for all portfolios via API."""
+    """Run Monte Carlo simulation for the requested portfolios (all by default) via API."""
     try:
-        data = request.get_json()
+        with timed('parse'):
+            params = _parse_calculation_request(request.get_json())
+        selected = params['selected']
+        with timed('cache'):
+            plan = _plan_calculation(params, simulation_executor.chunk_size)
+        results = plan['results']
         
-        # Extract parameters
-        starting_balance = float(data.get('starting_balance', 1000000))
+        # Run simulations for the requested portfolios that aren't cached
+        per_portfolio = (
+            params['tolerance'] is not None or
+            params['percentile_mode'] != 'full' or
+            params['sampling'] != 'random' or
+            params['control_variate']
+        )
+        # Wall time of the whole step; rng, path_loop and percentiles are timed
+        # inside it (except in process workers)
+        with timed('simulate'):
+            if per_portfolio:
+                all_results = _run_per_portfolio(params, plan)
+            else:
+                simulators = {
+                    portfolio_id: _build_simulator(params, selected[portfolio_id], plan['streams'][portfolio_id])
+                    for portfolio_id in plan['missing']
+                }
+                all_results = simulation_executor.run(
+                    simulators,
+                    params['iterations'],
+                    shocks=_common_shocks(params, plan)
+                )
         
-        # Validate starting balance
-        if starting_balance <= 0:
-            return jsonify({'error': 'Starting balance must be greater than 0'}), 400
+        for portfolio_id, portfolio in selected.items():
+            if plan['cached'][portfolio_id] is not None:
+                results['portfolios'][portfolio_id] = plan['cached'][portfolio_id]
+                continue
             
-        withdrawal_method = data.get('withdrawal_method', 'percentage')
-        withdrawal_rate = data.get('withdrawal_rate')
-        withdrawal_amount = data.get('withdrawal_amount')
-        years = int(data.get('years', 30))
-        inflation_rate = float(data.get('inflation_rate', 0.03))
-        management_fee = float(data.get('management_fee', 0.01))
-        adjust_for_inflation = data.get('adjust_for_inflation', True)
-        
-        # Calculate withdrawal amount
-        if withdrawal_method == 'percentage':
-            if withdrawal_rate is None:
-                return jsonify({'error': 'withdrawal_rate required for percentage method'}), 400
-            withdrawal = starting_balance * (float(withdrawal_rate) / 100)
-        else:
-            if withdrawal_amount is None:
-                return jsonify({'error': 'withdrawal_amount required for fixed method'}), 400
-            withdrawal = float(withdrawal_amount)
+            results['portfolios'][portfolio_id] = _format_portfolio_result(
+                params, portfolio, all_results[portfolio_id]
+            )
+            result_cache.set(plan['cache_keys'][portfolio_id], results['portfolios'][portfolio_id])
+        
+        # Adaptive runs stop early: report the most paths any portfolio needed
+        if results['adaptive']:
+            results['max_iterations'] = params['max_iterations']
+            results['iterations'] = max(result['iterations'] for result in results['portfolios'].values())
+        
+        _store_result(results)
+        
+        with timed('serialize'):
+            return jsonify(results)
+        
+    except CalculationError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        app.logger.error(f"Error in api_calculate: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+def _sse(event: str, payload: Dict) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+@app.route('/api/calculate/stream', methods=['POST'])
+def api_calculate_stream():
+    """
+    Run the same calculation as /api/calculate, streamed as server-sent events.
+    
+    Events: 'start' (request envelope), 'progress' (provisional success rate
+    after each batch), 'portfolio' (one portfolio's final result, as soon as
+    it finishes), 'complete', or 'error' if the run fails part-way.
+    """
+    try:
+        params = _parse_calculation_request(request.get_json())
+        if params['tolerance'] is not None:
+            raise CalculationError('Adaptive mode (tolerance) is not supported for streaming')
+        if params['percentile_mode'] != 'full':
+            raise CalculationError('percentile_mode must be full for streaming')
+        if params['sampling'] != 'random' or params['control_variate']:
+            raise CalculationError('Variance reduction is not supported for streaming')
+        # Batches come off one stream in order, so results match an unchunked run
+        plan = _plan_calculation(params, None)
+    except CalculationError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        app.logger.error(f"Error in api_calculate_stream: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+    
+    selected = params['selected']
+    
+    def generate():
+        try:
+            envelope = {key: value for key, value in plan['results'].items() if key != 'portfolios'}
+            envelope['portfolios'] = list(selected)
+            yield _sse('start', envelope)
+            
+            shocks = _common_shocks(params, plan)
+            for portfolio_id, portfolio in selected.items():
+                portfolio_result = plan['cached'][portfolio_id]
+                if portfolio_result is None:
+                    simulator = _build_simulator(params, portfolio, plan['streams'][portfolio_id])
+                    for progress in simulator.iter_simulation(
+                        params['iterations'], STREAM_BATCH_SIZE, shocks=shocks
+                    ):
+                        if 'result' in progress:
+                            portfolio_result = _format_portfolio_result(params, portfolio, progress['result'])
+                        else:
+                            yield _sse('progress', {'portfolio': portfolio_id, **progress})
+                    result_cache.set(plan['cache_keys'][portfolio_id], portfolio_result)
+                
+                plan['results']['portfolios'][portfolio_id] = portfolio_result
+                yield _sse('portfolio', {'id': portfolio_id, 'result': portfolio_result})
+            
+            result_id = _store_result(plan['results'])
+            yield _sse('complete', {
+                'seed': plan['results']['seed'],
+                'portfolios': list(selected),
+                'result_id': result_id
+            })
+        except Exception as e:
+            app.logger.error(f"Error in api_calculate_stream: {str(e)}")
+            yield _sse('error', {'error': str(e)})
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+def _parse_axis(values, name: str, cast) -> list:
+    """Validate one grid axis as a non-empty list of numbers."""
+    if not isinstance(values, list) or not values:
+        raise CalculationError(f'{name} must be a non-empty list')
+    try:
+        return [cast(value) for value in values]
+    except (TypeError, ValueError):
+        raise CalculationError(f'{name} must contain only numbers')
+
+
+def _parse_grid_request(data: Optional[Dict]) -> Dict:
+    """
+    Validate a scenario-grid payload and resolve its parameters.
+    
+    Args:
+        data: Request JSON
+        
+    Returns:
+        Dictionary of grid parameters
+        
+    Raises:
+        CalculationError: If the payload is invalid
+    """
+    data = data or {}
+    
+    starting_balance = float(data.get('starting_balance', 1000000))
+    if starting_balance <= 0:
+        raise CalculationError('Starting balance must be greater than 0')
+    
+    withdrawal_rates = _parse_axis(data.get('withdrawal_rates', DEFAULT_GRID_RATES), 'withdrawal_rates', float)
+    horizons = _parse_axis(data.get('horizons', DEFAULT_GRID_HORIZONS), 'horizons', int)
+    if any(rate < 0 for rate in withdrawal_rates):
+        raise CalculationError('withdrawal_rates must be non-negative')
+    if any(not 0 < horizon <= MAX_GRID_HORIZON for horizon in horizons):
+        raise CalculationError(f'horizons must be between 1 and {MAX_GRID_HORIZON} years')
+    if len(withdrawal_rates) * len(horizons) > MAX_GRID_CELLS:
+        raise CalculationError(f'grid must have at most {MAX_GRID_CELLS} cells')
+    
+    iterations = int(data.get('iterations', SIMULATION_ITERATIONS))
+    if not 0 < iterations <= MAX_SIMULATION_ITERATIONS:
+        raise CalculationError(f'iterations must be between 1 and {MAX_SIMULATION_ITERATIONS}')
+    
+    selected = _select_portfolios(data.get('portfolios', 'all'))
+    if selected is None:
+        raise CalculationError(
+            f"portfolios must be 'all', a portfolio id or a list of ids ({', '.join(PortfolioPreset.get_all())})"
+        )
+    
+    seed = _parse_seed(data.get('seed'))
+    
+    return {
+        **_parse_return_model(data),
+        'starting_balance': starting_balance,
+        'withdrawal_rates': withdrawal_rates,
+        'horizons': horizons,
+        'inflation_rate': float(data.get('inflation_rate', 0.03)),
+        'management_fee': float(data.get('management_fee', 0.01)),
+        'adjust_for_inflation': data.get('adjust_for_inflation', True),
+        'iterations': iterations,
+        'seed': seed,
+        'common_random_numbers': bool(data.get('common_random_numbers', False)),
+        'selected': selected
+    }
+
+
+@app.route('/api/grid', methods=['POST'])
+def api_grid():
+    """
+    Sweep withdrawal rates (percent) and horizons (years) for the requested portfolios.
+    
+    Each portfolio's grid is evaluated from one set of return draws, so
+    neighbouring cells differ only by their inputs, not by sampling noise.
+    """
+    try:
+        params = _parse_grid_request(request.get_json())
+        selected = params['selected']
+        max_horizon = max(params['horizons'])
+        
+        cache_params = {
+            name: params[name]
+            for name in (
+                'starting_balance', 'withdrawal_rates', 'horizons', 'inflation_rate',
+                'management_fee', 'adjust_for_inflation', 'iterations', 'common_random_numbers',
+                *RETURN_MODEL_PARAMS
+            )
+        }
+        seed, streams = _resolve_streams(params['seed'])
         
-        # Run simulations for all portfolios
         results = {
-            'balance': starting_balance,
-            'years': years,
-            'inflation_rate': inflation_rate,
-            'withdrawal_method': withdrawal_method,
-            'adjust_for_inflation': adjust_for_inflation,
-            'calculation_details': {
-                'starting_balance': starting_balance,
-                'annual_withdrawal': withdrawal,
-                'withdrawal_rate_percent': (withdrawal / starting_balance) * 100,
-                'total_withdrawals': withdrawal * years,
-                'inflation_adjusted_final_withdrawal': withdrawal * ((1 + inflation_rate) ** years) if adjust_for_inflation else withdrawal
-            },
+            'balance': params['starting_balance'],
+            'withdrawal_rates': params['withdrawal_rates'],
+            'horizons': params['horizons'],
+            'iterations': params['iterations'],
+            'seed': seed,
+            'common_random_numbers': params['common_random_numbers'],
+            'return_model': params['return_model'],
             'portfolios': {}
         }
         
-        # Get portfolio presets
-        portfolios = PortfolioPreset.get_all()
-        
-        for portfolio_id, portfolio in portfolios.items():
-            simulator = MonteCarloSimulator(
-                starting_balance=starting_balance,
-                annual_return=portfolio.expected_return,
-                annual_std_dev=portfolio.std_deviation,
-                withdrawal_amount=withdrawal,
-                years=years,
-                inflation_rate=inflation_rate,
-                management_fee=management_fee,
-                adjust_for_inflation=adjust_for_inflation
+        shocks = None
+        for portfolio_id, portfolio in selected.items():
+            cache_key = make_cache_key(
+                'grid',
+                seed=seed,
+                portfolio_id=portfolio_id,
+                expected_return=portfolio.expected_return,
+                std_deviation=portfolio.std_deviation,
+                **cache_params
             )
-            
-            sim_results = simulator.run_simulation()
-            
-            # Generate chart data
-            projection_data = generate_projection_data(
-                sim_results['percentile_paths'],
-                years
-            )
-            
-            results['portfolios'][portfolio_id] = {
-                'portfolio': {
-                    'name': portfolio.name,
-                    'expected_return': portfolio.expected_return,
-                    'std_deviation': portfolio.std_deviation
-                },
-                'success_rate': sim_results['success_rate'],
-                'median_final_balance': sim_results['median_final_balance'],
-                'percentile_10': sim_results['percentile_paths']['p10'][-1],
-                'percentile_90': sim_results['percentile_paths']['p90'][-1],
-                'annual_withdrawal': withdrawal,
-                'withdrawal_rate': sim_results['withdrawal_rate'],
-                'projection_data': projection_data
-            }
+            portfolio_result = result_cache.get(cache_key)
+            if portfolio_result is None:
+                return_model = _build_return_model(params, portfolio)
+                if params['common_random_numbers'] and shocks is None:
+                    shocks = return_model.draw_shocks(
+                        np.random.default_rng(streams[COMMON_SHOCKS_STREAM]), params['iterations'], max_horizon
+                    )
+                simulator = MonteCarloSimulator(
+                    starting_balance=params['starting_balance'],
+                    annual_return=portfolio.expected_return,
+                    annual_std_dev=portfolio.std_deviation,
+                    withdrawal_amount=0,
+                    years=max_horizon,
+                    inflation_rate=params['inflation_rate'],
+                    management_fee=params['management_fee'],
+                    adjust_for_inflation=params['adjust_for_inflation'],
+                    seed=streams[portfolio_id],
+                    return_model=return_model
+                )
+                grid = simulator.run_grid(
+                    [rate / 100 for rate in params['withdrawal_rates']],
+                    params['horizons'],
+                    params['iterations'],
+                    shocks=shocks
+                )
+                portfolio_result = {
+                    'portfolio': {
+                        'name': portfolio.name,
+                        'expected_return': portfolio.expected_return,
+                        'std_deviation': portfolio.std_deviation
+                    },
+                    'success_rate': grid['success_rate'],
+                    'percentile_10': grid['percentiles']['p10'],
+                    'percentile_50': grid['percentiles']['p50'],
+                    'percentile_90': grid['percentiles']['p90']
+                }
+                result_cache.set(cache_key, portfolio_result)
+            results['portfolios'][portfolio_id] = portfolio_result
         
         return jsonify(results)
         
+    except CalculationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        app.logger.error(f"Error in api_calculate: {str(e)}")
+        app.logger.error(f"Error in api_grid: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 
-@app.route('/api/generate-pdf', methods=['POST'])
-def api_generate_pdf():
-    """Generate PDF report from results."""
-    try:
-        data = request.get_json()
+@app.route('/api/cache/stats', methods=['GET'])
+def api_cache_stats():
+    """Report result cache hit/miss counters."""
+    return jsonify(result_cache.stats())
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Stage histograms, simulation counters and cache statistics in Prometheus text format."""
+    if not metrics_registry.enabled:
+        return jsonify({'error': 'Metrics are disabled (set METRICS_ENABLED=true)'}), 404
+    return Response(metrics_registry.render(), mimetype='text/plain; version=0.0.4')
+
+
+def _parse_report_request(data: Optional[Dict]) -> Dict:
+    """
+    Resolve the results and chart backend of a PDF report request.
+    
+    Args:
+        data: Request body with a 'result_id' returned by /api/calculate, or
+            'results' posted in full, and an optional 'chart_backend'
         
-        if not data or 'results' not in data:
-            return jsonify({'error': 'No results provided'}), 400
+    Returns:
+        Results, chart backend and a key identifying the report
         
+    Raises:
+        CalculationError: If no results are given or the chart backend is unknown
+        UnknownResultError: If the result_id is unknown or expired
+    """
+    if not data or ('results' not in data and 'result_id' not in data):
+        raise CalculationError('No results provided')
+    
+    from lib.simple_pdf_generator import CHART_BACKENDS
+    chart_backend = data.get('chart_backend', get_pdf_generator().chart_backend)
+    if chart_backend not in CHART_BACKENDS:
+        raise CalculationError(f"chart_backend must be one of {', '.join(CHART_BACKENDS)}")
+    
+    if 'result_id' in data:
+        result_id = str(data['result_id'])
+        results = result_store.get(result_id)
+        if results is None:
+            raise UnknownResultError('Unknown or expired result_id')
+        key = make_cache_key('report', result_id=result_id, chart_backend=chart_backend)
+    else:
         results = data['results']
+        key = make_cache_key('report', results=results, chart_backend=chart_backend)
+    
+    return {'results': results, 'chart_backend': chart_backend, 'key': key}
+
+
+def _report_download_name() -> str:
+    return f'endowmentiq-analysis-{datetime.now().strftime("%Y%m%d")}.pdf'
+
+
+@app.route('/api/generate-pdf', methods=['POST'])
+def api_generate_pdf():
+    """
+    Generate PDF report from results.
+    
+    Reports are built from the stored results of a 'result_id' returned by
+    /api/calculate, or from 'results' posted in full.
+    """
+    try:
+        report = _parse_report_request(request.get_json())
         
         # Generate PDF
-        pdf_buffer = simple_pdf_generator(results)
+        pdf_data = get_pdf_generator().generate_comprehensive_report(
+            report['results'],
+            chart_backend=report['chart_backend']
+        )
         
         # Send file
         return send_file(
-            pdf_buffer,
+            io.BytesIO(pdf_data),
             mimetype='application/pdf',
             as_attachment=True,
-            download_name=f'endowmentiq-analysis-{datetime.now().strftime("%Y%m%d")}.pdf'
+            download_name=_report_download_name()
         )
         
+    except CalculationError as e:
+        return jsonify({'error': str(e)}), 400
+    except UnknownResultError as e:
+        return jsonify({'error': str(e)}), 404
     except Exception as e:
         app.logger.error(f"Error in api_generate_pdf: {str(e)}")
         return jsonify({'error': 'PDF generation failed'}), 500
 
 
+def _job_response(job) -> Dict:
+    """Job status with the URLs to poll and, once it succeeded, to download."""
+    body = job.to_dict()
+    body['status_url'] = f'/api/jobs/{job.id}'
+    if job.status == 'succeeded':
+        body['artifact_url'] = f'/api/jobs/{job.id}/artifact'
+    return body
+
+
+@app.route('/api/jobs', methods=['POST'])
+def api_submit_job():
+    """
+    Queue a PDF report to be generated in the background.
+    
+    Takes the same body as /api/generate-pdf and returns 202 with the job.
+    An identical report that is queued, running or still stored is returned
+    instead of starting another. Poll /api/jobs/<id>, then download
+    /api/jobs/<id>/artifact.
+    """
+    try:
+        report = _parse_report_request(request.get_json())
+        job = job_queue.submit(
+            report['key'],
+            get_pdf_generator().generate_comprehensive_report,
+            report['results'],
+            chart_backend=report['chart_backend']
+        )
+    except CalculationError as e:
+        return jsonify({'error': str(e)}), 400
+    except UnknownResultError as e:
+        return jsonify({'error': str(e)}), 404
+    except QueueFullError:
+        return jsonify({'error': 'Too many reports queued, try again shortly'}), 503, {'Retry-After': '5'}
+    except Exception as e:
+        app.logger.error(f"Error in api_submit_job: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+    
+    return jsonify(_job_response(job)), 202, {'Location': f'/api/jobs/{job.id}'}
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def api_job_status(job_id):
+    """Report a job's status: queued, running, succeeded or failed."""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown or expired job'}), 404
+    return jsonify(_job_response(job))
+
+
+@app.route('/api/jobs/<job_id>/artifact', methods=['GET'])
+def api_job_artifact(job_id):
+    """Download the PDF of a succeeded job."""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown or expired job'}), 404
+    if job.status != 'succeeded':
+        return jsonify({'error': f'Job is {job.status}', **_job_response(job)}), 409
+    path = job_queue.artifact_path(job_id)
+    if path is None:
+        return jsonify({'error': 'Report has expired'}), 404
+    return send_file(path, mimetype='application/pdf', as_attachment=True, download_name=_report_download_name())
+
+
 if __name__ == '__main__':
     port = int(os.getenv('PORT', 5000))
     debug = os.getenv('DEBUG', 'True').lower() == 'true'
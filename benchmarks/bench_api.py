@@ -0,0 +1,31 @@
+"""
+End-to-end benchmarks for the Flask API.
+"""
+
+
+class BenchAPI:
+    """Requests through the Flask test client, including JSON parsing and chart data."""
+
+    def bench_calculate(self, benchmark, client, clear_cache, calculation_payload):
+        """POST /api/calculate with an empty result cache (three presets simulated)."""
+        def calculate():
+            return client.post('/api/calculate', json=calculation_payload)
+
+        response = benchmark.pedantic(calculate, setup=clear_cache, rounds=20, warmup_rounds=1)
+        assert response.status_code == 200
+
+    def bench_calculate_cached(self, benchmark, client, calculation_payload):
+        """POST /api/calculate served from the result cache."""
+        client.post('/api/calculate', json=calculation_payload)
+        response = benchmark(client.post, '/api/calculate', json=calculation_payload)
+        assert response.status_code == 200
+
+    def bench_grid(self, benchmark, client, clear_cache, calculation_payload):
+        """POST /api/grid on the default axes with an empty result cache."""
+        payload = {'starting_balance': calculation_payload['starting_balance'], 'seed': 2024}
+
+        def grid():
+            return client.post('/api/grid', json=payload)
+
+        response = benchmark.pedantic(grid, setup=clear_cache, rounds=20, warmup_rounds=1)
+        assert response.status_code == 200
@@ -0,0 +1,31 @@
+"""
+Benchmarks for PDF report generation.
+"""
+
+import json
+
+import pytest
+from lib.simple_pdf_generator import simple_pdf_generator
+
+
+@pytest.fixture
+def report_results(client, calculation_payload):
+    """Results of a real calculation, with projection data serialized as the report expects."""
+    results = client.post('/api/calculate', json=calculation_payload).get_json()
+    for portfolio in results['portfolios'].values():
+        portfolio['projection_data'] = json.dumps(portfolio['projection_data'])
+    return results
+
+
+class BenchPDF:
+    """ReportLab report with matplotlib charts for three portfolios."""
+
+    def bench_generate_report(self, benchmark, report_results):
+        """Full report: styles, tables and one projection chart per portfolio."""
+        pdf = benchmark.pedantic(
+            simple_pdf_generator.generate_comprehensive_report,
+            args=(report_results,),
+            rounds=10,
+            warmup_rounds=1
+        )
+        assert pdf.startswith(b'%PDF')
@@ -0,0 +1,60 @@
+"""
+Benchmarks for the Monte Carlo engine.
+"""
+
+import pytest
+from app import DEFAULT_GRID_HORIZONS, DEFAULT_GRID_RATES
+from lib.core import MonteCarloSimulator
+
+
+def make_simulator(years: int, **options) -> MonteCarloSimulator:
+    """Balanced-preset simulator with a fixed seed."""
+    return MonteCarloSimulator(
+        starting_balance=1000000,
+        annual_return=0.085,
+        annual_std_dev=0.15,
+        withdrawal_amount=40000,
+        years=years,
+        seed=2024,
+        **options
+    )
+
+
+class BenchSimulation:
+    """Run sizes from the unit-test scale up to the API's iteration cap."""
+
+    @pytest.mark.parametrize('iterations,years', [
+        (1000, 30),
+        (5000, 30),
+        (5000, 100),
+        (20000, 50),
+        (100000, 30)
+    ])
+    def bench_run_simulation(self, benchmark, iterations, years):
+        """Full-path run (the /api/calculate default mode)."""
+        sim = make_simulator(years)
+        result = benchmark(sim.run_simulation, iterations)
+        assert 0 <= result['success_rate'] <= 1
+
+    @pytest.mark.parametrize('percentile_mode', ['exact', 'sketch'])
+    def bench_percentile_modes(self, benchmark, percentile_mode):
+        """Memory-lean modes at the iteration cap."""
+        sim = make_simulator(30)
+        benchmark(sim.run_simulation, 100000, percentile_mode=percentile_mode)
+
+    def bench_float32(self, benchmark):
+        """float32 run at the iteration cap."""
+        sim = make_simulator(30, dtype='float32')
+        benchmark(sim.run_simulation, 100000)
+
+    def bench_calculate_sustainable_withdrawal(self, benchmark):
+        """Breakeven-quantile solver at its default 5000 iterations."""
+        sim = make_simulator(30)
+        withdrawal = benchmark(sim.calculate_sustainable_withdrawal, 0.7)
+        assert withdrawal > 0
+
+    def bench_run_grid(self, benchmark):
+        """Default /api/grid axes (11 rates x 5 horizons) from one set of draws."""
+        sim = make_simulator(50)
+        rates = [rate / 100 for rate in DEFAULT_GRID_RATES]
+        benchmark(sim.run_grid, rates, DEFAULT_GRID_HORIZONS)
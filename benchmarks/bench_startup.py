@@ -0,0 +1,44 @@
+"""
+Benchmarks for API process startup.
+"""
+
+import subprocess
+import sys
+
+# A new worker imports the app and answers its first request
+FIRST_REQUEST = "import app; assert app.app.test_client().get('/health').status_code == 200"
+
+# Cumulative `python -X importtime` budget for `import app`, in microseconds.
+# About 0.4 s locally; the margin absorbs slower machines.
+IMPORT_BUDGET_US = 1500000
+
+
+def app_import_time() -> int:
+    """Cumulative `-X importtime` of `import app` in a new process, in microseconds."""
+    stderr = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app'],
+        capture_output=True, text=True, check=True
+    ).stderr
+    for line in stderr.splitlines():
+        if line.startswith('import time:') and line.rstrip().endswith('| app'):
+            return int(line[len('import time:'):].split('|')[1])
+    raise RuntimeError('app missing from -X importtime output')
+
+
+class BenchStartup:
+    """Cold start of a fresh interpreter, as when a container scales up."""
+
+    def bench_time_to_first_request(self, benchmark):
+        """Import app.py and serve /health in a new process."""
+        benchmark.pedantic(
+            subprocess.run,
+            args=([sys.executable, '-c', FIRST_REQUEST],),
+            kwargs={'check': True, 'capture_output': True},
+            rounds=5,
+            warmup_rounds=1
+        )
+
+    def bench_app_import_within_budget(self, benchmark):
+        """Import app.py in a new process and check its cumulative import time."""
+        import_time = benchmark.pedantic(app_import_time, rounds=5, warmup_rounds=1)
+        assert import_time < IMPORT_BUDGET_US, f"import app took {import_time / 1e6:.2f}s"
@@ -0,0 +1,45 @@
+"""
+Shared fixtures for performance benchmarks.
+Run with ./run-benchmarks.sh; results are saved as JSON under .benchmarks/.
+"""
+
+import os
+import sys
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app, result_cache
+
+
+@pytest.fixture
+def client():
+    """Create Flask test client."""
+    app.config['TESTING'] = True
+
+    with app.test_client() as client:
+        with app.app_context():
+            yield client
+
+
+@pytest.fixture
+def clear_cache():
+    """Empty the result cache, so every measured request really simulates."""
+    return result_cache.clear
+
+
+@pytest.fixture
+def calculation_payload():
+    """Default /api/calculate request: all three presets, 30 years, 5000 iterations."""
+    return {
+        'starting_balance': 1000000,
+        'withdrawal_rate': 4.0,
+        'withdrawal_method': 'percentage',
+        'years': 30,
+        'inflation_rate': 0.03,
+        'management_fee': 0.01,
+        'adjust_for_inflation': True,
+        'seed': 2024
+    }
@@ -56,6 +56,20 @@ export const calculatorApi = {
   },
 
   async generatePdf(inputs: CalculatorInputs, results: MonteCarloResults): Promise<Blob> {
+    // The server keeps recent results; only upload them if it no longer has this run
+    if (results.result_id) {
+      try {
+        const response = await api.post('/api/generate-pdf', { result_id: results.result_id }, {
+          responseType: 'blob',
+        });
+        return response.data;
+      } catch (error) {
+        if (!axios.isAxiosError(error) || error.response?.status !== 404) {
+          throw error;
+        }
+      }
+    }
+
     const payload = {
       inputs,
       results,
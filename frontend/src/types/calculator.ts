@@ -63,6 +63,7 @@ export interface PortfolioResult {
 }
 
 export interface MonteCarloResults {
+  result_id?: string;
   withdrawal_amount: number;
   withdrawal_method: string;
   years: number;
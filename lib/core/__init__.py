@@ -7,5 +7,6 @@ Following grammar-ops patterns for module organization.
 
 from .monte_carlo import MonteCarloSimulator
 from .portfolio import Portfolio, PortfolioPreset
+from .executor import SimulationExecutor
 
-__all__ = ['MonteCarloSimulator', 'Portfolio', 'PortfolioPreset']
\ No newline at end of file
+__all__ = ['MonteCarloSimulator', 'Portfolio', 'PortfolioPreset', 'SimulationExecutor']
\ No newline at end of file
@@ -0,0 +1,256 @@
+"""
+Bounded result cache for simulation outputs.
+Keys are canonical hashes of simulation inputs; backends are in-process or a shared SQLite file.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+from typing import Any, Dict, Optional
+
+
+def _canonical(value: Any) -> Any:
+    """Value with integral floats replaced by ints, inside lists and dicts too."""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, dict):
+        return {key: _canonical(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    return value
+
+
+def make_cache_key(namespace: str, **params) -> str:
+    """
+    Build a canonical cache key from simulation inputs.
+
+    Integers and floats that compare equal hash identically (1000000 and
+    1000000.0 give the same key), including inside lists and dicts, and
+    parameter order does not matter.
+
+    Args:
+        namespace: Kind of cached value (e.g. 'portfolio')
+        **params: JSON-serializable inputs that determine the value
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    payload = json.dumps([namespace, _canonical(params)], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class MemoryCacheBackend:
+    """In-process LRU cache with per-entry time-to-live."""
+
+    def __init__(self, max_entries: int = 256, ttl: Optional[float] = 3600):
+        """
+        Initialize memory backend.
+
+        Args:
+            max_entries: Maximum number of entries before the least recently used is evicted
+            ttl: Seconds an entry stays valid (None for no expiry)
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any):
+        """Store a value, evicting the least recently used entries if full."""
+        expires_at = time.time() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """LRU cache in a local SQLite file, shared by every worker process on the host."""
+
+    def __init__(self, path: str, max_entries: int = 1024, ttl: Optional[float] = 3600):
+        """
+        Initialize SQLite backend.
+
+        Args:
+            path: Database file path (created if missing)
+            max_entries: Maximum number of entries before the least recently used is evicted
+            ttl: Seconds an entry stays valid (None for no expiry)
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as connection, connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, '
+                'expires_at REAL, accessed_at REAL NOT NULL)'
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # A short-lived connection per call is safe across threads and forked workers
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired."""
+        now = time.time()
+        with closing(self._connect()) as connection, connection:
+            row = connection.execute(
+                'SELECT value, expires_at FROM cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at < now:
+                connection.execute('DELETE FROM cache WHERE key = ?', (key,))
+                return None
+            connection.execute('UPDATE cache SET accessed_at = ? WHERE key = ?', (now, key))
+        return json.loads(value)
+
+    def set(self, key: str, value: Any):
+        """Store a JSON-serializable value, evicting the least recently used entries if full."""
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl is not None else None
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)',
+                (key, json.dumps(value), expires_at, now)
+            )
+            connection.execute(
+                'DELETE FROM cache WHERE key IN ('
+                'SELECT key FROM cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,)
+            )
+
+    def clear(self):
+        """Remove every entry."""
+        with closing(self._connect()) as connection, connection:
+            connection.execute('DELETE FROM cache')
+
+    def __len__(self) -> int:
+        with closing(self._connect()) as connection, connection:
+            return connection.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+
+
+class ResultCache:
+    """Cache front-end that counts hits and misses over a pluggable backend."""
+
+    def __init__(self, backend=None):
+        """
+        Initialize result cache.
+
+        Args:
+            backend: MemoryCacheBackend, SQLiteCacheBackend or any object with
+                get/set/clear/__len__ (None disables caching)
+        """
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def get(self, key: str) -> Optional[Any]:
+        """Look up a value, recording a hit or miss."""
+        if self.backend is None:
+            return None
+        value = self.backend.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def peek(self, key: str) -> Optional[Any]:
+        """Look up a value without touching the hit/miss counters."""
+        if self.backend is None:
+            return None
+        return self.backend.get(key)
+
+    def set(self, key: str, value: Any):
+        """Store a value."""
+        if self.backend is not None:
+            self.backend.set(key, value)
+
+    def clear(self):
+        """Remove every entry and reset the counters."""
+        if self.backend is not None:
+            self.backend.clear()
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for this process and the backend's current size."""
+        lookups = self.hits + self.misses
+        return {
+            'enabled': self.enabled,
+            'backend': type(self.backend).__name__ if self.backend is not None else None,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self.backend) if self.backend is not None else 0
+        }
+
+
+def create_result_cache(
+    backend: str = 'memory',
+    path: Optional[str] = None,
+    max_entries: int = 256,
+    ttl: Optional[float] = 3600
+) -> ResultCache:
+    """
+    Build a result cache from configuration values.
+
+    Args:
+        backend: 'memory', 'sqlite' or 'none'
+        path: SQLite database path (required for the sqlite backend)
+        max_entries: Maximum number of cached entries
+        ttl: Seconds an entry stays valid
+
+    Returns:
+        Configured ResultCache
+    """
+    if backend == 'none':
+        return ResultCache(None)
+    if backend == 'memory':
+        return ResultCache(MemoryCacheBackend(max_entries=max_entries, ttl=ttl))
+    if backend == 'sqlite':
+        if not path:
+            raise ValueError("path is required for the sqlite cache backend")
+        return ResultCache(SQLiteCacheBackend(path, max_entries=max_entries, ttl=ttl))
+    raise ValueError("backend must be one of memory, sqlite, none")
@@ -0,0 +1,280 @@
+"""
+Execution backends for Monte Carlo simulations.
+Runs portfolio simulations serially, on a thread pool or on a persistent process pool.
+"""
+
+import contextvars
+import math
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from . import kernels
+from .monte_carlo import MonteCarloSimulator
+
+
+BACKENDS = ('serial', 'thread', 'process')
+
+# Pools are created once per (backend, workers) and reused across requests
+_POOLS: Dict[Tuple[str, Optional[int]], Executor] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def _warm_worker():
+    """Pay numpy import and first-call costs once when a worker starts."""
+    np.random.default_rng(0).standard_normal(16)
+    kernels.warm_up()
+
+
+def _process_context():
+    """Start workers from a clean forkserver where available, never by forking a threaded server."""
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload([__name__])
+        return context
+    return multiprocessing.get_context('spawn')
+
+
+def _get_pool(backend: str, max_workers: Optional[int]) -> Executor:
+    """Return the shared warm pool for a backend, creating it on first use."""
+    key = (backend, max_workers)
+    with _POOLS_LOCK:
+        pool = _POOLS.get(key)
+        if pool is None:
+            if backend == 'thread':
+                pool = ThreadPoolExecutor(max_workers=max_workers)
+            else:
+                pool = ProcessPoolExecutor(
+                    max_workers=max_workers,
+                    mp_context=_process_context(),
+                    initializer=_warm_worker
+                )
+            _POOLS[key] = pool
+        return pool
+
+
+def shutdown_pools():
+    """Shut down every shared worker pool."""
+    with _POOLS_LOCK:
+        for pool in _POOLS.values():
+            pool.shutdown()
+        _POOLS.clear()
+
+
+def _simulate_chunk(
+    simulator: MonteCarloSimulator,
+    rng: np.random.Generator,
+    start: int,
+    stop: int,
+    shocks: Optional[np.ndarray],
+    paths: np.ndarray,
+    final_balances: np.ndarray,
+    depletion_years: np.ndarray
+):
+    """Simulate rows [start, stop) of a run and write them into the output arrays."""
+    if shocks is None:
+        chunk_shocks = simulator._draw_shocks(stop - start, simulator.years, rng)
+    else:
+        chunk_shocks = shocks[start:stop]
+
+    returns = simulator._draw_returns(stop - start, chunk_shocks)
+    chunk_paths, chunk_finals, chunk_depletion = simulator._simulate_paths(returns)
+
+    paths[start:stop] = chunk_paths
+    final_balances[start:stop] = chunk_finals
+    depletion_years[start:stop] = chunk_depletion
+
+
+def _attach(spec: Optional[Tuple[str, tuple, str]]) -> Tuple[Optional[SharedMemory], Optional[np.ndarray]]:
+    """Attach to a shared-memory array described by (name, shape, dtype)."""
+    if spec is None:
+        return None, None
+    name, shape, dtype = spec
+    block = SharedMemory(name=name)
+    return block, np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+def _process_chunk(
+    simulator: MonteCarloSimulator,
+    rng: np.random.Generator,
+    start: int,
+    stop: int,
+    shocks_spec: Optional[Tuple[str, tuple, str]],
+    output_specs: List[Tuple[str, tuple, str]]
+):
+    """Process-pool entry point: attach to shared memory and simulate one chunk."""
+    blocks = []
+    try:
+        shocks_block, shocks = _attach(shocks_spec)
+        if shocks_block is not None:
+            blocks.append(shocks_block)
+        outputs = []
+        for spec in output_specs:
+            block, array = _attach(spec)
+            blocks.append(block)
+            outputs.append(array)
+        _simulate_chunk(simulator, rng, start, stop, shocks, *outputs)
+        # Drop array views before closing the blocks they point into
+        del shocks, outputs
+    finally:
+        for block in blocks:
+            block.close()
+
+
+class _SharedArrays:
+    """Shared-memory arrays owned by the parent for the duration of one run."""
+
+    def __init__(self):
+        self.blocks: List[SharedMemory] = []
+        self.arrays: Dict[Tuple[str, tuple, str], np.ndarray] = {}
+
+    def create(self, shape: tuple, dtype) -> Tuple[str, tuple, str]:
+        """Allocate an array in shared memory and return its attach spec."""
+        dtype = np.dtype(dtype)
+        block = SharedMemory(create=True, size=max(1, math.prod(shape) * dtype.itemsize))
+        self.blocks.append(block)
+        spec = (block.name, tuple(shape), dtype.str)
+        self.arrays[spec] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+        return spec
+
+    def release(self):
+        """Drop the array views, then close and unlink every block."""
+        self.arrays.clear()
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+
+class SimulationExecutor:
+    """Runs simulations for several portfolios on a configurable execution backend."""
+
+    def __init__(
+        self,
+        backend: str = 'serial',
+        max_workers: Optional[int] = None,
+        chunk_size: Optional[int] = None
+    ):
+        """
+        Initialize executor.
+
+        Args:
+            backend: 'serial', 'thread' or 'process'
+            max_workers: Pool size (defaults to the CPU count)
+            chunk_size: Split each run into chunks of this many iterations
+                (default: one chunk per portfolio)
+
+        A run split into several chunks draws each chunk from an independent
+        child stream of the simulator's Generator, so results depend on the
+        chunk size but not on the backend.
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"backend must be one of {', '.join(BACKENDS)}")
+        if chunk_size is not None and chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+
+        self.backend = backend
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+
+    def _chunks(self, simulator: MonteCarloSimulator, iterations: int) -> List[Tuple[np.random.Generator, int, int]]:
+        """Split a run into (rng, start, stop) chunks."""
+        if not self.chunk_size or iterations <= self.chunk_size:
+            return [(simulator.rng, 0, iterations)]
+
+        bounds = list(range(0, iterations, self.chunk_size)) + [iterations]
+        rngs = simulator.rng.spawn(len(bounds) - 1)
+        return [(rng, start, stop) for rng, start, stop in zip(rngs, bounds[:-1], bounds[1:])]
+
+    def run(
+        self,
+        simulators: Dict[str, MonteCarloSimulator],
+        iterations: int = 5000,
+        shocks: Optional[np.ndarray] = None
+    ) -> Dict[str, Dict]:
+        """
+        Run every simulator and return their results keyed like the input.
+
+        Args:
+            simulators: Simulators keyed by portfolio id
+            iterations: Number of scenarios per simulator
+            shocks: Optional standard-normal shock matrix shared by every simulator
+
+        Returns:
+            Simulation result dictionaries keyed by portfolio id
+        """
+        if self.backend == 'process':
+            return self._run_process(simulators, iterations, shocks)
+
+        outputs = {
+            key: (
+                np.empty((iterations, simulator.years + 1), dtype=simulator.dtype),
+                np.empty(iterations, dtype=simulator.dtype),
+                np.empty(iterations, dtype=np.int64)
+            )
+            for key, simulator in simulators.items()
+        }
+        tasks = [
+            (simulator, rng, start, stop, shocks, *outputs[key])
+            for key, simulator in simulators.items()
+            for rng, start, stop in self._chunks(simulator, iterations)
+        ]
+
+        if self.backend == 'serial':
+            for task in tasks:
+                _simulate_chunk(*task)
+        else:
+            pool = _get_pool(self.backend, self.max_workers)
+            # Copy the request context so worker threads report stage timings to it
+            futures = [pool.submit(contextvars.copy_context().run, _simulate_chunk, *task) for task in tasks]
+            for future in futures:
+                future.result()
+
+        return {
+            key: simulator._summarize(*outputs[key])
+            for key, simulator in simulators.items()
+        }
+
+    def _run_process(
+        self,
+        simulators: Dict[str, MonteCarloSimulator],
+        iterations: int,
+        shocks: Optional[np.ndarray]
+    ) -> Dict[str, Dict]:
+        """Run chunks on the process pool, returning arrays through shared memory."""
+        shared = _SharedArrays()
+        try:
+            shocks_spec = None
+            if shocks is not None:
+                shocks_spec = shared.create(shocks.shape, shocks.dtype)
+                shared.arrays[shocks_spec][:] = shocks
+
+            specs = {
+                key: [
+                    shared.create((iterations, simulator.years + 1), simulator.dtype),
+                    shared.create((iterations,), simulator.dtype),
+                    shared.create((iterations,), np.int64)
+                ]
+                for key, simulator in simulators.items()
+            }
+
+            pool = _get_pool('process', self.max_workers)
+            futures = [
+                pool.submit(_process_chunk, simulator, rng, start, stop, shocks_spec, specs[key])
+                for key, simulator in simulators.items()
+                for rng, start, stop in self._chunks(simulator, iterations)
+            ]
+            for future in futures:
+                future.result()
+
+            # Copy out of shared memory before the blocks are released
+            return {
+                key: simulator._summarize(*(shared.arrays[spec].copy() for spec in specs[key]))
+                for key, simulator in simulators.items()
+            }
+        finally:
+            shared.release()
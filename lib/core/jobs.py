@@ -0,0 +1,258 @@
+"""
+Background jobs for slow work such as PDF reports.
+Runs jobs on a bounded thread pool with a per-job timeout, deduplicates identical
+jobs in flight and keeps their artifacts on local disk until a time-to-live expires.
+"""
+
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+
+JOB_STATUSES = ('queued', 'running', 'succeeded', 'failed')
+
+
+class QueueFullError(RuntimeError):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+class ArtifactStore:
+    """Job artifacts as files in a local directory, removed once older than the TTL."""
+
+    def __init__(self, directory: str, ttl: float = 3600, suffix: str = '.bin'):
+        """
+        Initialize artifact store.
+
+        Args:
+            directory: Directory holding artifacts (created on first save)
+            ttl: Seconds an artifact is kept after it was written
+            suffix: File name suffix of artifacts, e.g. '.pdf'
+        """
+        self.directory = directory
+        self.ttl = ttl
+        self.suffix = suffix
+
+    def path(self, job_id: str) -> str:
+        """File path of a job's artifact."""
+        return os.path.join(self.directory, f'{job_id}{self.suffix}')
+
+    def save(self, job_id: str, data: bytes) -> str:
+        """Write an artifact atomically and return its path."""
+        path = self.path(job_id)
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return path
+
+    def exists(self, job_id: str) -> bool:
+        return os.path.exists(self.path(job_id))
+
+    def discard(self, job_id: str):
+        """Delete a job's artifact if present."""
+        try:
+            os.unlink(self.path(job_id))
+        except FileNotFoundError:
+            pass
+
+    def cleanup(self) -> List[str]:
+        """
+        Delete expired artifacts, including those left by earlier processes.
+
+        Returns:
+            Ids of the jobs whose artifacts were deleted
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        cutoff = time.time() - self.ttl
+        removed = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if os.path.getmtime(path) >= cutoff:
+                    continue
+                os.unlink(path)
+            except FileNotFoundError:
+                continue
+            if name.endswith(self.suffix):
+                removed.append(name[:-len(self.suffix)])
+        return removed
+
+
+class Job:
+    """State of one submitted job."""
+
+    def __init__(self, key: str):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = 'queued'
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        # Timed out but its call has not returned yet, so it still holds a worker
+        self.abandoned = False
+
+    @property
+    def active(self) -> bool:
+        return self.status in ('queued', 'running')
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'status': self.status,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+
+
+class JobQueue:
+    """
+    Bounded background job queue writing each job's result to an ArtifactStore.
+
+    Identical jobs (same key) share one job while it is queued, running or
+    its artifact is still stored. The timeout is advisory: a job still
+    running past it is reported failed straight away and its result
+    discarded, but Python threads cannot be interrupted, so it keeps its
+    worker and counts toward max_pending until the call returns.
+    """
+
+    def __init__(self, store: ArtifactStore, max_workers: int = 2, max_pending: int = 32, timeout: float = 120):
+        """
+        Initialize job queue.
+
+        Args:
+            store: Where artifacts are written
+            max_workers: Jobs run at the same time
+            max_pending: Jobs queued or running before submissions are refused
+            timeout: Seconds a job may run before it is marked failed
+        """
+        self.store = store
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._jobs: Dict[str, Job] = {}
+        self._by_key: Dict[str, str] = {}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._lock = threading.Lock()
+
+    def submit(self, key: str, func: Callable[..., bytes], *args, **kwargs) -> Job:
+        """
+        Queue a job, or return the existing job with the same key.
+
+        Args:
+            key: Identity of the job's inputs, used for deduplication
+            func: Called with *args and **kwargs on a worker; returns the artifact bytes
+
+        Returns:
+            The queued (or deduplicated) job
+
+        Raises:
+            QueueFullError: If max_pending jobs are already queued or running
+        """
+        self.cleanup()
+        with self._lock:
+            existing = self._jobs.get(self._by_key.get(key))
+            if existing is not None:
+                self._check_timeout(existing)
+                if existing.active or (existing.status == 'succeeded' and self.store.exists(existing.id)):
+                    return existing
+
+            pending = 0
+            for job in self._jobs.values():
+                self._check_timeout(job)
+                pending += job.active or job.abandoned
+            if pending >= self.max_pending:
+                raise QueueFullError(f'{pending} jobs already pending')
+
+            job = Job(key)
+            self._jobs[job.id] = job
+            self._by_key[key] = job.id
+        self._pool.submit(self._run, job, func, args, kwargs)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return a job by id, or None if unknown or expired."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                self._check_timeout(job)
+            return job
+
+    def artifact_path(self, job_id: str) -> Optional[str]:
+        """Path of a succeeded job's artifact, or None if it is unavailable."""
+        job = self.get(job_id)
+        if job is None or job.status != 'succeeded' or not self.store.exists(job_id):
+            return None
+        return self.store.path(job_id)
+
+    def cleanup(self):
+        """Delete expired artifacts and forget finished jobs older than the store's TTL."""
+        self.store.cleanup()
+        cutoff = time.time() - self.store.ttl
+        with self._lock:
+            for job_id, job in list(self._jobs.items()):
+                if not job.active and not job.abandoned and job.finished_at < cutoff:
+                    del self._jobs[job_id]
+                    if self._by_key.get(job.key) == job_id:
+                        del self._by_key[job.key]
+
+    def shutdown(self):
+        """Stop accepting work and wait for running jobs."""
+        self._pool.shutdown()
+
+    def _check_timeout(self, job: Job):
+        # Caller holds the lock
+        if job.status == 'running' and time.time() - job.started_at > self.timeout:
+            self._finish(job, 'failed', f'Timed out after {self.timeout:g}s')
+            job.abandoned = True
+
+    def _finish(self, job: Job, status: str, error: Optional[str] = None):
+        job.status = status
+        job.error = error
+        job.finished_at = time.time()
+
+    def _run(self, job: Job, func: Callable[..., bytes], args: tuple, kwargs: Dict):
+        with self._lock:
+            job.status = 'running'
+            job.started_at = time.time()
+        try:
+            self._execute(job, func, args, kwargs)
+        finally:
+            with self._lock:
+                job.abandoned = False
+
+    def _execute(self, job: Job, func: Callable[..., bytes], args: tuple, kwargs: Dict):
+        try:
+            data = func(*args, **kwargs)
+        except Exception as e:
+            with self._lock:
+                if job.active:
+                    self._finish(job, 'failed', str(e))
+            return
+
+        try:
+            self.store.save(job.id, data)
+        except Exception as e:
+            with self._lock:
+                if job.active:
+                    self._finish(job, 'failed', f'Could not store artifact: {e}')
+            return
+        with self._lock:
+            self._check_timeout(job)
+            if job.active:
+                self._finish(job, 'succeeded')
+                return
+        # Finished after its timeout: the result is discarded
+        self.store.discard(job.id)
@@ -0,0 +1,211 @@
+"""
+Stage timing and counters for simulations and API requests.
+Renders Prometheus text format and per-request Server-Timing headers.
+"""
+
+import contextvars
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+# Histogram bucket upper bounds in seconds
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRIC_PREFIX = 'endowment'
+
+# (name, type, help, value) samples produced by a collector at scrape time
+Sample = Tuple[str, str, str, float]
+
+
+class Histogram:
+    """Cumulative-bucket histogram of observed durations."""
+
+    def __init__(self, buckets: Tuple[float, ...] = STAGE_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        """Record one observation."""
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(le, count) pairs, ending with +Inf."""
+        total = 0
+        pairs = []
+        for bound, count in zip(list(self.buckets) + [float('inf')], self.counts):
+            total += count
+            pairs.append(('+Inf' if bound == float('inf') else repr(bound), total))
+        return pairs
+
+
+class RequestTimings:
+    """Total seconds per stage within one request, for the Server-Timing header."""
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float):
+        # Executor threads can report stages of the same request concurrently
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def header(self) -> str:
+        """Server-Timing header value with durations in milliseconds."""
+        return ', '.join(f'{stage};dur={seconds * 1000:.3f}' for stage, seconds in self.stages.items())
+
+
+_request_timings: contextvars.ContextVar[Optional[RequestTimings]] = contextvars.ContextVar(
+    'request_timings', default=None
+)
+
+
+class MetricsRegistry:
+    """
+    Process-wide stage histograms and counters.
+
+    Disabled by default; timed() then returns a shared no-op context manager
+    unless the current request collects Server-Timing, so instrumentation
+    costs a context-variable lookup per stage.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.stages: Dict[str, Histogram] = {}
+        self.counters: Dict[str, float] = {}
+        self.counter_help: Dict[str, str] = {}
+        self.collectors: List[Callable[[], List[Sample]]] = []
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float):
+        """Record a stage duration."""
+        with self._lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = Histogram()
+            histogram.observe(seconds)
+
+    def inc(self, name: str, value: float = 1, help_text: str = ''):
+        """Increase a counter (no-op while disabled)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+            self.counter_help.setdefault(name, help_text)
+
+    def add_collector(self, collector: Callable[[], List[Sample]]):
+        """Register a callable returning samples read at scrape time (e.g. cache stats)."""
+        self.collectors.append(collector)
+
+    def reset(self):
+        """Drop every recorded observation and counter."""
+        with self._lock:
+            self.stages.clear()
+            self.counters.clear()
+
+    def render(self) -> str:
+        """All metrics in Prometheus text exposition format."""
+        stage_metric = f'{METRIC_PREFIX}_stage_seconds'
+        lines = [
+            f'# HELP {stage_metric} Time spent in each request and simulation stage.',
+            f'# TYPE {stage_metric} histogram'
+        ]
+        with self._lock:
+            for stage, histogram in sorted(self.stages.items()):
+                for le, count in histogram.cumulative():
+                    lines.append(f'{stage_metric}_bucket{{stage="{stage}",le="{le}"}} {count}')
+                lines.append(f'{stage_metric}_sum{{stage="{stage}"}} {histogram.sum!r}')
+                lines.append(f'{stage_metric}_count{{stage="{stage}"}} {histogram.count}')
+            counters = [
+                (f'{METRIC_PREFIX}_{name}', 'counter', self.counter_help[name], value)
+                for name, value in sorted(self.counters.items())
+            ]
+
+        samples = counters + [sample for collector in self.collectors for sample in collector()]
+        for name, kind, help_text, value in samples:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            lines.append(f'{name} {value!r}')
+        return '\n'.join(lines) + '\n'
+
+
+class _StageTimer:
+    """Times one stage into the registry and the current request's timings."""
+
+    __slots__ = ('stage', 'timings', 'start')
+
+    def __init__(self, stage: str, timings: Optional[RequestTimings]):
+        self.stage = stage
+        self.timings = timings
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        seconds = time.perf_counter() - self.start
+        if registry.enabled:
+            registry.observe(self.stage, seconds)
+        if self.timings is not None:
+            self.timings.add(self.stage, seconds)
+        return False
+
+
+class _NullTimer:
+    """Shared no-op stand-in for _StageTimer."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+registry = MetricsRegistry()
+
+
+def timed(stage: str):
+    """
+    Context manager timing a stage.
+
+    Args:
+        stage: Stage name, e.g. 'rng' or 'path_loop'
+
+    Returns:
+        Context manager (a shared no-op when nothing is collecting)
+    """
+    timings = _request_timings.get()
+    if not registry.enabled and timings is None:
+        return _NULL_TIMER
+    return _StageTimer(stage, timings)
+
+
+def start_request_timings() -> RequestTimings:
+    """Collect stage timings for the current request (and threads it copies its context to)."""
+    timings = RequestTimings()
+    _request_timings.set(timings)
+    return timings
+
+
+def request_timings() -> Optional[RequestTimings]:
+    """Stage timings being collected for the current request, if any."""
+    return _request_timings.get()
+
+
+def stop_request_timings():
+    """Stop collecting stage timings for the current request."""
+    _request_timings.set(None)
@@ -4,8 +4,195 @@ Simulates thousands of market scenarios to calculate probability of portfolio su
 """
 
 import numpy as np
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterator, List, Tuple, Optional, Union
 import json
+import secrets
+from statistics import NormalDist
+
+from .kernels import resolve_engine, simulate_paths
+from .metrics import registry, timed
+from .percentiles import PercentileSketch
+from .return_models import NormalReturns, ReturnModel
+from .sampling import (
+    SAMPLING_METHODS, SOBOL_AVAILABLE, antithetic_shocks, sample_groups, sobol_normals
+)
+from .spending import FixedSpending, SpendingPolicy
+
+
+SeedLike = Union[int, np.random.SeedSequence, np.random.Generator, None]
+
+# How percentile paths are computed: from every stored path, year by year
+# without storing paths, or from a bounded-memory sketch
+PERCENTILE_MODES = ('full', 'exact', 'sketch')
+
+PERCENTILES = (10, 50, 90)
+
+# Floating-point types for draws, balances and percentiles; float32 halves
+# memory traffic at about 1e-6 relative precision
+DTYPES = ('float64', 'float32')
+
+
+def new_seed() -> int:
+    """Generate a fresh random seed that round-trips through JSON/JavaScript."""
+    # Stay within Number.MAX_SAFE_INTEGER so the frontend can echo it back exactly
+    return secrets.randbits(53)
+
+
+def spawn_streams(seed: Optional[int], keys: List[str]) -> Tuple[int, Dict[str, np.random.SeedSequence]]:
+    """
+    Derive one independent random stream per key from a root seed.
+    
+    Args:
+        seed: Root seed (a fresh one is generated if None)
+        keys: Stream names, e.g. portfolio ids in a stable order
+        
+    Returns:
+        Tuple of (root seed, mapping of key to child SeedSequence)
+    """
+    if seed is None:
+        seed = new_seed()
+    children = np.random.SeedSequence(seed).spawn(len(keys))
+    return seed, dict(zip(keys, children))
+
+
+def draw_shocks(rng: np.random.Generator, iterations: int, years: int) -> np.ndarray:
+    """
+    Draw a whole (iterations x years) standard-normal shock matrix in one call.
+    
+    Sharing one matrix across portfolios (common random numbers) makes
+    portfolio-vs-portfolio differences far less noisy at the same iteration count.
+    
+    Args:
+        rng: Generator to draw from
+        iterations: Number of scenarios
+        years: Number of simulated years
+        
+    Returns:
+        Array of shape (iterations, years)
+    """
+    return rng.standard_normal((iterations, years))
+
+
+class GrowthPaths:
+    """
+    Cumulative growth of a fixed set of return paths, reusable across withdrawal levels.
+    
+    With per-year growth g_t = 1 + r_t - fee and cumulative growth
+    G_t = g_1 * ... * g_t, the balance after year t is
+    G_t * (B0 - W * D_t), where D_t = sum_{k<=t} c_k / G_k and c_k is the
+    inflation factor of year k's withdrawal. G and D are computed once, so
+    balances for a new first-year withdrawal W are one broadcast product,
+    and success rates are a binary search over sorted breakeven withdrawals
+    B0 / D_t. A year with g_t <= 0 wipes a path out whatever the withdrawal.
+    """
+    
+    def __init__(
+        self,
+        returns: np.ndarray,
+        starting_balance: float,
+        management_fee: float,
+        inflation_factors: np.ndarray
+    ):
+        """
+        Precompute cumulative growth and discounted withdrawals.
+        
+        Args:
+            returns: Market returns with shape (iterations, years)
+            starting_balance: Initial endowment amount
+            management_fee: Annual management fee
+            inflation_factors: Per-year withdrawal multipliers of shape (years,)
+        """
+        growth = 1 + returns - management_fee
+        self.starting_balance = starting_balance
+        self.iterations, self.years = returns.shape
+        
+        # Paths stay wiped out from the first non-positive growth year on
+        self.wiped_out = np.cumsum(growth <= 0, axis=1) > 0
+        self.cumulative_growth = np.cumprod(np.where(growth > 0, growth, 1.0), axis=1)
+        self.discounted_withdrawals = np.cumsum(inflation_factors / self.cumulative_growth, axis=1)
+        self._sorted_breakevens: Dict[int, np.ndarray] = {}
+    
+    def breakevens(self, horizon: Optional[int] = None) -> np.ndarray:
+        """
+        Largest first-year withdrawal each path sustains through a horizon.
+        
+        The discounted sum only grows with t, so a path survives every year
+        up to the horizon iff W < B0 / D_horizon.
+        
+        Args:
+            horizon: Years to survive (default: every year)
+            
+        Returns:
+            Breakeven withdrawal per path (0 for wiped-out paths)
+        """
+        column = (horizon or self.years) - 1
+        breakevens = self.starting_balance / self.discounted_withdrawals[:, column]
+        breakevens[self.wiped_out[:, column]] = 0.0
+        return breakevens
+    
+    def sorted_breakevens(self, horizon: Optional[int] = None) -> np.ndarray:
+        """Breakeven withdrawals in ascending order (computed once per horizon)."""
+        horizon = horizon or self.years
+        if horizon not in self._sorted_breakevens:
+            self._sorted_breakevens[horizon] = np.sort(self.breakevens(horizon))
+        return self._sorted_breakevens[horizon]
+    
+    def success_rate(self, withdrawal, horizon: Optional[int] = None):
+        """
+        Share of paths that survive a first-year withdrawal through a horizon.
+        
+        Args:
+            withdrawal: First-year withdrawal, or an array of them
+            horizon: Years to survive (default: every year)
+            
+        Returns:
+            Success rate with the shape of withdrawal
+        """
+        breakevens = self.sorted_breakevens(horizon)
+        # A path survives W iff its breakeven exceeds W
+        failures = np.searchsorted(breakevens, withdrawal, side='right')
+        return (self.iterations - failures) / self.iterations
+    
+    def balances(self, withdrawal, horizon: Optional[int] = None) -> np.ndarray:
+        """
+        Balances floored at zero after a horizon, for one or more withdrawals.
+        
+        Args:
+            withdrawal: First-year withdrawal, or an array of shape (levels,)
+            horizon: Years simulated (default: every year)
+            
+        Returns:
+            Array of shape (iterations,) or (levels, iterations)
+        """
+        column = (horizon or self.years) - 1
+        withdrawal = np.asarray(withdrawal, dtype=float)[..., None]
+        raw = self.cumulative_growth[:, column] * (
+            self.starting_balance - withdrawal * self.discounted_withdrawals[:, column]
+        )
+        # Depletion is permanent: a path is empty once W reaches its breakeven
+        depleted = (withdrawal >= self.breakevens(column + 1)) | self.wiped_out[:, column]
+        return np.where(depleted, 0.0, raw)
+    
+    def simulate(self, withdrawal: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Paths for one first-year withdrawal without re-running the year loop.
+        
+        Args:
+            withdrawal: First-year withdrawal
+            
+        Returns:
+            Tuple of (paths, final_balances, depletion_years) like
+            MonteCarloSimulator._simulate_paths, up to floating-point rounding
+            (final balances here are floored at zero)
+        """
+        raw = self.cumulative_growth * (self.starting_balance - withdrawal * self.discounted_withdrawals)
+        depleted = np.maximum.accumulate((raw <= 0) | self.wiped_out, axis=1)
+        
+        paths = np.empty((self.iterations, self.years + 1))
+        paths[:, 0] = self.starting_balance
+        paths[:, 1:] = np.where(depleted, 0.0, raw)
+        depletion_years = np.where(depleted[:, -1], np.argmax(depleted, axis=1) + 1, 0)
+        return paths, paths[:, -1].copy(), depletion_years
 
 
 class MonteCarloSimulator:
@@ -20,7 +207,14 @@ class MonteCarloSimulator:
         years: int,
         inflation_rate: float = 0.03,
         management_fee: float = 0.01,
-        adjust_for_inflation: bool = True
+        adjust_for_inflation: bool = True,
+        seed: SeedLike = None,
+        return_model: Optional[ReturnModel] = None,
+        sampling: str = 'random',
+        control_variate: bool = False,
+        engine: str = 'numpy',
+        spending_policy: Optional[SpendingPolicy] = None,
+        dtype: str = 'float64'
     ):
         """
         Initialize Monte Carlo simulator.
@@ -34,6 +228,22 @@ class MonteCarloSimulator:
             inflation_rate: Annual inflation rate (default 3%)
             management_fee: Annual management fee (default 1%)
             adjust_for_inflation: Whether to adjust withdrawals for inflation (default True)
+            seed: Integer seed, SeedSequence or numpy Generator for reproducible
+                runs (a fresh seed is generated if None)
+            return_model: How portfolio returns are drawn (default: i.i.d. normal
+                with annual_return and annual_std_dev)
+            sampling: 'random', 'antithetic' (mirrored shock pairs) or 'sobol'
+                (scrambled quasi-random normals, needs SciPy)
+            control_variate: Adjust the success rate with terminal wealth,
+                whose mean is known in closed form
+            engine: Year loop used by full-path runs: 'numpy', 'numba' (compiled,
+                needs Numba) or 'auto' (Numba when installed). Results are
+                identical across engines; float32 runs always use NumPy.
+            spending_policy: How each year's withdrawal is set (default: the
+                fixed withdrawal_amount, inflation-adjusted if enabled)
+            dtype: 'float64' or 'float32' for random draws, balance paths and
+                percentiles. float32 draws are a different stream, so seeded
+                results differ from float64 ones by sampling noise.
         """
         self.starting_balance = starting_balance
         self.annual_return = annual_return
@@ -43,71 +253,588 @@ class MonteCarloSimulator:
         self.inflation_rate = inflation_rate
         self.management_fee = management_fee
         self.adjust_for_inflation = adjust_for_inflation
+        self.return_model = return_model or NormalReturns(annual_return, annual_std_dev)
+        self.sampling = sampling
+        self.control_variate = control_variate
+        self.engine = resolve_engine(engine)
+        self.spending_policy = spending_policy or FixedSpending()
+        if dtype not in DTYPES:
+            raise ValueError(f"dtype must be one of {', '.join(DTYPES)}")
+        self.dtype = np.dtype(dtype)
+        
+        # Variance reduction needs matching shock and return properties
+        if sampling not in SAMPLING_METHODS:
+            raise ValueError(f"sampling must be one of {', '.join(SAMPLING_METHODS)}")
+        if sampling == 'antithetic' and not self.return_model.symmetric_shocks:
+            raise ValueError("antithetic sampling needs a return model with symmetric shocks")
+        if sampling == 'sobol' and not self.return_model.gaussian_shocks:
+            raise ValueError("sobol sampling needs a return model with standard-normal shocks")
+        if sampling == 'sobol' and not SOBOL_AVAILABLE:
+            raise ValueError("sobol sampling requires SciPy")
+        if control_variate and self.return_model.mean_return is None:
+            raise ValueError("control_variate needs a return model with a known, constant mean")
+        if control_variate and not self.spending_policy.balance_independent:
+            raise ValueError("control_variate needs a fixed spending schedule")
         
-    def run_simulation(self, iterations: int = 5000) -> Dict:
+        # Random stream: reported seed is None only when a Generator is supplied
+        if isinstance(seed, np.random.Generator):
+            self.seed = None
+            self.rng = seed
+        else:
+            if seed is None:
+                seed = new_seed()
+            if isinstance(seed, np.random.SeedSequence):
+                # Spawned child sequences report their root seed
+                self.seed = seed.entropy
+            else:
+                self.seed = seed
+            self.rng = np.random.default_rng(seed)
+        
+    def run_simulation(
+        self,
+        iterations: int = 5000,
+        shocks: Optional[np.ndarray] = None,
+        percentile_mode: str = 'full',
+        chunk_size: int = 10000
+    ) -> Dict:
         """
         Run Monte Carlo simulation.
         
+        Percentile modes trade memory for exactness or reproducibility:
+        
+        - 'full' stores every path, O(iterations x years) memory.
+        - 'exact' steps all paths one year at a time and takes exact
+          percentiles per year, O(iterations) memory. Shocks are drawn one
+          year at a time, so a seeded run differs from 'full' (with explicit
+          shocks the results are identical).
+        - 'sketch' simulates chunks of paths with the same draws as 'full' and
+          folds them into a PercentileSketch, O(chunk_size x years) memory;
+          percentile paths are within about 0.5% of exact, everything else is exact.
+        
         Args:
             iterations: Number of scenarios to simulate
+            shocks: Optional standard-normal shock matrix of shape (iterations, years),
+                e.g. shared across portfolios for common-random-numbers comparisons
+            percentile_mode: 'full', 'exact' or 'sketch'
+            chunk_size: Paths per chunk in 'sketch' mode
             
         Returns:
             Dictionary with simulation results
         """
-        # Initialize results storage
-        final_balances = []
-        depletion_years = []
-        all_paths = []
-        
-        for _ in range(iterations):
-            balance = self.starting_balance
-            path = [balance]
-            depleted_year = None
-            
-            for year in range(1, self.years + 1):
-                # Generate random market return
-                market_return = np.random.normal(
-                    self.annual_return, 
-                    self.annual_std_dev
-                )
-                
-                # Apply returns and fees
-                balance *= (1 + market_return - self.management_fee)
-                
-                # Adjust withdrawal for inflation (if enabled)
-                if self.adjust_for_inflation:
-                    inflated_withdrawal = self.withdrawal_amount * ((1 + self.inflation_rate) ** (year - 1))
+        if percentile_mode not in PERCENTILE_MODES:
+            raise ValueError(f"percentile_mode must be one of {', '.join(PERCENTILE_MODES)}")
+        if self.variance_reduced and percentile_mode != 'full':
+            raise ValueError("variance reduction needs percentile_mode 'full'")
+        if percentile_mode == 'exact':
+            return self._run_year_by_year(iterations, shocks)
+        if percentile_mode == 'sketch':
+            return self._run_sketched(iterations, shocks, chunk_size)
+        
+        returns = self._draw_returns(iterations, shocks)
+        
+        paths, final_balances, depletion_years = self._simulate_paths(returns)
+        
+        result = self._summarize(paths, final_balances, depletion_years)
+        if self.variance_reduced:
+            result.update(self._variance_report(returns, final_balances))
+        return result
+    
+    @property
+    def variance_reduced(self) -> bool:
+        """Whether any variance reduction option is enabled."""
+        return self.sampling != 'random' or self.control_variate
+    
+    def _variance_report(self, returns: np.ndarray, final_balances: np.ndarray) -> Dict:
+        """
+        Control-variate success rate and effective sample size of a run.
+        
+        The control variate is unclamped terminal wealth, whose mean follows
+        from the mean annual return because years are independent. The
+        effective sample size is the number of independent plain Monte Carlo
+        paths that would give the same success-rate variance, estimated from
+        the spread of independent group means (antithetic pairs or Sobol
+        replicates).
+        """
+        iterations = len(final_balances)
+        survived = (final_balances > 0).astype(float)
+        groups = sample_groups(self.sampling, iterations)
+        counts = np.bincount(groups)
+        group_means = np.bincount(groups, weights=survived) / counts
+        report = {'sampling': self.sampling, 'control_variate': self.control_variate}
+        
+        if self.control_variate:
+            # Fit the coefficient on antithetic pair means, where pairing has
+            # already removed part of the shared variation; the few Sobol
+            # replicates are too noisy for that, so fit those per path
+            terminal_wealth = self._terminal_wealth(returns)
+            wealth = np.bincount(groups, weights=terminal_wealth) / counts
+            fit_y, fit_x = (survived, terminal_wealth) if self.sampling == 'sobol' else (group_means, wealth)
+            variance = fit_x.var()
+            beta = np.cov(fit_y, fit_x)[0, 1] / variance if variance > 0 else 0.0
+            group_means = group_means - beta * (wealth - self._expected_terminal_wealth())
+            report['raw_success_rate'] = float(survived.mean())
+            report['success_rate'] = float(np.clip(np.average(group_means, weights=counts), 0, 1))
+        
+        estimator_variance = group_means.var(ddof=1) / len(counts) if len(counts) > 1 else 0.0
+        path_variance = survived.var()
+        if estimator_variance > 0 and path_variance > 0:
+            report['effective_sample_size'] = float(path_variance / estimator_variance)
+        else:
+            report['effective_sample_size'] = float(iterations)
+        return report
+    
+    def _terminal_wealth(self, returns: np.ndarray) -> np.ndarray:
+        """Final balance per path without flooring or depletion: B0 * G_T - sum_k w_k * G_T / G_k."""
+        growth = 1 + returns - self.management_fee
+        # later_growth[:, k] is the product of growth after year k + 1
+        later_growth = np.ones_like(growth)
+        later_growth[:, :-1] = np.cumprod(growth[:, :0:-1], axis=1)[:, ::-1]
+        return self.starting_balance * growth[:, 0] * later_growth[:, 0] - later_growth @ self._withdrawal_schedule()
+    
+    def _expected_terminal_wealth(self) -> float:
+        """Mean of _terminal_wealth for independent years with a known mean return."""
+        mean_growth = 1 + self.return_model.mean_return - self.management_fee
+        remaining = np.arange(self.years - 1, -1, -1)
+        return float(
+            self.starting_balance * mean_growth ** self.years -
+            self._withdrawal_schedule() @ mean_growth ** remaining
+        )
+    
+    def _run_year_by_year(self, iterations: int, shocks: Optional[np.ndarray]) -> Dict:
+        """Simulate without storing paths, taking exact percentiles as each year completes."""
+        if not self.return_model.serially_independent:
+            raise ValueError("percentile_mode 'exact' needs serially independent returns; use 'sketch'")
+        if self.sampling == 'sobol':
+            raise ValueError("percentile_mode 'exact' can't draw Sobol points one year at a time")
+        self._check_shocks(shocks, iterations, self.years)
+        
+        percentiles = np.empty((len(PERCENTILES), self.years + 1))
+        percentiles[:, 0] = self.starting_balance
+        balance = np.full(iterations, self.starting_balance, dtype=self.dtype)
+        floored = balance.copy()
+        depletion_years = np.zeros(iterations, dtype=np.int64)
+        withdrawals = self._withdrawals(balance)
+        
+        for year in range(1, self.years + 1):
+            with timed('rng'):
+                if shocks is None:
+                    year_shocks = self._draw_shocks(iterations, 1)
                 else:
-                    inflated_withdrawal = self.withdrawal_amount
-                
-                # Make withdrawal
-                balance -= inflated_withdrawal
-                
-                # Check if depleted
-                if balance <= 0 and depleted_year is None:
-                    depleted_year = year
-                    balance = 0
-                    
-                path.append(max(0, balance))
-            
-            final_balances.append(balance)
-            depletion_years.append(depleted_year)
-            all_paths.append(path)
+                    year_shocks = shocks[:, year - 1:year]
+                returns = self._returns_from_shocks(year_shocks)[:, 0]
+            with timed('path_loop'):
+                self._advance_year(balance, depletion_years, returns, year, withdrawals(floored, year))
+                np.maximum(balance, 0, out=floored)
+            
+            with timed('percentiles'):
+                for row, q in enumerate(PERCENTILES):
+                    percentiles[row, year] = np.percentile(floored, q)
         
-        # Calculate statistics
-        success_rate = sum(1 for b in final_balances if b > 0) / iterations
-        median_final = np.median([b for b in final_balances if b > 0]) if success_rate > 0 else 0
+        return self._build_result(percentiles, balance, depletion_years)
+    
+    def _run_sketched(self, iterations: int, shocks: Optional[np.ndarray], chunk_size: int) -> Dict:
+        """Simulate chunks of paths, folding each into a percentile sketch before the next."""
+        self._check_shocks(shocks, iterations, self.years)
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
         
-        # Calculate percentile paths
-        all_paths_array = np.array(all_paths)
-        percentile_10 = np.percentile(all_paths_array, 10, axis=0)
-        percentile_50 = np.percentile(all_paths_array, 50, axis=0)
-        percentile_90 = np.percentile(all_paths_array, 90, axis=0)
+        sketch = PercentileSketch(self.years)
+        final_balances = np.empty(iterations, dtype=self.dtype)
+        depletion_years = np.empty(iterations, dtype=np.int64)
+        for start in range(0, iterations, chunk_size):
+            stop = min(start + chunk_size, iterations)
+            chunk_shocks = None if shocks is None else shocks[start:stop]
+            paths, final_balances[start:stop], depletion_years[start:stop] = self._simulate_paths(
+                self._draw_returns(stop - start, chunk_shocks)
+            )
+            with timed('percentiles'):
+                sketch.update(paths)
+        
+        with timed('percentiles'):
+            percentiles = np.array(sketch.percentiles(PERCENTILES))
+        return self._build_result(percentiles, final_balances, depletion_years)
+    
+    def iter_simulation(
+        self,
+        iterations: int = 5000,
+        batch_size: int = 1000,
+        shocks: Optional[np.ndarray] = None
+    ) -> Iterator[Dict]:
+        """
+        Run a simulation in batches, yielding progress after each batch.
+        
+        Batches are drawn one after another from this simulator's stream, so
+        the final result is identical to run_simulation with the same seed.
+        
+        Args:
+            iterations: Number of scenarios to simulate
+            batch_size: Scenarios per batch
+            shocks: Optional standard-normal shock matrix of shape (iterations, years)
+            
+        Yields:
+            Progress dictionaries with 'completed', 'iterations' and a provisional
+            'success_rate'; the last one also carries the full 'result'
+        """
+        self._check_shocks(shocks, iterations, self.years)
+        
+        batches = []
+        completed = 0
+        survivors = 0
+        while completed < iterations:
+            size = min(batch_size, iterations - completed)
+            batch_shocks = None if shocks is None else shocks[completed:completed + size]
+            batch = self._simulate_paths(self._draw_returns(size, batch_shocks))
+            batches.append(batch)
+            
+            completed += size
+            survivors += int(np.count_nonzero(batch[1] > 0))
+            progress = {
+                'completed': completed,
+                'iterations': iterations,
+                'success_rate': survivors / completed
+            }
+            if completed == iterations:
+                progress['result'] = self._summarize(
+                    *(np.concatenate(parts) for parts in zip(*batches))
+                )
+            yield progress
+    
+    def run_adaptive(
+        self,
+        tolerance: float = 0.005,
+        percentile_tolerance: Optional[float] = None,
+        batch_size: int = 1000,
+        max_iterations: int = 50000,
+        shocks: Optional[np.ndarray] = None
+    ) -> Dict:
+        """
+        Run batches until the results are precise enough, up to an iteration cap.
+        
+        Batches grow by a quarter of the iterations completed so far, keeping
+        convergence checks cheap. They are drawn one after another from this
+        simulator's stream, so a run that stops after n iterations equals
+        run_simulation(n) with the same seed.
+        
+        Args:
+            tolerance: Target standard error of the success rate
+            percentile_tolerance: Target relative standard error of the
+                p10/p50/p90 paths (worst year); None to only track the success rate
+            batch_size: Scenarios in the first batch (and minimum per batch)
+            max_iterations: Hard cap on scenarios
+            shocks: Optional standard-normal shock matrix of shape (max_iterations, years)
+            
+        Returns:
+            Dictionary with simulation results plus 'converged' and 'standard_error'
+        """
+        self._check_shocks(shocks, max_iterations, self.years)
+        
+        batches = []
+        completed = 0
+        while True:
+            size = min(max(batch_size, completed // 4), max_iterations - completed)
+            batch_shocks = None if shocks is None else shocks[completed:completed + size]
+            batches.append(self._simulate_paths(self._draw_returns(size, batch_shocks)))
+            completed += size
+            
+            paths, final_balances, depletion_years = (
+                np.concatenate(parts) for parts in zip(*batches)
+            )
+            batches = [(paths, final_balances, depletion_years)]
+            errors = self._standard_errors(paths, final_balances, percentile_tolerance is not None)
+            
+            converged = errors['success_rate'] <= tolerance and (
+                percentile_tolerance is None or
+                max(errors[name] for name in ('p10', 'p50', 'p90')) <= percentile_tolerance
+            )
+            if converged or completed >= max_iterations:
+                break
+        
+        result = self._summarize(paths, final_balances, depletion_years)
+        result['converged'] = converged
+        result['standard_error'] = errors
+        return result
+    
+    def growth_paths(
+        self,
+        iterations: int = 5000,
+        shocks: Optional[np.ndarray] = None,
+        years: Optional[int] = None
+    ) -> GrowthPaths:
+        """
+        Draw return paths once and precompute their cumulative growth.
+        
+        The result answers what-if questions for any withdrawal level
+        (success rates, balances, full paths) without re-simulating.
+        
+        Args:
+            iterations: Number of scenarios
+            shocks: Optional standard-normal shock matrix of shape (iterations, years)
+            years: Horizon to draw (default: the simulator's years)
+            
+        Returns:
+            GrowthPaths over the drawn returns
+        """
+        self._require_fixed_spending()
+        years = self.years if years is None else years
+        return GrowthPaths(
+            self._draw_returns(iterations, shocks, years),
+            self.starting_balance,
+            self.management_fee,
+            self._inflation_factors(years)
+        )
+    
+    def run_grid(
+        self,
+        withdrawal_rates: List[float],
+        horizons: List[int],
+        iterations: int = 5000,
+        shocks: Optional[np.ndarray] = None,
+        chunk_size: int = 500000
+    ) -> Dict:
+        """
+        Evaluate a grid of withdrawal rates and horizons from one set of draws.
+        
+        Returns are drawn once up to the longest horizon and their cumulative
+        growth is precomputed (see GrowthPaths); each horizon then broadcasts
+        a chunk of withdrawal rates at a time as a (rates x iterations) array,
+        so memory beyond the growth paths stays O(chunk_size). A cell matches
+        run_simulation with that rate and horizon on the leading columns of
+        the same shocks, up to floating-point rounding. The simulator's
+        withdrawal_amount and years are ignored.
+        
+        Args:
+            withdrawal_rates: First-year withdrawals as fractions of the starting balance
+            horizons: Years to evaluate
+            iterations: Number of scenarios
+            shocks: Optional standard-normal shock matrix of shape
+                (iterations, max(horizons))
+            chunk_size: Balances (rates x iterations) evaluated at a time
+            
+        Returns:
+            Dictionary with (rates x horizons) matrices of success rates and
+            p10/p50/p90 balances at each horizon
+        """
+        rates = np.asarray(withdrawal_rates, dtype=float)
+        if rates.ndim != 1 or not len(rates) or np.any(rates < 0):
+            raise ValueError("withdrawal_rates must be a non-empty list of non-negative rates")
+        if not horizons or any(int(h) != h or h <= 0 for h in horizons):
+            raise ValueError("horizons must be a non-empty list of positive integers")
+        horizons = [int(h) for h in horizons]
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+        
+        growth = self.growth_paths(iterations, shocks, max(horizons))
+        withdrawals = rates * self.starting_balance
+        rates_per_chunk = max(1, chunk_size // iterations)
+        
+        success = np.empty((len(rates), len(horizons)))
+        percentiles = np.empty((len(PERCENTILES), len(rates), len(horizons)))
+        for column, horizon in enumerate(horizons):
+            success[:, column] = growth.success_rate(withdrawals, horizon)
+            for start in range(0, len(rates), rates_per_chunk):
+                stop = start + rates_per_chunk
+                balances = growth.balances(withdrawals[start:stop], horizon)
+                percentiles[:, start:stop, column] = np.percentile(balances, PERCENTILES, axis=1)
+        
+        return {
+            'withdrawal_rates': rates.tolist(),
+            'horizons': horizons,
+            'success_rate': success.tolist(),
+            'percentiles': {
+                f'p{q}': percentiles[row].tolist() for row, q in enumerate(PERCENTILES)
+            },
+            'iterations': iterations,
+            'seed': self.seed
+        }
+    
+    def _standard_errors(self, paths: np.ndarray, final_balances: np.ndarray, percentiles: bool) -> Dict:
+        """
+        Estimate standard errors of the success rate and percentile paths.
+        
+        The success rate uses the Agresti-Coull adjustment so it stays positive
+        at 0% and 100%. Percentile errors come from the spread between the
+        order statistics one binomial standard deviation either side of each
+        percentile, relative to the larger of its value and the starting
+        balance (so near-depleted years don't dominate), taking the worst year.
+        """
+        iterations = len(final_balances)
+        adjusted = (np.count_nonzero(final_balances > 0) + 2) / (iterations + 4)
+        errors = {'success_rate': float(np.sqrt(adjusted * (1 - adjusted) / (iterations + 4)))}
+        
+        if percentiles:
+            for name, q in (('p10', 0.1), ('p50', 0.5), ('p90', 0.9)):
+                spread = np.sqrt(q * (1 - q) / iterations)
+                lower, value, upper = np.quantile(
+                    paths, [max(q - spread, 0), q, min(q + spread, 1)], axis=0
+                )
+                scale = np.maximum(value, self.starting_balance)
+                errors[name] = float(np.max((upper - lower) / (2 * scale)))
+        return errors
+    
+    def _draw_returns(
+        self,
+        iterations: int,
+        shocks: Optional[np.ndarray] = None,
+        years: Optional[int] = None
+    ) -> np.ndarray:
+        """Market returns of shape (iterations, years), drawn or scaled from given shocks."""
+        years = self.years if years is None else years
+        with timed('rng'):
+            if shocks is None:
+                shocks = self._draw_shocks(iterations, years)
+            else:
+                self._check_shocks(shocks, iterations, years)
+            return self._returns_from_shocks(shocks)
+    
+    def _returns_from_shocks(self, shocks: np.ndarray) -> np.ndarray:
+        """Return model output in this simulator's dtype."""
+        # Models with float64 parameters upcast float32 shocks
+        return self.return_model.returns_from_shocks(shocks).astype(self.dtype, copy=False)
+    
+    def _draw_shocks(
+        self,
+        iterations: int,
+        years: int,
+        rng: Optional[np.random.Generator] = None
+    ) -> np.ndarray:
+        """Draw shocks for the return model with this simulator's sampling scheme."""
+        rng = self.rng if rng is None else rng
+        if self.sampling == 'antithetic':
+            return antithetic_shocks(
+                lambda rows: self.return_model.draw_shocks(rng, rows, years, self.dtype), iterations
+            )
+        if self.sampling == 'sobol':
+            return sobol_normals(rng, self.return_model.shock_shape(iterations, years)).astype(self.dtype)
+        return self.return_model.draw_shocks(rng, iterations, years, self.dtype)
+    
+    def _check_shocks(self, shocks: Optional[np.ndarray], iterations: int, years: int):
+        """Reject a shock array that doesn't fit this run and return model."""
+        expected = self.return_model.shock_shape(iterations, years)
+        if shocks is not None and shocks.shape != expected:
+            raise ValueError(f"shocks must have shape {expected}, got {shocks.shape}")
+    
+    def _require_fixed_spending(self):
+        """Reject closed-form withdrawal analysis for balance-dependent spending policies."""
+        if not self.spending_policy.balance_independent:
+            raise ValueError("closed-form withdrawal analysis needs a fixed spending schedule")
+    
+    def _inflation_factors(self, years: Optional[int] = None) -> np.ndarray:
+        """Per-year withdrawal multiplier relative to the first year's withdrawal."""
+        years = self.years if years is None else years
+        if self.adjust_for_inflation:
+            return np.array([
+                (1 + self.inflation_rate) ** year for year in range(years)
+            ], dtype=float)
+        return np.ones(years)
+    
+    def _withdrawal_schedule(self) -> np.ndarray:
+        """Withdrawal amount for each simulated year (inflation-adjusted if enabled)."""
+        return self.withdrawal_amount * self._inflation_factors()
+    
+    def _simulate_paths(self, returns: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Advance every path through every year with array operations.
+        
+        Args:
+            returns: Market returns with shape (iterations, years)
+            
+        Returns:
+            Tuple of (paths, final_balances, depletion_years). Paths have shape
+            (iterations, years + 1) and are floored at zero; final balances are
+            unfloored; depletion years are 0 for paths that never deplete.
+        """
+        with timed('path_loop'):
+            if self.engine == 'numba' and self.spending_policy.balance_independent and self.dtype == np.float64:
+                return simulate_paths(
+                    returns, self.starting_balance, self.management_fee, self._withdrawal_schedule()
+                )
+            return self._simulate_paths_numpy(returns)
+    
+    def _simulate_paths_numpy(self, returns: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """NumPy year loop behind _simulate_paths."""
+        iterations = returns.shape[0]
+        paths = np.empty((iterations, self.years + 1), dtype=self.dtype)
+        paths[:, 0] = self.starting_balance
+        balance = np.full(iterations, self.starting_balance, dtype=self.dtype)
+        depletion_years = np.zeros(iterations, dtype=np.int64)
+        withdrawals = self._withdrawals(balance)
+        
+        for year in range(1, self.years + 1):
+            withdrawal = withdrawals(paths[:, year - 1], year)
+            self._advance_year(balance, depletion_years, returns[:, year - 1], year, withdrawal)
+            np.maximum(balance, 0, out=paths[:, year])
+        
+        return paths, balance, depletion_years
+    
+    def _withdrawals(self, balance: np.ndarray):
+        """
+        Start a run of the spending policy.
+        
+        Args:
+            balance: Starting balance of every path
+            
+        Returns:
+            Callable mapping (start-of-year balances floored at zero, year) to
+            that year's withdrawals
+        """
+        if self.spending_policy.balance_independent:
+            schedule = self._withdrawal_schedule().astype(self.dtype)
+            return lambda floored, year: schedule[year - 1]
+        
+        state = self.spending_policy.start(balance.copy(), self.withdrawal_amount, self._inflation_factors())
+        return lambda floored, year: self.spending_policy.withdrawal(state, floored, year)
+    
+    def _advance_year(
+        self,
+        balance: np.ndarray,
+        depletion_years: np.ndarray,
+        returns: np.ndarray,
+        year: int,
+        withdrawal: float
+    ):
+        """Advance every balance by one year in place, recording newly depleted paths."""
+        # Apply returns and fees, then make the withdrawal
+        balance *= 1 + returns - self.management_fee
+        balance -= withdrawal
+        
+        # Record the first year each path is depleted
+        newly_depleted = (balance <= 0) & (depletion_years == 0)
+        depletion_years[newly_depleted] = year
+        balance[newly_depleted] = 0
+    
+    def _summarize(
+        self,
+        paths: np.ndarray,
+        final_balances: np.ndarray,
+        depletion_years: np.ndarray
+    ) -> Dict:
+        """Build the result dictionary from simulated paths."""
+        with timed('percentiles'):
+            percentiles = np.array([np.percentile(paths, q, axis=0) for q in PERCENTILES])
+        return self._build_result(percentiles, final_balances, depletion_years)
+    
+    def _build_result(
+        self,
+        percentiles: np.ndarray,
+        final_balances: np.ndarray,
+        depletion_years: np.ndarray
+    ) -> Dict:
+        """Build the result dictionary from p10/p50/p90 rows and per-path outcomes."""
+        iterations = len(final_balances)
+        registry.inc('simulations_total', help_text='Completed simulation runs.')
+        registry.inc('simulated_paths_total', iterations, help_text='Simulated scenario paths.')
+        
+        # Calculate statistics
+        surviving = final_balances[final_balances > 0]
+        success_rate = len(surviving) / iterations
+        median_final = np.median(surviving) if success_rate > 0 else 0
+        depleted = depletion_years[depletion_years > 0]
+        percentile_10, percentile_50, percentile_90 = percentiles
         
         return {
             'success_rate': success_rate,
-            'median_final_balance': median_final,
-            'average_depletion_year': np.mean([y for y in depletion_years if y is not None]) if any(depletion_years) else None,
+            'median_final_balance': float(median_final),
+            'average_depletion_year': np.mean(depleted) if len(depleted) else None,
             'percentile_paths': {
                 'p10': percentile_10.tolist(),
                 'p50': percentile_50.tolist(),
@@ -116,7 +843,8 @@ class MonteCarloSimulator:
             'iterations': iterations,
             'years': self.years,
             'annual_withdrawal': self.withdrawal_amount,
-            'withdrawal_rate': self.withdrawal_amount / self.starting_balance
+            'withdrawal_rate': self.withdrawal_amount / self.starting_balance,
+            'seed': self.seed
         }
     
     def calculate_sustainable_withdrawal(self, target_success_rate: float = 0.7) -> float:
@@ -129,18 +857,53 @@ class MonteCarloSimulator:
         Returns:
             Sustainable annual withdrawal amount
         """
-        # Binary search for optimal withdrawal
-        low = 0
-        high = self.starting_balance * 0.1  # Max 10% withdrawal
+        return self.solve_sustainable_withdrawal(target_success_rate)['withdrawal']
+    
+    def solve_sustainable_withdrawal(
+        self,
+        target_success_rate: float = 0.7,
+        iterations: int = 5000,
+        confidence: float = 0.95,
+        shocks: Optional[np.ndarray] = None
+    ) -> Dict:
+        """
+        Solve for the withdrawal that achieves a target success rate.
+        
+        Return paths are drawn once. For a fixed path, depletion is monotone in
+        the withdrawal, so each path has a breakeven withdrawal below which it
+        survives; the answer is a quantile of those breakevens. The simulator's
+        withdrawal_amount is left unchanged.
         
-        while high - low > 100:  # Within $100 accuracy
-            mid = (low + high) / 2
-            self.withdrawal_amount = mid
-            result = self.run_simulation(1000)  # Fewer iterations for speed
+        Args:
+            target_success_rate: Desired probability of success (default 70%)
+            iterations: Number of scenarios to draw
+            confidence: Confidence level of the reported interval (default 95%)
+            shocks: Optional standard-normal shock matrix of shape (iterations, years)
             
-            if result['success_rate'] < target_success_rate:
-                high = mid
-            else:
-                low = mid
-                
-        return low
\ No newline at end of file
+        Returns:
+            Dictionary with the withdrawal, its rate and a confidence interval
+        """
+        if not 0 < target_success_rate < 1:
+            raise ValueError("target_success_rate must be between 0 and 1")
+        
+        breakevens = self.growth_paths(iterations, shocks).sorted_breakevens()
+        
+        # A path survives withdrawal W iff its breakeven exceeds W
+        quantile = 1 - target_success_rate
+        withdrawal = float(np.quantile(breakevens, quantile))
+        
+        # Distribution-free interval from binomial order statistics
+        z = NormalDist().inv_cdf((1 + confidence) / 2)
+        spread = z * np.sqrt(iterations * quantile * (1 - quantile))
+        lower_rank = int(np.clip(np.floor(iterations * quantile - spread), 0, iterations - 1))
+        upper_rank = int(np.clip(np.ceil(iterations * quantile + spread), 0, iterations - 1))
+        
+        return {
+            'withdrawal': withdrawal,
+            'withdrawal_rate': withdrawal / self.starting_balance,
+            'confidence_interval': (float(breakevens[lower_rank]), float(breakevens[upper_rank])),
+            'confidence': confidence,
+            'target_success_rate': target_success_rate,
+            'iterations': iterations,
+            'seed': self.seed
+        }
@@ -0,0 +1,107 @@
+"""
+Bounded-memory per-year percentile estimation for simulated balance paths.
+Log-bucket quantile sketch with a relative-accuracy guarantee (DDSketch-style).
+"""
+
+import numpy as np
+from typing import List
+
+
+class PercentileSketch:
+    """
+    Mergeable per-year quantile sketch over non-negative balances.
+
+    Values are counted in logarithmically spaced buckets, so any reported
+    quantile is within `relative_accuracy` of an exact one. Values below
+    `min_value` (including depleted paths at zero) share a zero bucket.
+    Memory is fixed at (years + 1) x buckets counts, independent of the
+    number of paths.
+    """
+
+    def __init__(
+        self,
+        years: int,
+        relative_accuracy: float = 0.005,
+        min_value: float = 1.0,
+        max_value: float = 1e15
+    ):
+        """
+        Initialize sketch.
+
+        Args:
+            years: Number of simulated years (paths have years + 1 points)
+            relative_accuracy: Maximum relative error of reported quantiles
+            min_value: Smallest value tracked exactly; smaller values count as zero
+            max_value: Largest value tracked; larger values share the top bucket
+        """
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = np.log(self.gamma)
+        self.min_value = min_value
+        self._offset = int(np.ceil(np.log(min_value) / self._log_gamma))
+        self.buckets = int(np.ceil(np.log(max_value) / self._log_gamma)) - self._offset + 1
+
+        # Column 0 is the zero bucket
+        self.counts = np.zeros((years + 1, self.buckets + 1), dtype=np.int64)
+
+    def update(self, paths: np.ndarray):
+        """
+        Add a chunk of paths.
+
+        Args:
+            paths: Array of shape (chunk, years + 1)
+        """
+        columns = self.counts.shape[1]
+        index = np.zeros(paths.shape, dtype=np.int64)
+        tracked = paths >= self.min_value
+        index[tracked] = np.clip(
+            np.ceil(np.log(paths[tracked]) / self._log_gamma).astype(np.int64) - self._offset + 1,
+            1,
+            columns - 1
+        )
+
+        flat = index + columns * np.arange(paths.shape[1])
+        self.counts += np.bincount(flat.ravel(), minlength=self.counts.size).reshape(self.counts.shape)
+
+    def merge(self, other: 'PercentileSketch'):
+        """Fold another sketch with the same configuration into this one."""
+        if other.counts.shape != self.counts.shape or other.gamma != self.gamma:
+            raise ValueError("can only merge sketches with the same configuration")
+        self.counts += other.counts
+
+    def percentile(self, q: float) -> np.ndarray:
+        """
+        Estimate the q-th percentile of every year.
+
+        Args:
+            q: Percentile between 0 and 100
+
+        Returns:
+            Array of shape (years + 1,)
+        """
+        cumulative = np.cumsum(self.counts, axis=1)
+        total = cumulative[:, -1]
+    
+        # Interpolate between neighbouring ranks like np.percentile's default
+        position = q / 100 * (total - 1)
+        lower = np.floor(position)
+        upper = np.minimum(lower + 1, total - 1)
+        fraction = position - lower
+        low_value = self._rank_value(cumulative, lower)
+        return low_value + fraction * (self._rank_value(cumulative, upper) - low_value)
+
+    def _rank_value(self, cumulative: np.ndarray, rank: np.ndarray) -> np.ndarray:
+        """Representative value of the bucket holding each year's rank-th smallest value."""
+        bucket = np.argmax(cumulative > rank[:, None], axis=1)
+    
+        # Bucket midpoint in relative terms: 2 * gamma^i / (gamma + 1)
+        exponent = bucket + self._offset - 1
+        values = 2 * np.exp(exponent * self._log_gamma) / (self.gamma + 1)
+        return np.where(bucket == 0, 0.0, values)
+
+    def percentiles(self, qs: List[float]) -> List[np.ndarray]:
+        """Estimate several percentiles of every year."""
+        return [self.percentile(q) for q in qs]
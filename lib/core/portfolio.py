@@ -75,6 +75,13 @@ class Portfolio:
             'risk_level': self.get_risk_level()
         }
     
+    def asset_weights(self) -> Dict[str, float]:
+        """Target weight per asset class, keyed like historical_data in portfolios.json."""
+        return {
+            'stocks': self.stocks_percentage / 100,
+            'bonds': self.bonds_percentage / 100
+        }
+    
     def get_risk_level(self) -> str:
         """Categorize risk level based on stock allocation."""
         if self.stocks_percentage <= 30:
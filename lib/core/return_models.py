@@ -0,0 +1,494 @@
+"""
+Return models for Monte Carlo simulation.
+Each model turns random shocks into a (iterations x years) matrix of portfolio returns.
+"""
+
+import csv
+import hashlib
+import os
+
+import numpy as np
+from typing import Dict, List, Optional, Sequence
+
+
+def combine_assets(asset_returns: np.ndarray, weights: np.ndarray, rebalance: bool = True) -> np.ndarray:
+    """
+    Portfolio returns from per-asset returns.
+
+    With annual rebalancing the portfolio return is the weighted sum of asset
+    returns. Without it, weights drift with each asset's cumulative growth
+    (fees and withdrawals are taken pro rata, so they don't move weights).
+
+    Args:
+        asset_returns: Array of shape (iterations, years, assets)
+        weights: Target weight per asset
+        rebalance: Rebalance to the target weights every year
+
+    Returns:
+        Array of shape (iterations, years)
+    """
+    if rebalance:
+        return asset_returns @ weights
+
+    # Holdings at the start of each year, from cumulative growth so far
+    growth = np.maximum(1 + asset_returns, 0)
+    holdings = np.empty_like(growth)
+    holdings[:, 0] = weights
+    np.cumprod(growth[:, :-1], axis=1, out=holdings[:, 1:])
+    holdings[:, 1:] *= weights
+
+    totals = holdings.sum(axis=2, keepdims=True)
+    drifted = np.divide(holdings, totals, out=np.zeros_like(holdings), where=totals > 0)
+    return (drifted * asset_returns).sum(axis=2)
+
+
+class ReturnModel:
+    """
+    Base class for portfolio return models.
+
+    Drawing is split in two steps so that several portfolios can share the
+    same shocks (common random numbers): draw_shocks depends only on the
+    model's shape, returns_from_shocks applies the portfolio's parameters.
+    """
+
+    # Whether returns in different years are independent, so a run can draw
+    # them one year at a time (percentile_mode='exact')
+    serially_independent = True
+
+    # Whether -shocks is as likely as shocks (antithetic sampling), and whether
+    # shocks are standard normal (quasi-random sampling via the inverse CDF)
+    symmetric_shocks = True
+    gaussian_shocks = True
+
+    @property
+    def mean_return(self) -> Optional[float]:
+        """Expected portfolio return in every year, if known in closed form."""
+        return None
+
+    def shock_shape(self, iterations: int, years: int) -> tuple:
+        """Shape of the shock array for a run."""
+        return (iterations, years)
+
+    def draw_shocks(
+        self,
+        rng: np.random.Generator,
+        iterations: int,
+        years: int,
+        dtype=np.float64
+    ) -> np.ndarray:
+        """
+        Draw the random input for a run in one call.
+
+        Args:
+            rng: Generator to draw from
+            iterations: Number of scenarios
+            years: Number of simulated years
+            dtype: Floating-point type of drawn values (float32 draws are a
+                different stream from float64 ones)
+
+        Returns:
+            Array of shape shock_shape(iterations, years)
+        """
+        return rng.standard_normal(self.shock_shape(iterations, years), dtype=dtype)
+
+    def returns_from_shocks(self, shocks: np.ndarray) -> np.ndarray:
+        """
+        Portfolio returns for the given shocks.
+
+        Args:
+            shocks: Array from draw_shocks
+
+        Returns:
+            Array of shape (iterations, years)
+        """
+        raise NotImplementedError
+
+
+class NormalReturns(ReturnModel):
+    """I.i.d. normal portfolio returns (the original single-asset model)."""
+
+    def __init__(self, mean: float, std_dev: float):
+        """
+        Initialize normal model.
+
+        Args:
+            mean: Expected annual return
+            std_dev: Annual standard deviation of returns
+        """
+        self.mean = mean
+        self.std_dev = std_dev
+
+    @property
+    def mean_return(self) -> float:
+        return self.mean
+
+    def returns_from_shocks(self, shocks: np.ndarray) -> np.ndarray:
+        # Scale the shocks by this portfolio's mean and standard deviation
+        return self.mean + self.std_dev * shocks
+
+
+class StudentTReturns(ReturnModel):
+    """
+    I.i.d. fat-tailed portfolio returns: a Student-t scaled to the given mean and volatility.
+    """
+
+    gaussian_shocks = False
+
+    def __init__(self, mean: float, std_dev: float, degrees_of_freedom: float = 5.0):
+        """
+        Initialize Student-t model.
+
+        Args:
+            mean: Expected annual return
+            std_dev: Annual standard deviation of returns
+            degrees_of_freedom: Tail heaviness (must exceed 2 for a finite variance)
+        """
+        if degrees_of_freedom <= 2:
+            raise ValueError("degrees_of_freedom must be greater than 2")
+        self.mean = mean
+        self.std_dev = std_dev
+        self.degrees_of_freedom = degrees_of_freedom
+
+    @property
+    def mean_return(self) -> float:
+        return self.mean
+
+    def draw_shocks(self, rng: np.random.Generator, iterations: int, years: int, dtype=np.float64) -> np.ndarray:
+        # standard_t only draws float64
+        return rng.standard_t(self.degrees_of_freedom, self.shock_shape(iterations, years)).astype(dtype, copy=False)
+
+    def returns_from_shocks(self, shocks: np.ndarray) -> np.ndarray:
+        # A standard t has variance df / (df - 2); rescale to unit variance
+        scale = np.sqrt((self.degrees_of_freedom - 2) / self.degrees_of_freedom)
+        return self.mean + self.std_dev * scale * shocks
+
+
+class LognormalReturns(ReturnModel):
+    """
+    I.i.d. lognormal gross returns with the given arithmetic mean and volatility.
+
+    Returns can't fall below -100%, and shocks are standard normal, so they
+    can be shared with NormalReturns for common random numbers.
+    """
+
+    def __init__(self, mean: float, std_dev: float):
+        """
+        Initialize lognormal model.
+
+        Args:
+            mean: Expected annual return
+            std_dev: Annual standard deviation of returns
+        """
+        if mean <= -1:
+            raise ValueError("mean must be greater than -100%")
+        self.mean = mean
+        self.std_dev = std_dev
+
+        # Match the first two moments of 1 + r
+        self.log_std_dev = np.sqrt(np.log1p((std_dev / (1 + mean)) ** 2))
+        self.log_mean = np.log1p(mean) - self.log_std_dev ** 2 / 2
+
+    @property
+    def mean_return(self) -> float:
+        return self.mean
+
+    def returns_from_shocks(self, shocks: np.ndarray) -> np.ndarray:
+        return np.expm1(self.log_mean + self.log_std_dev * shocks)
+
+
+class MultiAssetReturns(ReturnModel):
+    """
+    Correlated normal asset returns combined into a portfolio.
+
+    Standard-normal shocks of shape (iterations, years, assets) are
+    correlated through the Cholesky factor of the correlation matrix and
+    scaled by each asset's volatility, then combined with combine_assets
+    (rebalanced or drifting weights). Cost is linear in iterations x years
+    x assets.
+    """
+
+    def __init__(
+        self,
+        means: Sequence[float],
+        std_devs: Sequence[float],
+        correlation: np.ndarray,
+        weights: Sequence[float],
+        rebalance: bool = True,
+        asset_names: Optional[List[str]] = None
+    ):
+        """
+        Initialize multi-asset model.
+
+        Args:
+            means: Expected annual return per asset
+            std_devs: Annual standard deviation per asset
+            correlation: Asset correlation matrix (assets x assets)
+            weights: Target portfolio weight per asset (must sum to 1)
+            rebalance: Rebalance to the target weights every year (default True)
+            asset_names: Optional asset labels, in the same order
+        """
+        self.means = np.asarray(means, dtype=float)
+        self.std_devs = np.asarray(std_devs, dtype=float)
+        self.correlation = np.asarray(correlation, dtype=float)
+        self.weights = np.asarray(weights, dtype=float)
+        self.rebalance = rebalance
+        self.asset_names = asset_names
+
+        assets = len(self.means)
+        if self.std_devs.shape != (assets,) or self.weights.shape != (assets,):
+            raise ValueError("means, std_devs and weights must have one entry per asset")
+        if self.correlation.shape != (assets, assets):
+            raise ValueError(f"correlation must be a {assets}x{assets} matrix")
+        if not np.isclose(self.weights.sum(), 1):
+            raise ValueError("weights must sum to 1")
+
+        # Factor the correlation rather than the covariance so zero-volatility assets work
+        try:
+            self.cholesky = np.linalg.cholesky(self.correlation)
+        except np.linalg.LinAlgError:
+            raise ValueError("correlation matrix must be positive definite")
+
+    @property
+    def serially_independent(self) -> bool:
+        # Drifting weights depend on every earlier year
+        return self.rebalance
+
+    @property
+    def mean_return(self) -> Optional[float]:
+        return float(self.weights @ self.means) if self.rebalance else None
+
+    @property
+    def assets(self) -> int:
+        return len(self.means)
+
+    def shock_shape(self, iterations: int, years: int) -> tuple:
+        return (iterations, years, self.assets)
+
+    def asset_returns(self, shocks: np.ndarray) -> np.ndarray:
+        """Correlated asset returns of shape (iterations, years, assets)."""
+        return self.means + self.std_devs * (shocks @ self.cholesky.T)
+
+    def returns_from_shocks(self, shocks: np.ndarray) -> np.ndarray:
+        return combine_assets(self.asset_returns(shocks), self.weights, self.rebalance)
+
+    @classmethod
+    def from_historical_data(
+        cls,
+        historical_data: Dict,
+        weights: Dict[str, float],
+        rebalance: bool = True
+    ) -> 'MultiAssetReturns':
+        """
+        Build a model from the historical_data block of data/portfolios.json.
+
+        Every key besides 'correlation' is an asset with 'annual_return' and
+        'std_deviation'. 'correlation' is either a single coefficient (two
+        assets) or a full matrix in asset order.
+
+        Args:
+            historical_data: Asset assumptions
+            weights: Portfolio weight per asset name (missing assets get 0)
+            rebalance: Rebalance to the target weights every year
+
+        Returns:
+            Configured MultiAssetReturns
+        """
+        names = [name for name in historical_data if name != 'correlation']
+        unknown = set(weights) - set(names)
+        if unknown:
+            raise ValueError(f"unknown assets: {', '.join(sorted(unknown))}")
+
+        correlation = historical_data.get('correlation', 0.0)
+        if np.ndim(correlation) == 0:
+            if len(names) != 2:
+                raise ValueError("a single correlation coefficient needs exactly two assets")
+            correlation = [[1.0, correlation], [correlation, 1.0]]
+
+        return cls(
+            means=[historical_data[name]['annual_return'] for name in names],
+            std_devs=[historical_data[name]['std_deviation'] for name in names],
+            correlation=np.asarray(correlation, dtype=float),
+            weights=[weights.get(name, 0.0) for name in names],
+            rebalance=rebalance,
+            asset_names=names
+        )
+
+
+class HistoricalSeries:
+    """
+    Annual asset returns loaded from a local CSV file.
+
+    The CSV has a header row naming each asset column and one row per year
+    of decimal returns (0.12 for 12%); a leading 'year' column is ignored.
+    Parsed values are cached as a .npy file (next to the data unless a cache
+    directory is given) and memory-mapped, so repeated loads in every worker
+    share one page-cached copy.
+    """
+
+    def __init__(self, asset_names: List[str], returns: np.ndarray):
+        """
+        Initialize series.
+
+        Args:
+            asset_names: Column name per asset
+            returns: Array of shape (years, assets)
+        """
+        if returns.ndim != 2 or returns.shape[1] != len(asset_names) or not len(returns):
+            raise ValueError("returns must have one column per asset and at least one year")
+        self.asset_names = asset_names
+        self.returns = returns
+
+    @classmethod
+    def from_csv(cls, path: str, cache_dir: Optional[str] = None) -> 'HistoricalSeries':
+        """
+        Load a series, rebuilding the memory-mapped cache if the CSV changed.
+
+        Args:
+            path: CSV file path
+            cache_dir: Directory for the .npy cache (default: next to the CSV)
+
+        Returns:
+            HistoricalSeries backed by a read-only memory map, or by an
+            in-memory array if the cache can't be written
+        """
+        with open(path, newline='') as f:
+            rows = [row for row in csv.reader(f) if row]
+        if not rows:
+            raise ValueError(f"{path} is empty")
+
+        header = [name.strip() for name in rows[0]]
+        skip = 1 if header[0].lower() == 'year' else 0
+        asset_names = header[skip:]
+
+        cache_dir = cache_dir or os.path.dirname(os.path.abspath(path))
+        # Key the cache by absolute path so same-named files elsewhere don't collide
+        source = os.path.abspath(path)
+        tag = hashlib.sha256(source.encode('utf-8')).hexdigest()[:12]
+        cache_path = os.path.join(cache_dir, f'{os.path.basename(path)}.{tag}.npy')
+        if not os.path.exists(cache_path) or os.path.getmtime(cache_path) < os.path.getmtime(path):
+            try:
+                values = np.array([[float(value) for value in row[skip:]] for row in rows[1:]], dtype=float)
+            except ValueError:
+                raise ValueError(f"{path} must contain only numeric returns after the header")
+            values = values.reshape(-1, len(asset_names))
+            # Write then rename so concurrent workers never map a partial file
+            partial = cache_path + f'.{os.getpid()}.tmp.npy'
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                np.save(partial, values)
+                os.replace(partial, cache_path)
+            except OSError:
+                # Read-only cache location: keep this process's parsed copy in memory
+                if os.path.exists(partial):
+                    os.unlink(partial)
+                return cls(asset_names, values)
+
+        return cls(asset_names, np.load(cache_path, mmap_mode='r'))
+
+    def digest(self) -> str:
+        """Content hash of the series, for cache keys."""
+        content = hashlib.sha256(','.join(self.asset_names).encode('utf-8'))
+        content.update(np.ascontiguousarray(self.returns).tobytes())
+        return content.hexdigest()
+
+    def weight_vector(self, weights: Dict[str, float]) -> np.ndarray:
+        """Portfolio weights in column order (missing assets get 0)."""
+        unknown = set(weights) - set(self.asset_names)
+        if unknown:
+            raise ValueError(f"historical series has no column for: {', '.join(sorted(unknown))}")
+        return np.array([weights.get(name, 0.0) for name in self.asset_names])
+
+
+class BootstrapReturns(ReturnModel):
+    """
+    Historical bootstrap: each simulated year replays a randomly chosen historical year.
+
+    Shocks are year indices drawn in one call, so portfolios sharing a series
+    can share them, and all assets of a year move together.
+    """
+
+    # Shocks are year indices
+    symmetric_shocks = False
+    gaussian_shocks = False
+
+    def __init__(self, series: HistoricalSeries, weights: Dict[str, float], rebalance: bool = True):
+        """
+        Initialize bootstrap model.
+
+        Args:
+            series: Historical annual asset returns
+            weights: Portfolio weight per asset name
+            rebalance: Rebalance to the target weights every year (default True)
+        """
+        self.series = series
+        self.weights = series.weight_vector(weights)
+        self.rebalance = rebalance
+
+    @property
+    def serially_independent(self) -> bool:
+        return self.rebalance
+
+    @property
+    def mean_return(self) -> Optional[float]:
+        if not self.serially_independent:
+            return None
+        return float(np.mean(np.asarray(self.series.returns) @ self.weights))
+
+    def draw_shocks(self, rng: np.random.Generator, iterations: int, years: int, dtype=np.float64) -> np.ndarray:
+        # Shocks are row indices, whatever the dtype
+        return rng.integers(0, len(self.series.returns), self.shock_shape(iterations, years))
+
+    def returns_from_shocks(self, shocks: np.ndarray) -> np.ndarray:
+        return combine_assets(
+            np.asarray(self.series.returns)[shocks], self.weights, self.rebalance
+        )
+
+
+class BlockBootstrapReturns(BootstrapReturns):
+    """
+    Stationary block bootstrap (Politis-Romano): replays runs of consecutive
+    historical years with geometric lengths, preserving short-term dependence.
+
+    Every year restarts at a random historical year with probability
+    1 / mean_block_length, otherwise it continues from the previous year
+    (wrapping around). Indices are built without a year loop: the last
+    restart at or before each year comes from a running maximum, and the
+    index is that restart's start plus the years elapsed since.
+    """
+
+    serially_independent = False
+
+    def __init__(
+        self,
+        series: HistoricalSeries,
+        weights: Dict[str, float],
+        mean_block_length: float = 5.0,
+        rebalance: bool = True
+    ):
+        """
+        Initialize block bootstrap model.
+
+        Args:
+            series: Historical annual asset returns
+            weights: Portfolio weight per asset name
+            mean_block_length: Expected run of consecutive historical years
+            rebalance: Rebalance to the target weights every year (default True)
+        """
+        if mean_block_length < 1:
+            raise ValueError("mean_block_length must be at least 1")
+        super().__init__(series, weights, rebalance)
+        self.mean_block_length = mean_block_length
+
+    def draw_shocks(self, rng: np.random.Generator, iterations: int, years: int, dtype=np.float64) -> np.ndarray:
+        history = len(self.series.returns)
+        # One (start, restart) pair per scenario-year, drawn row by row, so
+        # drawing a run in batches gives the same indices as drawing it whole
+        uniforms = rng.random((iterations, years, 2))
+        starts = (uniforms[..., 0] * history).astype(np.intp)
+        restarts = uniforms[..., 1] < 1 / self.mean_block_length
+        restarts[:, 0] = True
+
+        year = np.arange(years)
+        last_restart = np.maximum.accumulate(np.where(restarts, year, 0), axis=1)
+        first = np.take_along_axis(starts, last_restart, axis=1)
+        return (first + year - last_restart) % history
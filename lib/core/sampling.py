@@ -0,0 +1,100 @@
+"""
+Shock sampling schemes for variance reduction.
+Antithetic pairs work for any symmetric shock distribution; Sobol points need SciPy.
+"""
+
+import warnings
+
+import numpy as np
+from typing import Tuple
+
+try:
+    from scipy.special import ndtri
+    from scipy.stats import qmc
+except ImportError:  # SciPy is optional
+    ndtri = None
+    qmc = None
+
+
+SAMPLING_METHODS = ('random', 'antithetic', 'sobol')
+
+SOBOL_AVAILABLE = qmc is not None
+
+# Independently scrambled Sobol blocks per run, so the run can estimate its own error
+SOBOL_REPLICATES = 16
+
+
+def antithetic_shocks(draw, iterations: int) -> np.ndarray:
+    """
+    Pair every shock path with its mirror image.
+
+    Row i and row i + ceil(iterations / 2) are negatives of each other. For
+    odd iterations the last mirrored row is dropped, so row
+    ceil(iterations / 2) - 1 (the end of the first half) is unpaired.
+
+    Args:
+        draw: Callable taking a row count and returning shocks with that many rows
+        iterations: Number of rows wanted
+
+    Returns:
+        Shock array with `iterations` rows
+    """
+    half = draw((iterations + 1) // 2)
+    return np.concatenate([half, -half])[:iterations]
+
+
+def sobol_normals(rng: np.random.Generator, shape: Tuple[int, ...]) -> np.ndarray:
+    """
+    Standard normals from scrambled Sobol points, one point per row.
+
+    Rows are split into SOBOL_REPLICATES blocks with independent scrambles
+    (randomized quasi-Monte Carlo), so block means give an honest error
+    estimate.
+
+    Args:
+        rng: Generator seeding the scrambles
+        shape: (iterations, ...) shape of the shocks; trailing axes form the
+            Sobol dimension
+
+    Returns:
+        Array of the given shape
+    """
+    if not SOBOL_AVAILABLE:
+        raise ValueError("Sobol sampling requires SciPy")
+
+    iterations = shape[0]
+    dimension = int(np.prod(shape[1:]))
+    blocks = []
+    # Block b holds rows [ceil(b * n / K), ceil((b + 1) * n / K)), matching sample_groups
+    bounds = [-(-block * iterations // SOBOL_REPLICATES) for block in range(SOBOL_REPLICATES + 1)]
+    for rows in np.diff(bounds):
+        if rows == 0:
+            continue
+        engine = qmc.Sobol(d=dimension, scramble=True, seed=rng)
+        with warnings.catch_warnings():
+            # Non-power-of-two sample sizes only lose some balance
+            warnings.simplefilter('ignore', UserWarning)
+            blocks.append(engine.random(rows))
+
+    # Keep the inverse CDF finite at the unit cube's edges
+    points = np.clip(np.concatenate(blocks), 1e-12, 1 - 1e-12)
+    return ndtri(points).reshape(shape)
+
+
+def sample_groups(sampling: str, iterations: int) -> np.ndarray:
+    """
+    Group id per path such that group means are independent and identically distributed.
+
+    Args:
+        sampling: One of SAMPLING_METHODS
+        iterations: Number of paths
+
+    Returns:
+        Integer array of shape (iterations,)
+    """
+    rows = np.arange(iterations)
+    if sampling == 'antithetic':
+        return rows % ((iterations + 1) // 2)
+    if sampling == 'sobol':
+        return rows * SOBOL_REPLICATES // iterations
+    return rows
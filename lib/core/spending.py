@@ -0,0 +1,191 @@
+"""
+Spending policies for Monte Carlo simulations.
+Each policy sets one year's withdrawal for a whole array of paths at a time.
+"""
+
+import numpy as np
+from typing import Dict, Optional, Union
+
+
+Withdrawal = Union[float, np.ndarray]
+
+
+class SpendingPolicy:
+    """
+    Base class for spending rules.
+
+    A run calls start() once, then withdrawal() once per year in order with
+    every path's balance at the start of that year (floored at zero). Any
+    path-dependent history lives in the state returned by start() and is
+    updated in place, so a year costs O(iterations) whatever the horizon.
+
+    Optional floor and cap rates bound each withdrawal to a share of the
+    path's start-of-year balance; the bounded amount is what later years see
+    as prior spending.
+    """
+
+    def __init__(self, floor_rate: Optional[float] = None, cap_rate: Optional[float] = None):
+        """
+        Initialize policy.
+
+        Args:
+            floor_rate: Minimum withdrawal as a fraction of the start-of-year balance
+            cap_rate: Maximum withdrawal as a fraction of the start-of-year balance
+        """
+        if floor_rate is not None and floor_rate < 0:
+            raise ValueError("floor_rate must be non-negative")
+        if cap_rate is not None and cap_rate < 0:
+            raise ValueError("cap_rate must be non-negative")
+        if floor_rate is not None and cap_rate is not None and floor_rate > cap_rate:
+            raise ValueError("floor_rate must not exceed cap_rate")
+        self.floor_rate = floor_rate
+        self.cap_rate = cap_rate
+
+    @property
+    def balance_independent(self) -> bool:
+        """Whether withdrawals are a fixed schedule, which closed-form shortcuts need."""
+        return False
+
+    def start(self, balance: np.ndarray, withdrawal_amount: float, inflation_factors: np.ndarray) -> Dict:
+        """
+        Create the state of a run.
+
+        Args:
+            balance: Starting balance of every path
+            withdrawal_amount: The simulator's first-year withdrawal
+            inflation_factors: Per-year withdrawal multiplier (all ones without
+                inflation adjustment)
+
+        Returns:
+            Mutable state passed back to withdrawal()
+        """
+        return {
+            'withdrawal_amount': withdrawal_amount,
+            'inflation_factors': inflation_factors,
+            'previous': None
+        }
+
+    def withdrawal(self, state: Dict, balance: np.ndarray, year: int) -> Withdrawal:
+        """
+        Withdrawal of every path in a year, after floors and caps.
+
+        Args:
+            state: State from start(), updated in place
+            balance: Start-of-year balance of every path, floored at zero
+            year: Simulated year, starting at 1
+
+        Returns:
+            Withdrawal per path (or one amount for all paths)
+        """
+        amount = self._target(state, balance, year)
+        if self.floor_rate is not None:
+            amount = np.maximum(amount, self.floor_rate * balance)
+        if self.cap_rate is not None:
+            amount = np.minimum(amount, self.cap_rate * balance)
+        state['previous'] = amount
+        return amount
+
+    def _target(self, state: Dict, balance: np.ndarray, year: int) -> Withdrawal:
+        """Withdrawal before floors and caps."""
+        raise NotImplementedError
+
+
+class FixedSpending(SpendingPolicy):
+    """The simulator's withdrawal amount, grown with inflation if enabled."""
+
+    @property
+    def balance_independent(self) -> bool:
+        return self.floor_rate is None and self.cap_rate is None
+
+    def _target(self, state: Dict, balance: np.ndarray, year: int) -> Withdrawal:
+        return state['withdrawal_amount'] * state['inflation_factors'][year - 1]
+
+
+class MovingAverageSpending(SpendingPolicy):
+    """
+    Fixed rate of a trailing average balance (the UPMIFA-style endowment rule).
+
+    With annual steps, the common 12-quarter average is the average of the
+    last three start-of-year balances. History before the first year is taken
+    to be the starting balance. The window is a ring buffer with a running
+    sum, so each year replaces one balance instead of re-averaging.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        averaging_years: int = 3,
+        floor_rate: Optional[float] = None,
+        cap_rate: Optional[float] = None
+    ):
+        """
+        Initialize policy.
+
+        Args:
+            rate: Withdrawal as a fraction of the average balance
+            averaging_years: Number of start-of-year balances averaged (default 3)
+            floor_rate: Minimum withdrawal as a fraction of the start-of-year balance
+            cap_rate: Maximum withdrawal as a fraction of the start-of-year balance
+        """
+        super().__init__(floor_rate, cap_rate)
+        if rate < 0:
+            raise ValueError("rate must be non-negative")
+        if averaging_years < 1:
+            raise ValueError("averaging_years must be at least 1")
+        self.rate = rate
+        self.averaging_years = averaging_years
+
+    def start(self, balance: np.ndarray, withdrawal_amount: float, inflation_factors: np.ndarray) -> Dict:
+        state = super().start(balance, withdrawal_amount, inflation_factors)
+        state['window'] = np.tile(balance, (self.averaging_years, 1))
+        state['total'] = balance * self.averaging_years
+        state['oldest'] = 0
+        return state
+
+    def _target(self, state: Dict, balance: np.ndarray, year: int) -> Withdrawal:
+        window, oldest = state['window'], state['oldest']
+        state['total'] += balance - window[oldest]
+        window[oldest] = balance
+        state['oldest'] = (oldest + 1) % self.averaging_years
+        return self.rate * state['total'] / self.averaging_years
+
+
+class YaleTobinSpending(SpendingPolicy):
+    """
+    Yale/Tobin hybrid: a weighted mix of last year's spending grown with
+    inflation and a fixed rate of the current balance.
+
+    The first year spends the rate times the starting balance.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        smoothing: float = 0.7,
+        floor_rate: Optional[float] = None,
+        cap_rate: Optional[float] = None
+    ):
+        """
+        Initialize policy.
+
+        Args:
+            rate: Long-run withdrawal as a fraction of the balance
+            smoothing: Weight on last year's inflation-adjusted spending (default 0.7)
+            floor_rate: Minimum withdrawal as a fraction of the start-of-year balance
+            cap_rate: Maximum withdrawal as a fraction of the start-of-year balance
+        """
+        super().__init__(floor_rate, cap_rate)
+        if rate < 0:
+            raise ValueError("rate must be non-negative")
+        if not 0 <= smoothing <= 1:
+            raise ValueError("smoothing must be between 0 and 1")
+        self.rate = rate
+        self.smoothing = smoothing
+
+    def _target(self, state: Dict, balance: np.ndarray, year: int) -> Withdrawal:
+        market = self.rate * balance
+        if state['previous'] is None:
+            return market
+        factors = state['inflation_factors']
+        inflation = factors[year - 1] / factors[year - 2]
+        return self.smoothing * state['previous'] * inflation + (1 - self.smoothing) * market
@@ -5,19 +5,25 @@
 @exports [generate_projection_chart, generate_probability_chart]
 """
 
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
-import matplotlib.pyplot as plt
 import io
 import base64
 from typing import Dict, List
 
 
+def _pyplot():
+    """pyplot on the non-interactive backend, imported on first chart so importing this module stays cheap."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+
 def generate_projection_chart(percentile_paths: Dict[str, List[float]], years: int) -> str:
     """
     Generate a projection chart showing portfolio value over time.
     Returns base64-encoded PNG image.
     """
+    plt = _pyplot()
     plt.style.use('seaborn-v0_8-whitegrid')
     fig, ax = plt.subplots(figsize=(10, 6))
     
@@ -67,6 +73,7 @@ def generate_income_chart(balance: float, withdrawal: float, years: int, growth_
     Generate an income by source chart similar to Nitrogen.
     Returns base64-encoded PNG image.
     """
+    plt = _pyplot()
     plt.style.use('seaborn-v0_8-whitegrid')
     fig, ax = plt.subplots(figsize=(10, 6))
     
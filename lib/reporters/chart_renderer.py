@@ -0,0 +1,267 @@
+"""
+@file lib/reporters/chart_renderer.py
+@module_type reporter
+@deps [matplotlib]
+@exports [ChartRenderer, render_chart, chart_key, shutdown_pool]
+
+PNG chart rendering for PDF reports.
+Figures are built with the object-oriented Figure/FigureCanvasAgg API (no
+pyplot state), rendered concurrently on a process pool and cached by a hash
+of their input data.
+"""
+
+import io
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import matplotlib
+import matplotlib.style
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.ticker import FuncFormatter
+
+from lib.core.cache import MemoryCacheBackend, make_cache_key
+
+logger = logging.getLogger(__name__)
+
+DPI = 150
+
+# First available of these styles is applied while a chart is drawn
+STYLE_NAMES = ('seaborn-v0_8-whitegrid', 'seaborn-whitegrid')
+
+# (kind, params) describing one chart; params must be JSON-serializable
+ChartSpec = Tuple[str, Dict[str, Any]]
+
+# rcParams are process-global, so in-process renders take turns
+_RENDER_LOCK = threading.Lock()
+
+_POOL: Optional[ProcessPoolExecutor] = None
+_POOL_LOCK = threading.Lock()
+
+
+def _style() -> Dict[str, Any]:
+    """rcParams of the report chart style (empty for matplotlib defaults)."""
+    for name in STYLE_NAMES:
+        if name in matplotlib.style.library:
+            return matplotlib.style.library[name]
+    return {}
+
+
+def _new_figure(width: float, height: float) -> Figure:
+    """Figure attached to its own Agg canvas."""
+    fig = Figure(figsize=(width, height), dpi=DPI)
+    FigureCanvasAgg(fig)
+    fig.patch.set_facecolor('white')
+    return fig
+
+
+def _to_png(fig: Figure) -> bytes:
+    """Encode a figure as PNG."""
+    fig.tight_layout()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=DPI, bbox_inches='tight',
+                facecolor='white', edgecolor='none', pad_inches=0.1)
+    return buffer.getvalue()
+
+
+def _draw_projection(projection_data: Dict[str, Any], portfolio_name: str, width: float, height: float) -> bytes:
+    """Percentile projection lines for one portfolio."""
+    labels = projection_data['labels']
+    datasets = projection_data['datasets']
+
+    fig = _new_figure(width, height)
+    ax = fig.add_subplot()
+
+    # Success, Primary, Warning
+    colors = ['#059669', '#1a2332', '#d69e2e']
+    line_styles = ['--', '-', '--']
+    line_widths = [2, 3, 2]
+    dataset_labels = ['90th Percentile', 'Median (50th)', '10th Percentile']
+
+    for i, dataset in enumerate(datasets[:len(colors)]):
+        ax.plot(labels, dataset['data'],
+                color=colors[i],
+                linestyle=line_styles[i],
+                linewidth=line_widths[i],
+                label=dataset.get('label', dataset_labels[i]),
+                alpha=0.8)
+
+    ax.set_title(f'{portfolio_name} - Endowment Projections',
+                 fontsize=12, fontweight='bold', color='#1a2332', pad=20)
+    ax.set_xlabel('Years', fontsize=10, color='#4a5568')
+    ax.set_ylabel('Balance ($)', fontsize=10, color='#4a5568')
+    ax.yaxis.set_major_formatter(FuncFormatter(lambda x, p: f'${x/1000000:.1f}M'))
+
+    ax.grid(True, alpha=0.3, color='#e2e8f0')
+    ax.set_facecolor('#f9fafb')
+    ax.legend(loc='upper left', frameon=True, fancybox=True, shadow=True,
+              fontsize=8, framealpha=0.9)
+    return _to_png(fig)
+
+
+def _draw_success_rates(names: List[str], rates: List[float], width: float, height: float) -> bytes:
+    """Horizontal bars of success rates (fractions), colored by threshold."""
+    colors = ['#059669' if rate >= 0.7 else '#d69e2e' if rate >= 0.5 else '#c53030' for rate in rates]
+    percents = [rate * 100 for rate in rates]
+
+    fig = _new_figure(width, height)
+    ax = fig.add_subplot()
+    bars = ax.barh(names, percents, color=colors, alpha=0.8, edgecolor='white', linewidth=1)
+
+    ax.set_title('Portfolio Success Rate Comparison',
+                 fontsize=12, fontweight='bold', color='#1a2332', pad=15)
+    ax.set_xlabel('Success Rate (%)', fontsize=10, color='#4a5568')
+    for bar, percent in zip(bars, percents):
+        ax.text(bar.get_width() + 1, bar.get_y() + bar.get_height()/2,
+                f'{percent:.1f}%', ha='left', va='center',
+                fontweight='bold', fontsize=9, color='#1a2332')
+
+    ax.set_xlim(0, 100)
+    ax.set_xticks([0, 25, 50, 75, 100])
+    ax.grid(True, axis='x', alpha=0.3, color='#e2e8f0')
+    ax.set_facecolor('#f9fafb')
+    for spine in ax.spines.values():
+        spine.set_visible(False)
+    return _to_png(fig)
+
+
+RENDERERS: Dict[str, Callable[..., bytes]] = {
+    'projection': _draw_projection,
+    'success_rate': _draw_success_rates
+}
+
+
+def render_chart(kind: str, params: Dict[str, Any]) -> bytes:
+    """
+    Render one chart to PNG in this process.
+
+    Args:
+        kind: Chart kind, a key of RENDERERS
+        params: Keyword arguments of the chart's draw function (sizes in inches)
+
+    Returns:
+        PNG bytes
+    """
+    draw = RENDERERS[kind]
+    with _RENDER_LOCK, matplotlib.rc_context(_style()):
+        return draw(**params)
+
+
+def chart_key(kind: str, params: Dict[str, Any]) -> str:
+    """Cache key of a chart: a hash of its kind and input data."""
+    return make_cache_key(f'chart:{kind}', **params)
+
+
+def _warm_worker():
+    """Pay font cache and first-draw costs once when a worker starts."""
+    render_chart('success_rate', {'names': ['warm-up'], 'rates': [1.0], 'width': 5, 'height': 2.5})
+
+
+def _process_context():
+    """Start workers from a clean forkserver where available, never by forking a threaded server."""
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context('spawn')
+
+
+def _get_pool(max_workers: int) -> ProcessPoolExecutor:
+    """Return the shared chart worker pool, creating it on first use."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=_process_context(),
+                initializer=_warm_worker
+            )
+        return _POOL
+
+
+def shutdown_pool():
+    """Shut down the shared chart worker pool."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.shutdown()
+            _POOL = None
+
+
+class ChartRenderer:
+    """Renders batches of charts with a PNG cache and an optional process pool."""
+
+    def __init__(self, max_workers: Optional[int] = None, cache_entries: int = 64):
+        """
+        Initialize chart renderer.
+
+        Args:
+            max_workers: Chart worker processes (None for min(4, CPUs), 0 to render in-process;
+                a single-CPU host renders in-process by default)
+            cache_entries: Rendered PNGs kept, least recently used evicted first
+        """
+        if max_workers is None:
+            cpus = os.cpu_count() or 1
+            max_workers = min(4, cpus) if cpus > 1 else 0
+        self.max_workers = max_workers
+        self.cache = MemoryCacheBackend(max_entries=cache_entries, ttl=None)
+
+    def render_many(self, specs: List[ChartSpec]) -> List[Optional[bytes]]:
+        """
+        Render charts, skipping matplotlib for any already cached.
+
+        Cache misses are rendered concurrently on the worker pool when there
+        is more than one, otherwise in-process.
+
+        Args:
+            specs: (kind, params) of each chart
+
+        Returns:
+            PNG bytes per spec, None where rendering failed
+        """
+        keys = [chart_key(kind, params) for kind, params in specs]
+        pngs: Dict[str, Optional[bytes]] = {key: self.cache.get(key) for key in keys}
+        missing = {key: spec for key, spec in zip(keys, specs) if pngs[key] is None}
+
+        if len(missing) > 1 and self.max_workers > 0:
+            pngs.update(self._render_pool(missing))
+        else:
+            pngs.update({key: self._render_local(*spec) for key, spec in missing.items()})
+
+        for key in missing:
+            if pngs[key] is not None:
+                self.cache.set(key, pngs[key])
+        return [pngs[key] for key in keys]
+
+    def _render_local(self, kind: str, params: Dict[str, Any]) -> Optional[bytes]:
+        try:
+            return render_chart(kind, params)
+        except Exception as e:
+            logger.error(f"Error rendering {kind} chart: {str(e)}")
+            return None
+
+    def _render_pool(self, missing: Dict[str, ChartSpec]) -> Dict[str, Optional[bytes]]:
+        try:
+            pool = _get_pool(self.max_workers)
+            futures = {key: pool.submit(render_chart, *spec) for key, spec in missing.items()}
+        except Exception as e:
+            # No worker processes available here (e.g. a restricted sandbox)
+            logger.warning(f"Chart pool unavailable, rendering in-process: {str(e)}")
+            return {key: self._render_local(*spec) for key, spec in missing.items()}
+
+        pngs = {}
+        for key, future in futures.items():
+            try:
+                pngs[key] = future.result()
+            except BrokenProcessPool as e:
+                # A worker died; start a fresh pool for the next report
+                logger.error(f"Chart pool broken, rendering in-process: {str(e)}")
+                shutdown_pool()
+                pngs[key] = self._render_local(*missing[key])
+            except Exception as e:
+                logger.error(f"Error rendering {missing[key][0]} chart in worker: {str(e)}")
+                pngs[key] = self._render_local(*missing[key])
+        return pngs
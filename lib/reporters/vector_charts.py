@@ -0,0 +1,158 @@
+"""
+@file lib/reporters/vector_charts.py
+@module_type reporter
+@deps [reportlab]
+@exports [projection_drawing, success_rate_drawing, VECTOR_RENDERERS]
+
+Vector PDF charts drawn with reportlab.graphics.
+Takes the same chart specs as chart_renderer but returns Drawing flowables,
+so reports need no matplotlib and stay sharp at any zoom.
+"""
+
+from typing import Any, Callable, Dict, List
+
+from reportlab.graphics.charts.barcharts import HorizontalBarChart
+from reportlab.graphics.charts.legends import LineLegend
+from reportlab.graphics.charts.lineplots import LinePlot
+from reportlab.graphics.shapes import Drawing, Rect, String
+from reportlab.lib.colors import HexColor, white
+from reportlab.lib.units import inch
+
+PRIMARY = HexColor('#1a2332')
+GRAY_600 = HexColor('#4a5568')
+GRAY_200 = HexColor('#e2e8f0')
+GRAY_50 = HexColor('#f9fafb')
+
+# Success, Primary, Warning, as in the raster charts
+LINE_COLORS = [HexColor('#059669'), PRIMARY, HexColor('#d69e2e')]
+LINE_DASHES = [(4, 2), None, (4, 2)]
+LINE_WIDTHS = [1.5, 2.25, 1.5]
+DATASET_LABELS = ['90th Percentile', 'Median (50th)', '10th Percentile']
+
+
+def _title(drawing: Drawing, text: str):
+    drawing.add(String(drawing.width / 2, drawing.height - 14, text, fontName='Helvetica-Bold',
+                       fontSize=10, fillColor=PRIMARY, textAnchor='middle'))
+
+
+def _plot_background(x: float, y: float, width: float, height: float) -> Rect:
+    return Rect(x, y, width, height, fillColor=GRAY_50, strokeColor=None)
+
+
+def projection_drawing(projection_data: Dict[str, Any], portfolio_name: str, width: float, height: float) -> Drawing:
+    """
+    Percentile projection lines for one portfolio.
+
+    Args:
+        projection_data: Chart data with 'labels' (years) and 'datasets' (each with 'data')
+        portfolio_name: Portfolio shown in the title
+        width: Width in inches
+        height: Height in inches
+
+    Returns:
+        ReportLab Drawing
+    """
+    labels = projection_data['labels']
+    datasets = projection_data['datasets'][:len(LINE_COLORS)]
+
+    drawing = Drawing(width * inch, height * inch)
+    _title(drawing, f'{portfolio_name} - Endowment Projections')
+
+    plot = LinePlot()
+    plot.x, plot.y = 50, 48
+    plot.width = drawing.width - plot.x - 10
+    plot.height = drawing.height - plot.y - 26
+    plot.data = [list(zip(labels, dataset['data'])) for dataset in datasets]
+    for i in range(len(datasets)):
+        plot.lines[i].strokeColor = LINE_COLORS[i]
+        plot.lines[i].strokeWidth = LINE_WIDTHS[i]
+        plot.lines[i].strokeDashArray = LINE_DASHES[i]
+
+    plot.xValueAxis.valueMin = labels[0]
+    plot.xValueAxis.valueMax = labels[-1]
+    plot.yValueAxis.valueMin = 0
+    plot.yValueAxis.labelTextFormat = lambda value: f'${value/1000000:.1f}M'
+    for axis in (plot.xValueAxis, plot.yValueAxis):
+        axis.labels.fontSize = 7
+        axis.labels.fillColor = GRAY_600
+        axis.strokeColor = GRAY_200
+        axis.visibleGrid = True
+        axis.gridStrokeColor = GRAY_200
+        axis.gridStrokeWidth = 0.5
+    drawing.add(_plot_background(plot.x, plot.y, plot.width, plot.height))
+    drawing.add(plot)
+
+    drawing.add(String(plot.x + plot.width / 2, plot.y - 22, 'Years', fontName='Helvetica',
+                       fontSize=8, fillColor=GRAY_600, textAnchor='middle'))
+
+    legend = LineLegend()
+    legend.x, legend.y = plot.x, 8
+    legend.fontSize = 7
+    legend.columnMaximum = 1
+    legend.deltax = 95
+    legend.dx = 14
+    legend.colorNamePairs = [
+        (LINE_COLORS[i], dataset.get('label', DATASET_LABELS[i])) for i, dataset in enumerate(datasets)
+    ]
+    drawing.add(legend)
+    return drawing
+
+
+def success_rate_drawing(names: List[str], rates: List[float], width: float, height: float) -> Drawing:
+    """
+    Horizontal bars of success rates (fractions), colored by threshold.
+
+    Args:
+        names: Portfolio names
+        rates: Success rate of each portfolio (0-1)
+        width: Width in inches
+        height: Height in inches
+
+    Returns:
+        ReportLab Drawing
+    """
+    drawing = Drawing(width * inch, height * inch)
+    _title(drawing, 'Portfolio Success Rate Comparison')
+
+    chart = HorizontalBarChart()
+    chart.x, chart.y = 120, 30
+    chart.width = drawing.width - chart.x - 40
+    chart.height = drawing.height - chart.y - 26
+    chart.data = [[rate * 100 for rate in rates]]
+    chart.bars.strokeColor = white
+    for i, rate in enumerate(rates):
+        chart.bars[(0, i)].fillColor = HexColor('#059669' if rate >= 0.7 else '#d69e2e' if rate >= 0.5 else '#c53030')
+
+    chart.categoryAxis.categoryNames = names
+    chart.categoryAxis.labels.fontSize = 8
+    chart.categoryAxis.labels.fillColor = PRIMARY
+    chart.categoryAxis.visibleAxis = False
+    chart.categoryAxis.visibleTicks = False
+    chart.valueAxis.valueMin = 0
+    chart.valueAxis.valueMax = 100
+    chart.valueAxis.valueStep = 25
+    chart.valueAxis.labels.fontSize = 7
+    chart.valueAxis.labels.fillColor = GRAY_600
+    chart.valueAxis.visibleAxis = False
+    chart.valueAxis.visibleGrid = True
+    chart.valueAxis.gridStrokeColor = GRAY_200
+    chart.valueAxis.gridStrokeWidth = 0.5
+
+    chart.barLabelFormat = '%.1f%%'
+    chart.barLabels.boxAnchor = 'w'
+    chart.barLabels.dx = 3
+    chart.barLabels.fontName = 'Helvetica-Bold'
+    chart.barLabels.fontSize = 8
+    chart.barLabels.fillColor = PRIMARY
+    drawing.add(_plot_background(chart.x, chart.y, chart.width, chart.height))
+    drawing.add(chart)
+
+    drawing.add(String(chart.x + chart.width / 2, 8, 'Success Rate (%)', fontName='Helvetica',
+                       fontSize=8, fillColor=GRAY_600, textAnchor='middle'))
+    return drawing
+
+
+VECTOR_RENDERERS: Dict[str, Callable[..., Drawing]] = {
+    'projection': projection_drawing,
+    'success_rate': success_rate_drawing
+}
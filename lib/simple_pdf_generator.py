@@ -5,6 +5,7 @@ Professional quality PDFs with integrated charts
 import io
 import logging
 import json
+import os
 import tempfile
 from datetime import datetime
 from reportlab.lib.pagesizes import letter
@@ -14,18 +15,26 @@ from reportlab.lib.colors import HexColor, black, white
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak, Image, BaseDocTemplate, PageTemplate, Frame
 from reportlab.platypus.flowables import HRFlowable
 from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT
-import matplotlib
-matplotlib.use('Agg')  # Use non-GUI backend for server environments
-import matplotlib.pyplot as plt
-import matplotlib.style as mplstyle
-import numpy as np
+from lib.core.metrics import timed
+
+# 'raster': matplotlib PNGs; 'vector': native ReportLab drawings (no matplotlib import)
+CHART_BACKENDS = ('raster', 'vector')
 
 logger = logging.getLogger(__name__)
 
 class SimplePDFGenerator:
     """Professional PDF generator using ReportLab"""
     
-    def __init__(self):
+    def __init__(self, chart_renderer=None, chart_renderer_options=None, chart_backend='raster'):
+        if chart_backend not in CHART_BACKENDS:
+            raise ValueError(f"chart_backend must be one of {CHART_BACKENDS}")
+        self.chart_backend = chart_backend
+        
+        # Raster charts render through a ChartRenderer (PNG cache + process pool),
+        # created on first use so vector-only reports never import matplotlib
+        self._chart_renderer = chart_renderer
+        self._chart_renderer_options = chart_renderer_options or {}
+        
         # Zenith color palette
         self.colors = {
             'primary': HexColor('#1a2332'),
@@ -42,15 +51,6 @@ class SimplePDFGenerator:
         # Custom styles
         self.styles = getSampleStyleSheet()
         self._create_custom_styles()
-        
-        # Configure matplotlib for clean charts
-        try:
-            plt.style.use('seaborn-v0_8-whitegrid')
-        except:
-            try:
-                plt.style.use('seaborn-whitegrid')
-            except:
-                plt.style.use('default')
     
     def _create_custom_styles(self):
         """Create custom paragraph styles"""
@@ -111,136 +111,62 @@ class SimplePDFGenerator:
             textColor=self.colors['gray_600']
         ))
 
-    def _create_projection_chart(self, projection_data_str, portfolio_name, width=5*inch, height=3*inch):
-        """Create a projection chart using matplotlib"""
+    def _projection_chart_spec(self, projection_data, portfolio_name, width=5*inch, height=3*inch):
+        """Chart spec of a portfolio's projection (data as a dict or JSON string), None if malformed"""
         try:
-            # Parse the JSON projection data
-            projection_data = json.loads(projection_data_str)
-            labels = projection_data['labels']
-            datasets = projection_data['datasets']
-            
-            # Create figure with Zenith colors
-            fig, ax = plt.subplots(figsize=(width/inch, height/inch), dpi=150)
-            fig.patch.set_facecolor('white')
-            
-            # Plot each dataset
-            colors = ['#059669', '#1a2332', '#d69e2e']  # Success, Primary, Warning
-            line_styles = ['--', '-', '--']
-            line_widths = [2, 3, 2]
-            
-            # Define proper labels for the datasets
-            dataset_labels = ['90th Percentile', 'Median (50th)', '10th Percentile']
-            
-            for i, dataset in enumerate(datasets):
-                if i < len(colors):
-                    label = dataset.get('label', dataset_labels[i] if i < len(dataset_labels) else f'Series {i+1}')
-                    ax.plot(labels, dataset['data'], 
-                           color=colors[i], 
-                           linestyle=line_styles[i],
-                           linewidth=line_widths[i],
-                           label=label,
-                           alpha=0.8)
-            
-            # Customize chart
-            ax.set_title(f'{portfolio_name} - Endowment Projections', 
-                        fontsize=12, fontweight='bold', color='#1a2332', pad=20)
-            ax.set_xlabel('Years', fontsize=10, color='#4a5568')
-            ax.set_ylabel('Balance ($)', fontsize=10, color='#4a5568')
-            
-            # Format y-axis to show currency
-            ax.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'${x/1000000:.1f}M'))
-            
-            # Grid and styling
-            ax.grid(True, alpha=0.3, color='#e2e8f0')
-            ax.set_facecolor('#f9fafb')
-            
-            # Legend
-            ax.legend(loc='upper left', frameon=True, fancybox=True, shadow=True, 
-                     fontsize=8, framealpha=0.9)
-            
-            # Tight layout
-            plt.tight_layout()
-            
-            # Save to bytes
-            img_buffer = io.BytesIO()
-            plt.savefig(img_buffer, format='png', dpi=150, bbox_inches='tight', 
-                       facecolor='white', edgecolor='none', pad_inches=0.1)
-            img_buffer.seek(0)
-            plt.close()
-            
-            # Create ReportLab Image
-            return Image(img_buffer, width=width, height=height)
-            
-        except Exception as e:
-            logger.error(f"Error creating projection chart: {str(e)}")
-            # Return a placeholder paragraph if chart generation fails
-            return Paragraph(f"[Chart for {portfolio_name}]", self.styles['CustomBody'])
+            if isinstance(projection_data, str):
+                projection_data = json.loads(projection_data)
+            chart_data = {'labels': projection_data['labels'], 'datasets': projection_data['datasets']}
+        except (ValueError, KeyError, TypeError) as e:
+            logger.error(f"Invalid projection data for {portfolio_name}: {str(e)}")
+            return None
+        return ('projection', {
+            'projection_data': chart_data,
+            'portfolio_name': portfolio_name,
+            'width': width / inch,
+            'height': height / inch
+        })
 
-    def _create_success_rate_chart(self, portfolios_data, width=5*inch, height=2.5*inch):
-        """Create a success rate comparison chart"""
-        try:
-            # Extract portfolio names and success rates
-            names = []
-            rates = []
-            colors_list = []
-            
-            for key, portfolio_data in portfolios_data.items():
-                names.append(portfolio_data['portfolio']['name'])
-                rate = portfolio_data['success_rate']
-                rates.append(rate * 100)  # Convert to percentage
-                
-                # Color based on success rate
-                if rate >= 0.7:
-                    colors_list.append('#059669')  # Success green
-                elif rate >= 0.5:
-                    colors_list.append('#d69e2e')  # Warning yellow
-                else:
-                    colors_list.append('#c53030')  # Danger red
-            
-            # Create horizontal bar chart
-            fig, ax = plt.subplots(figsize=(width/inch, height/inch), dpi=150)
-            fig.patch.set_facecolor('white')
-            
-            bars = ax.barh(names, rates, color=colors_list, alpha=0.8, edgecolor='white', linewidth=1)
-            
-            # Customize chart
-            ax.set_title('Portfolio Success Rate Comparison', 
-                        fontsize=12, fontweight='bold', color='#1a2332', pad=15)
-            ax.set_xlabel('Success Rate (%)', fontsize=10, color='#4a5568')
-            
-            # Add percentage labels on bars
-            for bar, rate in zip(bars, rates):
-                width = bar.get_width()
-                ax.text(width + 1, bar.get_y() + bar.get_height()/2, 
-                       f'{rate:.1f}%', ha='left', va='center', 
-                       fontweight='bold', fontsize=9, color='#1a2332')
-            
-            # Set x-axis limits
-            ax.set_xlim(0, 100)
-            ax.set_xticks([0, 25, 50, 75, 100])
-            
-            # Grid and styling
-            ax.grid(True, axis='x', alpha=0.3, color='#e2e8f0')
-            ax.set_facecolor('#f9fafb')
-            
-            # Remove spines
-            for spine in ax.spines.values():
-                spine.set_visible(False)
-            
-            plt.tight_layout()
-            
-            # Save to bytes
-            img_buffer = io.BytesIO()
-            plt.savefig(img_buffer, format='png', dpi=150, bbox_inches='tight',
-                       facecolor='white', edgecolor='none', pad_inches=0.1)
-            img_buffer.seek(0)
-            plt.close()
-            
-            return Image(img_buffer, width=width, height=height)
-            
-        except Exception as e:
-            logger.error(f"Error creating success rate chart: {str(e)}")
-            return Paragraph("[Success Rate Chart]", self.styles['CustomBody'])
+    def _success_rate_chart_spec(self, portfolios_data, width=5*inch, height=2.5*inch):
+        """Chart spec of the success rate comparison"""
+        return ('success_rate', {
+            'names': [portfolio_data['portfolio']['name'] for portfolio_data in portfolios_data.values()],
+            'rates': [portfolio_data['success_rate'] for portfolio_data in portfolios_data.values()],
+            'width': width / inch,
+            'height': height / inch
+        })
+
+    @property
+    def chart_renderer(self):
+        """Raster chart renderer, importing matplotlib on first access"""
+        if self._chart_renderer is None:
+            from lib.reporters.chart_renderer import ChartRenderer
+            self._chart_renderer = ChartRenderer(**self._chart_renderer_options)
+        return self._chart_renderer
+
+    def _render_charts(self, chart_specs, placeholders, chart_backend):
+        """Flowables for chart specs, with a placeholder paragraph for any chart that is missing or failed"""
+        specs = [spec for spec in chart_specs if spec is not None]
+        if chart_backend == 'vector':
+            from lib.reporters.vector_charts import VECTOR_RENDERERS
+            rendered = []
+            for kind, params in specs:
+                try:
+                    rendered.append(VECTOR_RENDERERS[kind](**params))
+                except Exception as e:
+                    logger.error(f"Error creating {kind} chart: {str(e)}")
+                    rendered.append(None)
+        else:
+            rendered = [
+                Image(io.BytesIO(png), width=params['width']*inch, height=params['height']*inch) if png is not None else None
+                for png, (kind, params) in zip(self.chart_renderer.render_many(specs), specs)
+            ]
+        rendered = iter(rendered)
+        charts = [next(rendered) if spec is not None else None for spec in chart_specs]
+        return [
+            chart if chart is not None else Paragraph(placeholder, self.styles['CustomBody'])
+            for chart, placeholder in zip(charts, placeholders)
+        ]
 
     def _draw_header_footer(self, canvas, doc):
         """Draw custom navy header and footer on each page"""
@@ -282,8 +208,11 @@ class SimplePDFGenerator:
         
         canvas.restoreState()
 
-    def generate_comprehensive_report(self, results_data, user_info=None):
-        """Generate comprehensive PDF report"""
+    def generate_comprehensive_report(self, results_data, user_info=None, chart_backend=None):
+        """Generate comprehensive PDF report (chart_backend defaults to the generator's)"""
+        chart_backend = chart_backend or self.chart_backend
+        if chart_backend not in CHART_BACKENDS:
+            raise ValueError(f"chart_backend must be one of {CHART_BACKENDS}")
         try:
             logger.info("Starting ReportLab PDF generation")
             
@@ -312,6 +241,25 @@ class SimplePDFGenerator:
             page_template = PageTemplate(id='main', frames=[frame], onPage=self._draw_header_footer)
             doc.addPageTemplates([page_template])
             
+            # Render every chart up front so cache misses draw concurrently
+            portfolios = results_data['portfolios']
+            projection_keys = [key for key, portfolio_data in portfolios.items() if 'projection_data' in portfolio_data]
+            chart_specs = [self._success_rate_chart_spec(portfolios)] + [
+                self._projection_chart_spec(
+                    portfolios[key]['projection_data'],
+                    portfolios[key]['portfolio']['name'],
+                    width=5.5*inch,
+                    height=2.8*inch
+                )
+                for key in projection_keys
+            ]
+            placeholders = ["[Success Rate Chart]"] + [
+                f"[Chart for {portfolios[key]['portfolio']['name']}]" for key in projection_keys
+            ]
+            with timed('charts'):
+                success_chart, *projection_flowables = self._render_charts(chart_specs, placeholders, chart_backend)
+            projection_charts = dict(zip(projection_keys, projection_flowables))
+            
             # Build content
             story = []
             
@@ -376,7 +324,6 @@ class SimplePDFGenerator:
             story.append(Spacer(1, 15))
             
             # Add success rate comparison chart
-            success_chart = self._create_success_rate_chart(results_data['portfolios'])
             story.append(success_chart)
             story.append(Spacer(1, 20))
             
@@ -415,14 +362,8 @@ class SimplePDFGenerator:
                 story.append(Spacer(1, 10))
                 
                 # Add projection chart for this portfolio
-                if 'projection_data' in portfolio_data:
-                    portfolio_chart = self._create_projection_chart(
-                        portfolio_data['projection_data'], 
-                        portfolio_data['portfolio']['name'],
-                        width=5.5*inch, 
-                        height=2.8*inch
-                    )
-                    story.append(portfolio_chart)
+                if key in projection_charts:
+                    story.append(projection_charts[key])
                 
                 story.append(Spacer(1, 20))
             
@@ -515,4 +456,10 @@ class SimplePDFGenerator:
             raise
 
 # Singleton instance
-simple_pdf_generator = SimplePDFGenerator()
\ No newline at end of file
+simple_pdf_generator = SimplePDFGenerator(
+    chart_renderer_options={
+        'max_workers': int(os.getenv('CHART_WORKERS')) if os.getenv('CHART_WORKERS') else None,
+        'cache_entries': int(os.getenv('CHART_CACHE_ENTRIES', 64))
+    },
+    chart_backend=os.getenv('PDF_CHART_BACKEND', 'raster')
+)
@@ -0,0 +1,18 @@
+#!/bin/bash
+
+# Performance benchmarks for nonprofit-calculator
+# Every run is saved as JSON under .benchmarks/ (named by commit), so runs on
+# the same machine can be compared across commits:
+#
+#   ./run-benchmarks.sh                                  # run and save
+#   ./run-benchmarks.sh --benchmark-compare              # compare with the last saved run
+#   ./run-benchmarks.sh --benchmark-compare=0001 --benchmark-compare-fail=mean:10%
+#   ./run-benchmarks.sh -k run_simulation                # a subset
+#   python -m pytest_benchmark compare --group-by=name   # list saved runs side by side
+
+if ! python -c "import pytest_benchmark" 2>/dev/null; then
+    echo "pytest-benchmark is not installed: pip install -r requirements.txt"
+    exit 1
+fi
+
+python -m pytest -c benchmarks/pytest.ini --rootdir=. benchmarks/ "$@"
@@ -6,6 +6,8 @@ Tests the full API request/response cycle.
 import pytest
 import json
 
+from app import CalculationError, result_cache
+
 
 class TestAPIEndpoints:
     """Test suite for API endpoints."""
@@ -83,6 +85,519 @@ class TestAPIEndpoints:
         assert data['calculation_details']['annual_withdrawal'] == 50000
         assert data['calculation_details']['withdrawal_rate_percent'] == 5.0
     
+    def test_calculate_seeded_is_reproducible(self, client):
+        """Test identical seeded requests return identical results."""
+        payload = {
+            'starting_balance': 1000000,
+            'withdrawal_rate': 4.0,
+            'withdrawal_method': 'percentage',
+            'years': 30,
+            'seed': 1234
+        }
+        
+        first = client.post('/api/calculate', json=payload).get_json()
+        second = client.post('/api/calculate', json=payload).get_json()
+        
+        assert first['seed'] == 1234
+        assert first['portfolios'] == second['portfolios']
+        
+        unseeded = client.post('/api/calculate', json={**payload, 'seed': None}).get_json()
+        assert isinstance(unseeded['seed'], int)
+        
+        for seed in ('abc', [1], -1):
+            invalid = client.post('/api/calculate', json={**payload, 'seed': seed})
+            assert invalid.status_code == 400
+            assert 'seed' in invalid.get_json()['error']
+    
+    def test_calculate_common_random_numbers(self, client):
+        """Test common-random-numbers mode runs and is reported."""
+        payload = {
+            'starting_balance': 1000000,
+            'withdrawal_rate': 4.0,
+            'withdrawal_method': 'percentage',
+            'years': 30,
+            'seed': 99,
+            'common_random_numbers': True
+        }
+        
+        response = client.post('/api/calculate', json=payload)
+        
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['common_random_numbers'] is True
+        assert len(data['portfolios']) == 3
+    
+    def test_calculate_uses_result_cache(self, client):
+        """Test resubmitting identical inputs is served from the cache."""
+        payload = {
+            'starting_balance': 2500000,
+            'withdrawal_rate': 3.5,
+            'withdrawal_method': 'percentage',
+            'years': 25
+        }
+        
+        first = client.post('/api/calculate', json=payload).get_json()
+        before = client.get('/api/cache/stats').get_json()
+        second = client.post('/api/calculate', json={**payload, 'seed': first['seed']}).get_json()
+        after = client.get('/api/cache/stats').get_json()
+        
+        # Resubmitting with the returned seed reuses the first run's results
+        assert second['seed'] == first['seed']
+        assert second['portfolios'] == first['portfolios']
+        assert after['hits'] - before['hits'] == 3
+        
+        # Unseeded requests still get fresh draws
+        third = client.post('/api/calculate', json=payload).get_json()
+        assert third['seed'] != first['seed']
+    
+    def test_calculate_selected_portfolios(self, client):
+        """Test only requested portfolios are simulated and others can follow later."""
+        payload = {
+            'starting_balance': 1500000,
+            'withdrawal_rate': 4.5,
+            'withdrawal_method': 'percentage',
+            'years': 20,
+            'seed': 2024
+        }
+        
+        single = client.post('/api/calculate', json={**payload, 'portfolios': 'balanced'}).get_json()
+        assert list(single['portfolios']) == ['balanced']
+        
+        before = client.get('/api/cache/stats').get_json()
+        rest = client.post('/api/calculate', json={**payload, 'portfolios': ['aggressive', 'balanced']}).get_json()
+        after = client.get('/api/cache/stats').get_json()
+        
+        # The balanced result is reused, only the aggressive one is computed
+        assert set(rest['portfolios']) == {'balanced', 'aggressive'}
+        assert rest['portfolios']['balanced'] == single['portfolios']['balanced']
+        assert after['hits'] - before['hits'] == 1
+        
+        # Selection does not change a portfolio's numbers
+        everything = client.post('/api/calculate', json={**payload, 'portfolios': 'all'}).get_json()
+        assert everything['portfolios']['aggressive'] == rest['portfolios']['aggressive']
+    
+    def test_calculate_invalid_portfolio_selection(self, client):
+        """Test unknown portfolio ids are rejected."""
+        payload = {
+            'starting_balance': 1000000,
+            'withdrawal_rate': 4.0,
+            'withdrawal_method': 'percentage',
+            'portfolios': ['balanced', 'crypto']
+        }
+        
+        response = client.post('/api/calculate', json=payload)
+        
+        assert response.status_code == 400
+        assert 'error' in response.get_json()
+    
+    def test_calculate_stream(self, client):
+        """Test streamed calculation emits progress and matches /api/calculate."""
+        payload = {
+            'starting_balance': 1000000,
+            'withdrawal_rate': 4.0,
+            'withdrawal_method': 'percentage',
+            'years': 30,
+            'seed': 31337,
+            'portfolios': ['conservative', 'aggressive']
+        }
+        
+        response = client.post('/api/calculate/stream', json=payload)
+        
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+        
+        events = []
+        for block in response.get_data(as_text=True).strip().split('\n\n'):
+            event_line, data_line = block.split('\n')
+            events.append((event_line[len('event: '):], json.loads(data_line[len('data: '):])))
+        
+        names = [name for name, _ in events]
+        assert names[0] == 'start'
+        assert names[-1] == 'complete'
+        assert 'progress' in names
+        
+        streamed = {body['id']: body['result'] for name, body in events if name == 'portfolio'}
+        # Recompute rather than read back what the stream just cached
+        result_cache.clear()
+        direct = client.post('/api/calculate', json=payload).get_json()
+        assert streamed == direct['portfolios']
+        assert events[-1][1]['result_id'] != direct['result_id']
+    
+    def test_calculate_stream_invalid_payload(self, client):
+        """Test streamed calculation validates before streaming."""
+        response = client.post('/api/calculate/stream', json={'starting_balance': 0})
+        
+        assert response.status_code == 400
+    
+    def test_calculate_stream_planning_error(self, client, monkeypatch):
+        """Test errors while planning a streamed calculation come back as JSON."""
+        def fail(params, chunk_size):
+            raise CalculationError('historical returns unavailable')
+        
+        monkeypatch.setattr('app._plan_calculation', fail)
+        response = client.post('/api/calculate/stream', json={'starting_balance': 1000000, 'withdrawal_rate': 4.0, 'years': 30})
+        
+        assert response.status_code == 400
+        assert response.get_json() == {'error': 'historical returns unavailable'}
+    
+    def test_calculate_adaptive(self, client):
+        """Test adaptive mode reports iterations used and precision reached."""
+        payload = {
+            'starting_balance': 1000000,
+            'withdrawal_rate': 3.0,
+            'withdrawal_method': 'percentage',
+            'years': 30,
+            'tolerance': 0.01,
+            'max_iterations': 20000
+        }
+        
+        response = client.post('/api/calculate', json=payload)
+        
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['adaptive'] is True
+        for portfolio in data['portfolios'].values():
+            assert 0 < portfolio['iterations'] <= 20000
+            assert portfolio['standard_error']['success_rate'] <= 0.01 or not portfolio['converged']
+        assert data['max_iterations'] == 20000
+        assert data['iterations'] == max(portfolio['iterations'] for portfolio in data['portfolios'].values())
+        
+        invalid = client.post('/api/calculate', json={**payload, 'max_iterations': 10 ** 9})
+        assert invalid.status_code == 400
+    
+    def test_calculate_percentile_modes(self, client):
+        """Test memory-lean percentile modes report the same shape of results."""
+        payload = {
+            'starting_balance': 1000000,
+            'withdrawal_rate': 4.0,
+            'withdrawal_method': 'percentage',
+            'years': 30,
+            'seed': 17,
+            'portfolios': 'balanced',
+            'iterations': 2000
+        }
+        
+        full = client.post('/api/calculate', json=payload).get_json()
+        sketch = client.post('/api/calculate', json={**payload, 'percentile_mode': 'sketch'}).get_json()
+        exact = client.post('/api/calculate', json={**payload, 'percentile_mode': 'exact'}).get_json()
+        
+        assert sketch['percentile_mode'] == 'sketch'
+        assert sketch['portfolios']['balanced']['success_rate'] == full['portfolios']['balanced']['success_rate']
+        assert exact['portfolios']['balanced']['projection_data'] is not None
+        
+        invalid = client.post('/api/calculate', json={**payload, 'percentile_mode': 'median'})
+        assert invalid.status_code == 400
+        too_many = client.post('/api/calculate', json={**payload, 'iterations': 10 ** 7})
+        assert too_many.status_code == 400
+    
+    def test_calculate_float32(self, client):
+        """Test float32 runs are reported and serialize like float64 ones."""
+        payload = {
+            'starting_balance': 1000000,
+            'withdrawal_rate': 4.0,
+            'withdrawal_method': 'percentage',
+            'years': 30,
+            'seed': 18,
+            'dtype': 'float32'
+        }
+        
+        response = client.post('/api/calculate', json=payload)
+        
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['dtype'] == 'float32'
+        for portfolio in data['portfolios'].values():
+            assert 0 <= portfolio['success_rate'] <= 1
+        
+        invalid = client.post('/api/calculate', json={**payload, 'dtype': 'float16'})
+        assert invalid.status_code == 400
+    
+    def test_grid(self, client):
+        """Test the scenario grid returns rate x horizon matrices per portfolio."""
+        payload = {
+            'starting_balance': 1000000,
+            'withdrawal_rates': [2.0, 4.0, 6.0],
+            'horizons': [10, 30],
+            'portfolios': ['conservative', 'balanced'],
+            'iterations': 1000,
+            'seed': 19
+        }
+        
+        response = client.post('/api/grid', json=payload)
+        
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['seed'] == 19
+        assert set(data['portfolios']) == {'conservative', 'balanced'}
+        for portfolio in data['portfolios'].values():
+            for name in ('success_rate', 'percentile_10', 'percentile_50', 'percentile_90'):
+                assert len(portfolio[name]) == 3
+                assert all(len(row) == 2 for row in portfolio[name])
+            assert portfolio['success_rate'][0][0] >= portfolio['success_rate'][2][1]
+        
+        assert client.post('/api/grid', json=payload).get_json() == data
+        
+        invalid = client.post('/api/grid', json={**payload, 'horizons': [0]})
+        assert invalid.status_code == 400
+        too_large = client.post('/api/grid', json={**payload, 'withdrawal_rates': list(range(2000))})
+        assert too_large.status_code == 400
+        bad_seed = client.post('/api/grid', json={**payload, 'seed': 'abc'})
+        assert bad_seed.status_code == 400
+    
+    def test_calculate_multi_asset(self, client):
+        """Test the multi-asset return model with and without rebalancing."""
+        payload = {
+            'starting_balance': 1000000,
+            'withdrawal_rate': 4.0,
+            'withdrawal_method': 'percentage',
+            'years': 30,
+            'seed': 24,
+            'return_model': 'multi_asset',
+            'common_random_numbers': True
+        }
+        
+        rebalanced = client.post('/api/calculate', json=payload)
+        drifting = client.post('/api/calculate', json={**payload, 'rebalance': False})
+        
+        assert rebalanced.status_code == 200
+        assert drifting.status_code == 200
+        assert rebalanced.get_json()['return_model'] == 'multi_asset'
+        assert rebalanced.get_json()['portfolios'] != drifting.get_json()['portfolios']
+        
+        invalid = client.post('/api/calculate', json={**payload, 'return_model': 'garch'})
+        assert invalid.status_code == 400
+        exact = client.post('/api/calculate', json={**payload, 'rebalance': False, 'percentile_mode': 'exact'})
+        assert exact.status_code == 400
+    
+    def test_calculate_bootstrap_models(self, client, tmp_path, monkeypatch):
+        """Test bootstrap models need a configured CSV and fat-tailed models need none."""
+        import app as app_module
+        
+        payload = {
+            'starting_balance': 1000000,
+            'withdrawal_rate': 4.0,
+            'withdrawal_method': 'percentage',
+            'years': 30,
+            'seed': 29,
+            'portfolios': 'balanced'
+        }
+        monkeypatch.delenv('HISTORICAL_RETURNS_CSV', raising=False)
+        monkeypatch.setattr(app_module, '_historical_series', None)
+        
+        missing = client.post('/api/calculate', json={**payload, 'return_model': 'bootstrap'})
+        assert missing.status_code == 400
+        assert client.post('/api/calculate', json={**payload, 'return_model': 'student_t'}).status_code == 200
+        assert client.post('/api/calculate', json={**payload, 'return_model': 'lognormal'}).status_code == 200
+        
+        path = tmp_path / 'returns.csv'
+        path.write_text('year,stocks,bonds\n' + ''.join(
+            f'{1990 + i},{0.1 - 0.05 * (i % 3)},{0.04}\n' for i in range(30)
+        ))
+        monkeypatch.setenv('HISTORICAL_RETURNS_CSV', str(path))
+        
+        for model in ('bootstrap', 'block_bootstrap'):
+            response = client.post('/api/calculate', json={**payload, 'return_model': model})
+            assert response.status_code == 200
+            assert response.get_json()['return_model'] == model
+        
+        exact = client.post('/api/calculate', json={
+            **payload, 'return_model': 'block_bootstrap', 'percentile_mode': 'exact'
+        })
+        assert exact.status_code == 400
+    
+    def test_calculate_variance_reduction(self, client):
+        """Test variance-reduced runs report an effective sample size."""
+        payload = {
+            'starting_balance': 1000000,
+            'withdrawal_rate': 5.0,
+            'withdrawal_method': 'percentage',
+            'years': 30,
+            'seed': 35,
+            'sampling': 'antithetic',
+            'control_variate': True
+        }
+        
+        response = client.post('/api/calculate', json=payload)
+        
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['sampling'] == 'antithetic'
+        for portfolio in data['portfolios'].values():
+            assert portfolio['effective_sample_size'] > 5000
+            assert 0 <= portfolio['raw_success_rate'] <= 1
+        
+        invalid = client.post('/api/calculate', json={**payload, 'sampling': 'stratified'})
+        assert invalid.status_code == 400
+        adaptive = client.post('/api/calculate', json={**payload, 'tolerance': 0.01})
+        assert adaptive.status_code == 400
+        drifting = client.post('/api/calculate', json={
+            **payload, 'return_model': 'multi_asset', 'rebalance': False
+        })
+        assert drifting.status_code == 400
+    
+    def test_calculate_spending_policies(self, client):
+        """Test balance-based spending policies are selected by withdrawal_method."""
+        payload = {
+            'starting_balance': 1000000,
+            'withdrawal_rate': 5.0,
+            'withdrawal_method': 'percentage',
+            'years': 30,
+            'seed': 36
+        }
+        
+        fixed = client.post('/api/calculate', json=payload).get_json()
+        for method in ('moving_average', 'yale_tobin'):
+            response = client.post('/api/calculate', json={
+                **payload, 'withdrawal_method': method, 'spending_floor': 3.0, 'spending_cap': 6.0
+            })
+        
+            assert response.status_code == 200
+            data = response.get_json()
+            assert data['withdrawal_method'] == method
+            for key, portfolio in data['portfolios'].items():
+                assert portfolio['success_rate'] >= fixed['portfolios'][key]['success_rate']
+        
+        unknown = client.post('/api/calculate', json={**payload, 'withdrawal_method': 'endowment'})
+        assert unknown.status_code == 400
+        inverted = client.post('/api/calculate', json={
+            **payload, 'withdrawal_method': 'yale_tobin', 'spending_floor': 6.0, 'spending_cap': 3.0
+        })
+        assert inverted.status_code == 400
+        control_variate = client.post('/api/calculate', json={
+            **payload, 'withdrawal_method': 'moving_average', 'control_variate': True
+        })
+        assert control_variate.status_code == 400
+    
+    def test_server_timing_and_metrics(self, client, monkeypatch):
+        """Test the opt-in Server-Timing header and the Prometheus /metrics endpoint."""
+        import app as app_module
+        from lib.core.metrics import registry
+        
+        payload = {
+            'starting_balance': 1000000,
+            'withdrawal_rate': 4.0,
+            'withdrawal_method': 'percentage',
+            'years': 30,
+            'seed': 37
+        }
+        
+        # Both are off by default
+        assert 'Server-Timing' not in client.post('/api/calculate', json=payload).headers
+        assert client.get('/metrics').status_code == 404
+        
+        monkeypatch.setattr(app_module, 'SERVER_TIMING', True)
+        monkeypatch.setattr(registry, 'enabled', True)
+        registry.reset()
+        
+        response = client.post('/api/calculate', json={**payload, 'seed': 38})
+        stages = [entry.split(';')[0] for entry in response.headers['Server-Timing'].split(', ')]
+        for stage in ('parse', 'cache', 'simulate', 'rng', 'path_loop', 'percentiles', 'projection', 'serialize'):
+            assert stage in stages
+        
+        metrics = client.get('/metrics')
+        assert metrics.status_code == 200
+        assert metrics.mimetype == 'text/plain'
+        text = metrics.get_data(as_text=True)
+        assert 'endowment_stage_seconds_count{stage="simulate"} 1' in text
+        assert 'endowment_simulated_paths_total 15000' in text
+        assert 'endowment_result_cache_misses_total' in text
+        registry.reset()
+    
+    def test_generate_pdf_chart_backends(self, client):
+        """Test PDF reports with vector charts and rejection of unknown chart backends."""
+        payload = {
+            'starting_balance': 1000000,
+            'withdrawal_rate': 4.0,
+            'withdrawal_method': 'percentage',
+            'years': 30,
+            'seed': 41
+        }
+        results = client.post('/api/calculate', json=payload).get_json()
+        
+        response = client.post('/api/generate-pdf', json={'results': results, 'chart_backend': 'vector'})
+        assert response.status_code == 200
+        assert response.mimetype == 'application/pdf'
+        assert response.data.startswith(b'%PDF')
+        
+        response = client.post('/api/generate-pdf', json={'results': results, 'chart_backend': 'svg'})
+        assert response.status_code == 400
+    
+    def test_generate_pdf_from_result_id(self, client):
+        """Test reports are built from stored results by id, without re-uploading them."""
+        payload = {
+            'starting_balance': 1000000,
+            'withdrawal_rate': 4.0,
+            'withdrawal_method': 'percentage',
+            'years': 30,
+            'seed': 43
+        }
+        result_id = client.post('/api/calculate', json=payload).get_json()['result_id']
+        
+        response = client.post('/api/generate-pdf', json={'result_id': result_id, 'chart_backend': 'vector'})
+        assert response.status_code == 200
+        assert response.data.startswith(b'%PDF')
+        
+        response = client.post('/api/generate-pdf', json={'result_id': 'unknown'})
+        assert response.status_code == 404
+        assert client.post('/api/generate-pdf', json={}).status_code == 400
+    
+    def test_pdf_jobs(self, client, tmp_path, monkeypatch):
+        """Test background PDF jobs: submit, deduplicate, poll and download."""
+        import time
+        import app as app_module
+        from lib.core.jobs import ArtifactStore, JobQueue
+        
+        queue = JobQueue(ArtifactStore(str(tmp_path), suffix='.pdf'), max_workers=1)
+        monkeypatch.setattr(app_module, 'job_queue', queue)
+        
+        payload = {
+            'starting_balance': 1000000,
+            'withdrawal_rate': 4.0,
+            'withdrawal_method': 'percentage',
+            'years': 30,
+            'seed': 47
+        }
+        result_id = client.post('/api/calculate', json=payload).get_json()['result_id']
+        
+        response = client.post('/api/jobs', json={'result_id': result_id, 'chart_backend': 'vector'})
+        assert response.status_code == 202
+        job = response.get_json()
+        assert response.headers['Location'] == job['status_url']
+        
+        # An identical report shares the job
+        duplicate = client.post('/api/jobs', json={'result_id': result_id, 'chart_backend': 'vector'})
+        assert duplicate.get_json()['id'] == job['id']
+        
+        deadline = time.time() + 30
+        while job['status'] in ('queued', 'running') and time.time() < deadline:
+            time.sleep(0.05)
+            job = client.get(job['status_url']).get_json()
+        assert job['status'] == 'succeeded'
+        
+        artifact = client.get(job['artifact_url'])
+        assert artifact.status_code == 200
+        assert artifact.mimetype == 'application/pdf'
+        assert artifact.data.startswith(b'%PDF')
+        
+        assert client.get('/api/jobs/unknown').status_code == 404
+        assert client.get('/api/jobs/unknown/artifact').status_code == 404
+        assert client.post('/api/jobs', json={'result_id': 'unknown'}).status_code == 404
+        assert client.post('/api/jobs', json={}).status_code == 400
+        queue.shutdown()
+    
+    def test_calculate_invalid_seed(self, client):
+        """Test calculation rejects negative seeds."""
+        payload = {
+            'starting_balance': 1000000,
+            'withdrawal_rate': 4.0,
+            'withdrawal_method': 'percentage',
+            'seed': -1
+        }
+        
+        response = client.post('/api/calculate', json=payload)
+        
+        assert response.status_code == 400
+    
     def test_calculate_invalid_balance(self, client):
         """Test calculation with invalid balance."""
         payload = {
@@ -0,0 +1,45 @@
+"""
+Startup tests: importing the API must stay cheap for fast worker scale-up.
+Import-time budgets are checked by benchmarks/bench_startup.py.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+# Only report endpoints need these; they are imported on first use
+LAZY_MODULES = ('matplotlib', 'reportlab', 'lib.simple_pdf_generator', 'lib.reporters.chart_renderer')
+
+
+def imported_modules():
+    """Names of every module loaded by `import app` in a fresh interpreter."""
+    stdout = subprocess.run(
+        [sys.executable, '-c', 'import json, sys, app; print(json.dumps(sorted(sys.modules)))'],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    return set(json.loads(stdout.splitlines()[-1]))
+
+
+class TestStartup:
+    """Test suite for API import cost."""
+
+    def test_app_import_skips_reporter_dependencies(self):
+        """Test importing the app loads none of the reporter dependencies."""
+        modules = imported_modules()
+
+        assert 'app' in modules
+        for name in LAZY_MODULES:
+            assert name not in modules, f'{name} is imported at startup'
+
+    def test_report_dependencies_load_on_first_use(self):
+        """Test the PDF generator is loaded by the first report request."""
+        script = (
+            "import sys, app\n"
+            "assert 'reportlab' not in sys.modules\n"
+            "assert app.get_pdf_generator().chart_backend in ('raster', 'vector')\n"
+            "assert 'reportlab' in sys.modules and 'matplotlib' not in sys.modules\n"
+        )
+        subprocess.run([sys.executable, '-c', script], cwd=ROOT, check=True)
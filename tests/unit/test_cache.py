@@ -0,0 +1,83 @@
+"""
+Unit tests for the simulation result cache.
+"""
+
+import pytest
+from lib.core.cache import (
+    MemoryCacheBackend, SQLiteCacheBackend,
+    create_result_cache, make_cache_key
+)
+
+
+class TestResultCache:
+    """Test suite for result cache keys and backends."""
+    
+    def test_cache_key_is_canonical(self):
+        """Test key ignores parameter order and int/float spelling."""
+        first = make_cache_key('portfolio', starting_balance=1000000, years=30, seed=7)
+        second = make_cache_key('portfolio', seed=7, years=30.0, starting_balance=1000000.0)
+        
+        assert first == second
+        assert first != make_cache_key('portfolio', starting_balance=1000000, years=30, seed=8)
+        assert first != make_cache_key('seed', starting_balance=1000000, years=30, seed=7)
+        
+        nested = make_cache_key('grid', withdrawal_rates=[4.0, 5.0], bounds={'floor': 1.0})
+        assert nested == make_cache_key('grid', withdrawal_rates=[4, 5], bounds={'floor': 1})
+        assert nested != make_cache_key('grid', withdrawal_rates=[4, 5.5], bounds={'floor': 1})
+    
+    def test_memory_backend_evicts_least_recently_used(self):
+        """Test memory backend stays within its entry bound."""
+        backend = MemoryCacheBackend(max_entries=2)
+        backend.set('a', 1)
+        backend.set('b', 2)
+        backend.get('a')
+        backend.set('c', 3)
+        
+        assert backend.get('a') == 1
+        assert backend.get('b') is None
+        assert len(backend) == 2
+    
+    def test_memory_backend_expires_entries(self):
+        """Test entries past their TTL are treated as misses."""
+        backend = MemoryCacheBackend(ttl=-1)
+        backend.set('a', 1)
+        
+        assert backend.get('a') is None
+    
+    def test_sqlite_backend_is_shared(self, tmp_path):
+        """Test two backends on one file see each other's entries."""
+        path = str(tmp_path / 'cache.sqlite3')
+        writer = SQLiteCacheBackend(path, max_entries=2)
+        reader = SQLiteCacheBackend(path, max_entries=2)
+        
+        writer.set('a', {'success_rate': 0.9})
+        writer.set('b', {'success_rate': 0.8})
+        writer.set('c', {'success_rate': 0.7})
+        
+        assert reader.get('c') == {'success_rate': 0.7}
+        assert len(reader) == 2
+    
+    def test_hit_and_miss_counters(self):
+        """Test result cache counts lookups."""
+        cache = create_result_cache('memory')
+        
+        assert cache.get('key') is None
+        cache.set('key', {'success_rate': 0.5})
+        assert cache.get('key') == {'success_rate': 0.5}
+        assert cache.peek('key') == {'success_rate': 0.5}
+        
+        stats = cache.stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['entries'] == 1
+    
+    def test_disabled_cache(self):
+        """Test the none backend never stores anything."""
+        cache = create_result_cache('none')
+        cache.set('key', 1)
+        
+        assert cache.get('key') is None
+        assert cache.stats()['enabled'] is False
+        
+        with pytest.raises(ValueError):
+            create_result_cache('redis')
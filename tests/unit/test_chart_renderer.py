@@ -0,0 +1,118 @@
+"""
+Unit tests for PDF chart rendering and its PNG cache.
+"""
+
+import json
+
+import pytest
+from lib.reporters import chart_renderer
+from lib.reporters.chart_renderer import ChartRenderer, chart_key
+from lib.simple_pdf_generator import SimplePDFGenerator
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def projection_spec(name, offset=0):
+    """Projection chart spec with three short percentile lines."""
+    datasets = [{'data': [1000000 + offset + step * growth for step in range(6)]} for growth in (300000, 200000, 100000)]
+    return ('projection', {
+        'projection_data': {'labels': [0, 10, 20, 30, 40, 50], 'datasets': datasets},
+        'portfolio_name': name,
+        'width': 5.5,
+        'height': 2.8
+    })
+
+
+@pytest.fixture
+def counted_renders(monkeypatch):
+    """Count in-process draws per chart kind."""
+    counts = {kind: 0 for kind in chart_renderer.RENDERERS}
+
+    def counting(kind, draw):
+        def wrapper(**params):
+            counts[kind] += 1
+            return draw(**params)
+        return wrapper
+
+    for kind, draw in list(chart_renderer.RENDERERS.items()):
+        monkeypatch.setitem(chart_renderer.RENDERERS, kind, counting(kind, draw))
+    return counts
+
+
+class TestChartRenderer:
+    """Test suite for chart rendering, caching and the worker pool."""
+
+    def test_renders_png(self):
+        """Test both chart kinds render to PNG."""
+        renderer = ChartRenderer(max_workers=0)
+        specs = [
+            projection_spec('Balanced (70/30)'),
+            ('success_rate', {'names': ['A', 'B', 'C'], 'rates': [0.8, 0.6, 0.3], 'width': 5, 'height': 2.5})
+        ]
+
+        for png in renderer.render_many(specs):
+            assert png.startswith(PNG_SIGNATURE)
+
+    def test_cache_hit_skips_matplotlib(self, counted_renders):
+        """Test repeated charts are served from the cache by input hash."""
+        renderer = ChartRenderer(max_workers=0)
+        spec = projection_spec('Conservative (50/50)')
+
+        first, = renderer.render_many([spec])
+        second, = renderer.render_many([projection_spec('Conservative (50/50)')])
+        assert second == first
+        assert counted_renders['projection'] == 1
+
+        renderer.render_many([projection_spec('Conservative (50/50)', offset=1)])
+        assert counted_renders['projection'] == 2
+
+    def test_key_depends_on_data_and_size(self):
+        """Test the cache key changes with data and size but not dict order."""
+        kind, params = projection_spec('Aggressive (90/10)')
+
+        assert chart_key(kind, params) == chart_key(kind, dict(reversed(list(params.items()))))
+        assert chart_key(kind, params) != chart_key(kind, {**params, 'width': 6})
+        assert chart_key(kind, params) != chart_key(*projection_spec('Aggressive (90/10)', offset=1))
+
+    def test_failed_chart_returns_none(self):
+        """Test a chart that cannot be drawn yields None and is not cached."""
+        renderer = ChartRenderer(max_workers=0)
+        broken = ('projection', {'projection_data': {'labels': []}, 'portfolio_name': 'X', 'width': 5, 'height': 3})
+
+        assert renderer.render_many([broken]) == [None]
+        assert renderer.cache.get(chart_key(*broken)) is None
+
+    def test_process_pool_matches_in_process(self):
+        """Test charts rendered on the worker pool are identical to in-process renders."""
+        specs = [projection_spec('Pool A'), projection_spec('Pool B', offset=5)]
+        try:
+            pooled = ChartRenderer(max_workers=2).render_many(specs)
+        finally:
+            chart_renderer.shutdown_pool()
+
+        assert pooled == ChartRenderer(max_workers=0).render_many(specs)
+
+    def test_report_reuses_cached_charts(self, sample_results, counted_renders):
+        """Test regenerating the same report skips matplotlib entirely."""
+        generator = SimplePDFGenerator(ChartRenderer(max_workers=0))
+
+        assert generator.generate_comprehensive_report(sample_results).startswith(b'%PDF')
+        assert counted_renders == {'projection': 3, 'success_rate': 1}
+
+        for portfolio in sample_results['portfolios'].values():
+            portfolio['projection_data'] = json.loads(portfolio['projection_data'])
+        assert generator.generate_comprehensive_report(sample_results).startswith(b'%PDF')
+        assert counted_renders == {'projection': 3, 'success_rate': 1}
+
+    @pytest.mark.parametrize('chart_backend', ['raster', 'vector'])
+    def test_malformed_projection_uses_placeholder(self, sample_results, counted_renders, chart_backend):
+        """Test a malformed projection is left out of the report instead of aborting it."""
+        generator = SimplePDFGenerator(ChartRenderer(max_workers=0))
+        first = next(iter(sample_results['portfolios'].values()))
+        first['projection_data'] = '{"labels": [0, 10'
+
+        pdf = generator.generate_comprehensive_report(sample_results, chart_backend=chart_backend)
+
+        assert pdf.startswith(b'%PDF')
+        if chart_backend == 'raster':
+            assert counted_renders == {'projection': 2, 'success_rate': 1}
@@ -0,0 +1,72 @@
+"""
+Unit tests for simulation execution backends.
+"""
+
+import pytest
+import numpy as np
+from lib.core import MonteCarloSimulator, SimulationExecutor
+from lib.core.executor import shutdown_pools
+
+
+def make_simulators(seed):
+    """Build seeded simulators for two portfolios."""
+    streams = np.random.SeedSequence(seed).spawn(2)
+    return {
+        'conservative': MonteCarloSimulator(
+            starting_balance=1000000,
+            annual_return=0.075,
+            annual_std_dev=0.10,
+            withdrawal_amount=40000,
+            years=20,
+            seed=streams[0]
+        ),
+        'aggressive': MonteCarloSimulator(
+            starting_balance=1000000,
+            annual_return=0.095,
+            annual_std_dev=0.18,
+            withdrawal_amount=40000,
+            years=20,
+            seed=streams[1]
+        )
+    }
+
+
+class TestSimulationExecutor:
+    """Test suite for simulation executor backends."""
+    
+    @classmethod
+    def teardown_class(cls):
+        shutdown_pools()
+    
+    def test_serial_matches_direct_run(self):
+        """Test serial backend gives the same results as run_simulation."""
+        results = SimulationExecutor('serial').run(make_simulators(1), iterations=300)
+        direct = {
+            key: simulator.run_simulation(300)
+            for key, simulator in make_simulators(1).items()
+        }
+        
+        assert results == direct
+    
+    @pytest.mark.parametrize('backend', ['thread', 'process'])
+    def test_backends_match_serial(self, backend):
+        """Test pooled backends give identical results to serial for the same chunking."""
+        serial = SimulationExecutor('serial', chunk_size=100).run(make_simulators(2), iterations=300)
+        pooled = SimulationExecutor(backend, chunk_size=100).run(make_simulators(2), iterations=300)
+        
+        assert pooled == serial
+        assert pooled['aggressive']['iterations'] == 300
+    
+    def test_process_backend_with_shared_shocks(self):
+        """Test shared shocks reach process workers through shared memory."""
+        shocks = np.random.default_rng(3).standard_normal((200, 20))
+        
+        serial = SimulationExecutor('serial').run(make_simulators(3), 200, shocks=shocks)
+        pooled = SimulationExecutor('process', chunk_size=50).run(make_simulators(3), 200, shocks=shocks)
+        
+        assert pooled == serial
+    
+    def test_invalid_backend(self):
+        """Test unknown backends are rejected."""
+        with pytest.raises(ValueError):
+            SimulationExecutor('gpu')
@@ -0,0 +1,154 @@
+"""
+Unit tests for the background job queue and artifact store.
+"""
+
+import os
+import threading
+import time
+
+import pytest
+from lib.core.jobs import ArtifactStore, JobQueue, QueueFullError
+
+
+def wait_for(queue, job_id, timeout=5.0):
+    """Poll a job until it leaves the queued and running states."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if not job.active:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f'job {job_id} did not finish')
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArtifactStore(str(tmp_path / 'jobs'), ttl=60, suffix='.pdf')
+
+
+class TestJobQueue:
+    """Test suite for job execution, deduplication, timeouts and artifact expiry."""
+
+    def test_job_writes_artifact(self, store):
+        """Test a job's bytes end up in the artifact store."""
+        queue = JobQueue(store, max_workers=1)
+        job = queue.submit('a', lambda text: text.encode(), 'report')
+
+        assert wait_for(queue, job.id).status == 'succeeded'
+        with open(queue.artifact_path(job.id), 'rb') as f:
+            assert f.read() == b'report'
+        queue.shutdown()
+
+    def test_identical_jobs_are_deduplicated(self, store):
+        """Test jobs with the same key share one job while running and once stored."""
+        release = threading.Event()
+        calls = []
+
+        def work():
+            calls.append(1)
+            release.wait(5)
+            return b'pdf'
+
+        queue = JobQueue(store, max_workers=2)
+        first = queue.submit('same', work)
+        assert queue.submit('same', work) is first
+        other = queue.submit('other', work)
+        assert other is not first
+
+        release.set()
+        wait_for(queue, first.id)
+        wait_for(queue, other.id)
+        assert queue.submit('same', work) is first
+        assert len(calls) == 2
+
+        # Once the artifact is gone an identical job runs again
+        store.discard(first.id)
+        assert queue.submit('same', work) is not first
+        queue.shutdown()
+
+    def test_failed_job_reports_error(self, store):
+        """Test an exception marks the job failed and a retry starts a new job."""
+        def fail():
+            raise ValueError('bad results')
+
+        queue = JobQueue(store, max_workers=1)
+        job = wait_for(queue, queue.submit('x', fail).id)
+
+        assert job.status == 'failed'
+        assert job.error == 'bad results'
+        assert queue.artifact_path(job.id) is None
+        assert queue.submit('x', fail) is not job
+        queue.shutdown()
+
+    def test_timeout_discards_result(self, store):
+        """Test a job running past its timeout is failed and its late result dropped."""
+        release = threading.Event()
+
+        def slow():
+            release.wait(5)
+            return b'late'
+
+        queue = JobQueue(store, max_workers=1, timeout=0.05)
+        job = queue.submit('slow', slow)
+        time.sleep(0.1)
+
+        assert queue.get(job.id).status == 'failed'
+        assert 'Timed out' in job.error
+        release.set()
+        queue.shutdown()
+        assert job.status == 'failed'
+        assert not store.exists(job.id)
+
+    def test_queue_is_bounded(self, store):
+        """Test submissions beyond max_pending are refused."""
+        release = threading.Event()
+
+        def work():
+            release.wait(5)
+            return b'pdf'
+
+        queue = JobQueue(store, max_workers=1, max_pending=2)
+        queue.submit('a', work)
+        queue.submit('b', work)
+
+        with pytest.raises(QueueFullError):
+            queue.submit('c', work)
+        release.set()
+        queue.shutdown()
+
+    def test_timed_out_jobs_count_until_they_return(self, store):
+        """Test a timed-out job keeps its pending slot while its call is still running."""
+        release = threading.Event()
+
+        def work():
+            release.wait(5)
+            return b'pdf'
+
+        queue = JobQueue(store, max_workers=1, max_pending=1, timeout=0.05)
+        job = queue.submit('a', work)
+        time.sleep(0.1)
+
+        assert queue.get(job.id).status == 'failed'
+        with pytest.raises(QueueFullError):
+            queue.submit('b', work)
+
+        # Once the call returns the slot is free again
+        release.set()
+        deadline = time.time() + 5
+        while job.abandoned and time.time() < deadline:
+            time.sleep(0.01)
+        assert wait_for(queue, queue.submit('b', bytes, 3).id).status == 'succeeded'
+        queue.shutdown()
+
+    def test_cleanup_expires_artifacts_and_jobs(self, store):
+        """Test artifacts and finished jobs older than the TTL are removed."""
+        queue = JobQueue(store, max_workers=1)
+        job = wait_for(queue, queue.submit('a', bytes, 3).id)
+        stale = time.time() - 120
+        os.utime(store.path(job.id), (stale, stale))
+        job.finished_at = stale
+
+        queue.cleanup()
+        assert not store.exists(job.id)
+        assert queue.get(job.id) is None
+        queue.shutdown()
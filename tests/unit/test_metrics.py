@@ -0,0 +1,68 @@
+"""
+Unit tests for stage timing metrics.
+"""
+
+import pytest
+from lib.core import MonteCarloSimulator
+from lib.core import metrics
+
+
+@pytest.fixture
+def enabled_registry(monkeypatch):
+    """Enable the process-wide registry for one test and start it empty."""
+    monkeypatch.setattr(metrics.registry, 'enabled', True)
+    metrics.registry.reset()
+    yield metrics.registry
+    metrics.registry.reset()
+
+
+class TestMetrics:
+    """Test suite for stage histograms, counters and request timings."""
+
+    def test_disabled_timers_are_shared_no_ops(self):
+        """Test nothing is recorded while metrics and Server-Timing are off."""
+        assert metrics.timed('rng') is metrics.timed('path_loop')
+
+        MonteCarloSimulator(1000000, 0.07, 0.15, 40000, 10, seed=71).run_simulation(100)
+        assert metrics.registry.stages == {}
+        assert metrics.registry.counters == {}
+
+    def test_simulation_stages_and_counters(self, enabled_registry):
+        """Test each percentile mode records the rng, path loop and percentile stages."""
+        sim = MonteCarloSimulator(1000000, 0.07, 0.15, 40000, 10, seed=72)
+
+        for mode in ('full', 'exact', 'sketch'):
+            sim.run_simulation(200, percentile_mode=mode)
+
+        assert {'rng', 'path_loop', 'percentiles'} <= set(enabled_registry.stages)
+        assert enabled_registry.counters['simulations_total'] == 3
+        assert enabled_registry.counters['simulated_paths_total'] == 600
+
+        text = enabled_registry.render()
+        assert '# TYPE endowment_stage_seconds histogram' in text
+        assert 'endowment_stage_seconds_bucket{stage="path_loop",le="+Inf"}' in text
+        assert 'endowment_simulated_paths_total 600' in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test bucket counts accumulate up to the +Inf bucket."""
+        histogram = metrics.Histogram(buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.7, 5.0):
+            histogram.observe(value)
+
+        assert histogram.cumulative() == [('0.1', 1), ('1.0', 3), ('+Inf', 4)]
+        assert histogram.sum == pytest.approx(6.25)
+
+    def test_request_timings(self):
+        """Test request timings sum repeated stages into a Server-Timing header."""
+        timings = metrics.start_request_timings()
+        try:
+            for _ in range(2):
+                with metrics.timed('percentiles'):
+                    pass
+            assert metrics.request_timings() is timings
+        finally:
+            metrics.stop_request_timings()
+
+        assert list(timings.stages) == ['percentiles']
+        assert timings.header().startswith('percentiles;dur=')
+        assert metrics.request_timings() is None
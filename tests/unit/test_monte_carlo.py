@@ -6,6 +6,7 @@ Tests core calculation logic without external dependencies.
 import pytest
 import numpy as np
 from lib.core import MonteCarloSimulator
+from lib.core.monte_carlo import GrowthPaths
 
 
 class TestMonteCarloSimulator:
@@ -227,4 +228,374 @@ class TestMonteCarloSimulator:
         for _ in range(5):
             balance = balance * 1.05 - 40000
         
-        assert abs(paths['p50'][-1] - balance) < 1  # Allow for rounding
\ No newline at end of file
+        assert abs(paths['p50'][-1] - balance) < 1  # Allow for rounding
+    
+    def test_vectorized_engine_matches_reference_loop(self):
+        """Test vectorized engine reproduces the per-path loop exactly."""
+        sim = MonteCarloSimulator(
+            starting_balance=1000000,
+            annual_return=0.07,
+            annual_std_dev=0.15,
+            withdrawal_amount=90000,
+            years=20
+        )
+        returns = np.random.default_rng(7).normal(0.07, 0.15, size=(200, 20))
+        
+        paths, final_balances, depletion_years = sim._simulate_paths(returns)
+        
+        # Reference: the original scalar year-by-year loop
+        for i in range(200):
+            balance = 1000000
+            depleted_year = None
+            for year in range(1, 21):
+                balance *= (1 + returns[i, year - 1] - sim.management_fee)
+                balance -= 90000 * ((1 + sim.inflation_rate) ** (year - 1))
+                if balance <= 0 and depleted_year is None:
+                    depleted_year = year
+                    balance = 0
+                assert paths[i, year] == max(0, balance)
+            assert final_balances[i] == balance
+            assert depletion_years[i] == (depleted_year or 0)
+    
+    def test_seeded_runs_are_reproducible(self):
+        """Test identical seeds give identical results and report the seed."""
+        params = dict(
+            starting_balance=1000000,
+            annual_return=0.07,
+            annual_std_dev=0.15,
+            withdrawal_amount=40000,
+            years=30
+        )
+        
+        first = MonteCarloSimulator(**params, seed=42).run_simulation(iterations=500)
+        second = MonteCarloSimulator(**params, seed=42).run_simulation(iterations=500)
+        other = MonteCarloSimulator(**params, seed=43).run_simulation(iterations=500)
+        
+        assert first == second
+        assert first['seed'] == 42
+        assert first['percentile_paths'] != other['percentile_paths']
+    
+    def test_generator_seed(self):
+        """Test a numpy Generator can be supplied directly."""
+        sim = MonteCarloSimulator(
+            starting_balance=1000000,
+            annual_return=0.07,
+            annual_std_dev=0.15,
+            withdrawal_amount=40000,
+            years=30,
+            seed=np.random.default_rng(5)
+        )
+        
+        results = sim.run_simulation(iterations=100)
+        
+        assert results['seed'] is None
+        assert 0 <= results['success_rate'] <= 1
+    
+    def test_common_random_numbers(self):
+        """Test shared shocks give consistent cross-portfolio comparisons."""
+        shocks = np.random.default_rng(11).standard_normal((500, 30))
+        params = dict(
+            starting_balance=1000000,
+            withdrawal_amount=40000,
+            years=30
+        )
+        low_risk = MonteCarloSimulator(annual_return=0.07, annual_std_dev=0.10, **params)
+        same_risk = MonteCarloSimulator(annual_return=0.07, annual_std_dev=0.10, **params)
+        
+        first = low_risk.run_simulation(iterations=500, shocks=shocks)
+        second = same_risk.run_simulation(iterations=500, shocks=shocks)
+        
+        # Identical portfolios on identical shocks give identical results
+        assert first['percentile_paths'] == second['percentile_paths']
+        
+        # Same shocks, higher mean return: every path is at least as good
+        better = MonteCarloSimulator(annual_return=0.09, annual_std_dev=0.10, **params)
+        improved = better.run_simulation(iterations=500, shocks=shocks)
+        assert improved['success_rate'] >= first['success_rate']
+        
+        with pytest.raises(ValueError):
+            low_risk.run_simulation(iterations=100, shocks=shocks)
+    
+    def test_sustainable_withdrawal_solver(self):
+        """Test solver reports an interval and leaves simulator state alone."""
+        sim = MonteCarloSimulator(
+            starting_balance=1000000,
+            annual_return=0.07,
+            annual_std_dev=0.15,
+            withdrawal_amount=40000,
+            years=30,
+            seed=3
+        )
+        
+        solution = sim.solve_sustainable_withdrawal(target_success_rate=0.7)
+        
+        assert sim.withdrawal_amount == 40000
+        low, high = solution['confidence_interval']
+        assert low <= solution['withdrawal'] <= high
+        assert solution['withdrawal_rate'] == solution['withdrawal'] / 1000000
+    
+    def test_breakeven_withdrawals_match_simulation(self):
+        """Test a path survives exactly when its breakeven exceeds the withdrawal."""
+        params = dict(starting_balance=1000000, annual_return=0.07, annual_std_dev=0.15, years=30)
+        shocks = np.random.default_rng(4).standard_normal((1000, 30))
+        
+        breakevens = MonteCarloSimulator(**params, withdrawal_amount=0).growth_paths(1000, shocks).breakevens()
+        for withdrawal in (30000, 50000, 70000):
+            results = MonteCarloSimulator(**params, withdrawal_amount=withdrawal).run_simulation(1000, shocks=shocks)
+            assert results['success_rate'] == np.mean(breakevens > withdrawal)
+        
+        # The solver's withdrawal achieves its target on the same paths
+        solution = MonteCarloSimulator(**params, withdrawal_amount=0).solve_sustainable_withdrawal(
+            0.7, iterations=1000, shocks=shocks
+        )
+        solved = MonteCarloSimulator(**params, withdrawal_amount=solution['withdrawal']).run_simulation(
+            1000, shocks=shocks
+        )
+        assert solved['success_rate'] == pytest.approx(0.7, abs=0.001)
+    
+    def test_iter_simulation_matches_run_simulation(self):
+        """Test batched progress ends with the same result as a single run."""
+        params = dict(
+            starting_balance=1000000,
+            annual_return=0.07,
+            annual_std_dev=0.15,
+            withdrawal_amount=40000,
+            years=30
+        )
+        
+        progress = list(MonteCarloSimulator(**params, seed=8).iter_simulation(1200, batch_size=500))
+        direct = MonteCarloSimulator(**params, seed=8).run_simulation(1200)
+        
+        assert [p['completed'] for p in progress] == [500, 1000, 1200]
+        assert progress[-1]['result'] == direct
+        assert progress[-1]['success_rate'] == direct['success_rate']
+    
+    def test_adaptive_run_stops_when_precise(self):
+        """Test adaptive mode stops early and matches a fixed run of the same size."""
+        params = dict(
+            starting_balance=1000000,
+            annual_return=0.07,
+            annual_std_dev=0.15,
+            withdrawal_amount=20000,
+            years=30
+        )
+        
+        adaptive = MonteCarloSimulator(**params, seed=12).run_adaptive(tolerance=0.01, max_iterations=20000)
+        
+        assert adaptive['converged'] is True
+        assert adaptive['iterations'] < 20000
+        assert adaptive['standard_error']['success_rate'] <= 0.01
+        
+        fixed = MonteCarloSimulator(**params, seed=12).run_simulation(adaptive['iterations'])
+        assert fixed['percentile_paths'] == adaptive['percentile_paths']
+        assert fixed['success_rate'] == adaptive['success_rate']
+    
+    def test_adaptive_run_respects_iteration_cap(self):
+        """Test adaptive mode reports non-convergence at the cap."""
+        sim = MonteCarloSimulator(
+            starting_balance=1000000,
+            annual_return=0.07,
+            annual_std_dev=0.15,
+            withdrawal_amount=40000,
+            years=30,
+            seed=13
+        )
+        
+        results = sim.run_adaptive(tolerance=0.0001, percentile_tolerance=0.001, max_iterations=3000)
+        
+        assert results['converged'] is False
+        assert results['iterations'] == 3000
+        assert set(results['standard_error']) == {'success_rate', 'p10', 'p50', 'p90'}
+    
+    def test_exact_percentile_mode_matches_full_paths(self):
+        """Test year-by-year percentiles equal those from stored paths on the same shocks."""
+        sim = MonteCarloSimulator(
+            starting_balance=1000000,
+            annual_return=0.07,
+            annual_std_dev=0.15,
+            withdrawal_amount=45000,
+            years=30,
+            seed=14
+        )
+        shocks = np.random.default_rng(15).standard_normal((2000, 30))
+        
+        full = sim.run_simulation(2000, shocks=shocks)
+        exact = sim.run_simulation(2000, shocks=shocks, percentile_mode='exact')
+        
+        assert exact == full
+    
+    def test_sketch_percentile_mode_is_close(self):
+        """Test sketched percentiles are within the sketch accuracy of exact ones."""
+        params = dict(
+            starting_balance=1000000,
+            annual_return=0.07,
+            annual_std_dev=0.15,
+            withdrawal_amount=45000,
+            years=30
+        )
+        
+        full = MonteCarloSimulator(**params, seed=16).run_simulation(5000)
+        sketch = MonteCarloSimulator(**params, seed=16).run_simulation(
+            5000, percentile_mode='sketch', chunk_size=1200
+        )
+        
+        # Same draws, so everything but the percentile paths is exact
+        assert sketch['success_rate'] == full['success_rate']
+        assert sketch['median_final_balance'] == full['median_final_balance']
+        for name in ('p10', 'p50', 'p90'):
+            exact = np.array(full['percentile_paths'][name])
+            approx = np.array(sketch['percentile_paths'][name])
+            assert np.all(np.abs(approx - exact) <= 0.01 * exact + 1)
+        
+        with pytest.raises(ValueError):
+            MonteCarloSimulator(**params).run_simulation(100, percentile_mode='median')
+    
+    def test_grid_matches_individual_runs(self):
+        """Test each grid cell matches a single run on the same shocks."""
+        params = dict(
+            starting_balance=1000000,
+            annual_return=0.07,
+            annual_std_dev=0.15,
+            inflation_rate=0.03,
+            management_fee=0.01
+        )
+        shocks = np.random.default_rng(18).standard_normal((1000, 40))
+        rates = [0.03, 0.05]
+        horizons = [40, 10]
+        
+        grid = MonteCarloSimulator(**params, withdrawal_amount=0, years=40).run_grid(
+            rates, horizons, 1000, shocks=shocks
+        )
+        
+        assert np.array(grid['success_rate']).shape == (2, 2)
+        for i, rate in enumerate(rates):
+            for j, horizon in enumerate(horizons):
+                single = MonteCarloSimulator(
+                    **params, withdrawal_amount=rate * 1000000, years=horizon
+                ).run_simulation(1000, shocks=shocks[:, :horizon])
+                assert grid['success_rate'][i][j] == single['success_rate']
+                for name in ('p10', 'p50', 'p90'):
+                    assert grid['percentiles'][name][i][j] == pytest.approx(
+                        single['percentile_paths'][name][-1], rel=1e-9, abs=1e-6
+                    )
+        
+        # Higher withdrawals and longer horizons never help
+        assert grid['success_rate'][0][0] >= grid['success_rate'][1][0]
+        assert grid['success_rate'][0][1] >= grid['success_rate'][0][0]
+        
+        # Evaluating one rate at a time bounds memory without changing results
+        chunked = MonteCarloSimulator(**params, withdrawal_amount=0, years=40).run_grid(
+            rates, horizons, 1000, shocks=shocks, chunk_size=1
+        )
+        assert chunked['success_rate'] == grid['success_rate']
+        assert chunked['percentiles'] == grid['percentiles']
+    
+    def test_growth_paths_match_simulation(self):
+        """Test precomputed growth reproduces simulated paths for any withdrawal."""
+        sim = MonteCarloSimulator(
+            starting_balance=1000000,
+            annual_return=0.07,
+            annual_std_dev=0.15,
+            withdrawal_amount=0,
+            years=30,
+            seed=20
+        )
+        returns = sim._draw_returns(1000)
+        growth = GrowthPaths(returns, sim.starting_balance, sim.management_fee, sim._inflation_factors())
+        
+        for withdrawal in (0, 40000, 60000):
+            sim.withdrawal_amount = withdrawal
+            paths, final_balances, depletion_years = sim._simulate_paths(returns)
+            fast_paths, fast_finals, fast_depletion = growth.simulate(withdrawal)
+            
+            np.testing.assert_allclose(fast_paths, paths, rtol=1e-9, atol=1e-6)
+            assert np.array_equal(fast_depletion, depletion_years)
+            assert np.array_equal(fast_finals > 0, final_balances > 0)
+            assert growth.success_rate(withdrawal) == np.mean(final_balances > 0)
+            np.testing.assert_allclose(growth.balances(withdrawal), paths[:, -1], rtol=1e-9, atol=1e-6)
+        
+        rates = growth.success_rate(np.array([0, 40000, 60000]), horizon=10)
+        assert rates[0] >= rates[1] >= rates[2]
+    
+    def test_antithetic_sampling_reports_effective_sample_size(self):
+        """Test antithetic runs mirror their shocks and report a larger effective sample."""
+        params = dict(
+            starting_balance=1000000,
+            annual_return=0.085,
+            annual_std_dev=0.15,
+            withdrawal_amount=50000,
+            years=30
+        )
+        sim = MonteCarloSimulator(**params, seed=32, sampling='antithetic')
+        
+        shocks = sim._draw_shocks(10, 30)
+        np.testing.assert_array_equal(shocks[5:], -shocks[:5])
+        
+        results = sim.run_simulation(4000)
+        plain = MonteCarloSimulator(**params, seed=32).run_simulation(4000)
+        
+        assert results['sampling'] == 'antithetic'
+        assert results['effective_sample_size'] > 2 * 4000
+        assert 'effective_sample_size' not in plain
+        assert results['success_rate'] == pytest.approx(plain['success_rate'], abs=0.03)
+    
+    def test_control_variate(self):
+        """Test the control variate has the analytic mean and reduces variance."""
+        params = dict(
+            starting_balance=1000000,
+            annual_return=0.085,
+            annual_std_dev=0.15,
+            withdrawal_amount=50000,
+            years=30
+        )
+        sim = MonteCarloSimulator(**params, seed=33, control_variate=True)
+        
+        wealth = sim._terminal_wealth(sim._draw_returns(200000))
+        expected = sim._expected_terminal_wealth()
+        assert wealth.mean() == pytest.approx(expected, rel=3 * wealth.std() / np.sqrt(200000) / abs(expected))
+        
+        results = sim.run_simulation(4000)
+        assert results['effective_sample_size'] > 4000
+        assert results['success_rate'] == pytest.approx(results['raw_success_rate'], abs=0.03)
+    
+    def test_invalid_variance_reduction(self):
+        """Test variance reduction options are checked against the run and return model."""
+        from lib.core.return_models import MultiAssetReturns, StudentTReturns
+        
+        params = dict(
+            starting_balance=1000000,
+            annual_return=0.07,
+            annual_std_dev=0.15,
+            withdrawal_amount=40000,
+            years=30
+        )
+        drifting = MultiAssetReturns([0.1, 0.05], [0.2, 0.05], np.eye(2), [0.6, 0.4], rebalance=False)
+        
+        with pytest.raises(ValueError):
+            MonteCarloSimulator(**params, sampling='stratified')
+        with pytest.raises(ValueError):
+            MonteCarloSimulator(**params, sampling='sobol', return_model=StudentTReturns(0.07, 0.15))
+        with pytest.raises(ValueError):
+            MonteCarloSimulator(**params, control_variate=True, return_model=drifting)
+        with pytest.raises(ValueError):
+            MonteCarloSimulator(**params, sampling='antithetic').run_simulation(100, percentile_mode='sketch')
+    
+    def test_sobol_sampling(self):
+        """Test Sobol sampling beats plain sampling's effective sample size."""
+        pytest.importorskip('scipy')
+        
+        sim = MonteCarloSimulator(
+            starting_balance=1000000,
+            annual_return=0.085,
+            annual_std_dev=0.15,
+            withdrawal_amount=50000,
+            years=30,
+            seed=34,
+            sampling='sobol'
+        )
+        
+        results = sim.run_simulation(4096)
+        
+        assert results['sampling'] == 'sobol'
+        assert 0 < results['success_rate'] < 1
+        assert results['effective_sample_size'] > 4096
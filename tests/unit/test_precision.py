@@ -0,0 +1,96 @@
+"""
+Unit tests for float32 simulations against float64 references.
+
+Stated tolerances: with the same shocks, float32 success rates are within
+0.001 and percentile paths within 1e-5 relative (of the starting balance for
+values near zero) of float64. With independent float32 draws, success rates
+agree within three standard errors.
+"""
+
+import pytest
+import numpy as np
+from lib.core import MonteCarloSimulator, SimulationExecutor
+from lib.core.spending import MovingAverageSpending
+
+SUCCESS_TOLERANCE = 0.001
+PERCENTILE_TOLERANCE = 1e-5
+
+
+def assert_close_results(actual, expected, starting_balance):
+    """Assert float32 results are within the stated tolerances of float64 ones."""
+    assert actual['success_rate'] == pytest.approx(expected['success_rate'], abs=SUCCESS_TOLERANCE)
+    for name in ('p10', 'p50', 'p90'):
+        np.testing.assert_allclose(
+            actual['percentile_paths'][name],
+            expected['percentile_paths'][name],
+            rtol=PERCENTILE_TOLERANCE,
+            atol=PERCENTILE_TOLERANCE * starting_balance
+        )
+
+
+class TestFloat32Simulation:
+    """Test suite for the float32 simulation mode."""
+
+    params = dict(
+        starting_balance=1000000,
+        annual_return=0.07,
+        annual_std_dev=0.15,
+        withdrawal_amount=50000,
+        years=40
+    )
+
+    @pytest.mark.parametrize('percentile_mode', ['full', 'exact', 'sketch'])
+    def test_same_shocks_within_tolerance(self, percentile_mode):
+        """Test every percentile mode stays within tolerance on shared shocks."""
+        shocks = np.random.default_rng(61).standard_normal((20000, 40))
+
+        expected = MonteCarloSimulator(**self.params, seed=61).run_simulation(
+            20000, shocks=shocks, percentile_mode=percentile_mode
+        )
+        actual = MonteCarloSimulator(**self.params, seed=61, dtype='float32').run_simulation(
+            20000, shocks=shocks, percentile_mode=percentile_mode
+        )
+
+        assert_close_results(actual, expected, self.params['starting_balance'])
+
+    def test_arrays_are_float32(self):
+        """Test draws, returns and balance paths use the requested dtype."""
+        sim = MonteCarloSimulator(**self.params, seed=62, dtype='float32')
+
+        assert sim._draw_shocks(100, 40).dtype == np.float32
+        returns = sim._draw_returns(100)
+        assert returns.dtype == np.float32
+        paths, final_balances, _ = sim._simulate_paths(returns)
+        assert paths.dtype == np.float32
+        assert final_balances.dtype == np.float32
+        assert isinstance(sim.run_simulation(100)['median_final_balance'], float)
+
+        with pytest.raises(ValueError):
+            MonteCarloSimulator(**self.params, dtype='float16')
+
+    def test_independent_draws_agree_statistically(self):
+        """Test a seeded float32 run agrees with float64 up to sampling noise."""
+        expected = MonteCarloSimulator(**self.params, seed=63).run_simulation(20000)
+        actual = MonteCarloSimulator(**self.params, seed=63, dtype='float32').run_simulation(20000)
+
+        rate = expected['success_rate']
+        standard_error = np.sqrt(2 * rate * (1 - rate) / 20000)
+        assert abs(actual['success_rate'] - rate) < 3 * standard_error
+
+    def test_spending_policy_and_executor(self):
+        """Test balance-based spending and chunked execution keep float32 within tolerance."""
+        shocks = np.random.default_rng(64).standard_normal((5000, 40))
+        policy = MovingAverageSpending(0.05)
+
+        expected = MonteCarloSimulator(**self.params, spending_policy=policy).run_simulation(5000, shocks=shocks)
+        actual = MonteCarloSimulator(
+            **self.params, spending_policy=policy, dtype='float32'
+        ).run_simulation(5000, shocks=shocks)
+        assert_close_results(actual, expected, self.params['starting_balance'])
+
+        executor = SimulationExecutor(chunk_size=1000)
+        chunked = executor.run(
+            {'run': MonteCarloSimulator(**self.params, dtype='float32')}, 5000, shocks=shocks
+        )['run']
+        reference = MonteCarloSimulator(**self.params).run_simulation(5000, shocks=shocks)
+        assert_close_results(chunked, reference, self.params['starting_balance'])
@@ -0,0 +1,255 @@
+"""
+Unit tests for return models.
+"""
+
+import json
+import os
+import time
+
+import pytest
+import numpy as np
+from lib.core import MonteCarloSimulator, PortfolioPreset
+from lib.core.return_models import (
+    BlockBootstrapReturns, BootstrapReturns, HistoricalSeries, LognormalReturns,
+    MultiAssetReturns, NormalReturns, StudentTReturns
+)
+
+
+def write_returns_csv(path, rows):
+    """Write a year,stocks,bonds CSV of annual returns."""
+    lines = ['year,stocks,bonds'] + [f'{1990 + i},{stocks},{bonds}' for i, (stocks, bonds) in enumerate(rows)]
+    path.write_text('\n'.join(lines) + '\n')
+    return str(path)
+
+
+def all_models(tmp_path):
+    """One instance of every return model."""
+    rows = [(0.01 * i - 0.1, 0.002 * i) for i in range(30)]
+    series = HistoricalSeries.from_csv(write_returns_csv(tmp_path / 'returns.csv', rows))
+    return {
+        'normal': NormalReturns(0.07, 0.15),
+        'student_t': StudentTReturns(0.07, 0.15),
+        'lognormal': LognormalReturns(0.07, 0.15),
+        'multi_asset': MultiAssetReturns([0.08, 0.03], [0.18, 0.05], [[1.0, 0.2], [0.2, 1.0]], [0.6, 0.4]),
+        'bootstrap': BootstrapReturns(series, {'stocks': 0.6, 'bonds': 0.4}),
+        'block_bootstrap': BlockBootstrapReturns(series, {'stocks': 1.0}, mean_block_length=4)
+    }
+
+
+MODEL_NAMES = ['normal', 'student_t', 'lognormal', 'multi_asset', 'bootstrap', 'block_bootstrap']
+
+
+class TestReturnModels:
+    """Test suite for portfolio return models."""
+
+    @pytest.mark.parametrize('name', MODEL_NAMES)
+    def test_batched_draws_match_full_run(self, tmp_path, name):
+        """Test drawing in batches gives the same shocks and results as one full draw."""
+        model = all_models(tmp_path)[name]
+
+        full = model.draw_shocks(np.random.default_rng(7), 101, 7)
+        rng = np.random.default_rng(7)
+        batched = np.concatenate([model.draw_shocks(rng, size, 7) for size in (33, 1, 50, 17)])
+        np.testing.assert_array_equal(batched, full)
+
+        sim_args = (1000000, 0.07, 0.15, 40000, 7)
+        expected = MonteCarloSimulator(*sim_args, seed=7, return_model=model).run_simulation(1001)
+        batches = MonteCarloSimulator(*sim_args, seed=7, return_model=model).iter_simulation(1001, batch_size=300)
+        streamed = list(batches)
+        assert streamed[-1]['result']['success_rate'] == expected['success_rate']
+        np.testing.assert_array_equal(
+            streamed[-1]['result']['percentile_paths']['p50'], expected['percentile_paths']['p50']
+        )
+
+    def test_normal_model_is_the_default(self):
+        """Test an explicit normal model reproduces the default simulator."""
+        params = dict(
+            starting_balance=1000000,
+            annual_return=0.07,
+            annual_std_dev=0.15,
+            withdrawal_amount=40000,
+            years=30
+        )
+
+        default = MonteCarloSimulator(**params, seed=21).run_simulation(500)
+        explicit = MonteCarloSimulator(
+            **params, seed=21, return_model=NormalReturns(0.07, 0.15)
+        ).run_simulation(500)
+
+        assert explicit == default
+
+    def test_rebalanced_moments(self):
+        """Test rebalanced returns have the analytic portfolio mean and volatility."""
+        correlation = np.array([
+            [1.0, 0.3, -0.2],
+            [0.3, 1.0, 0.1],
+            [-0.2, 0.1, 1.0]
+        ])
+        model = MultiAssetReturns(
+            means=[0.08, 0.04, 0.06],
+            std_devs=[0.18, 0.06, 0.12],
+            correlation=correlation,
+            weights=[0.5, 0.3, 0.2]
+        )
+
+        shocks = model.draw_shocks(np.random.default_rng(22), 20000, 10)
+        assert shocks.shape == (20000, 10, 3)
+
+        asset_returns = model.asset_returns(shocks).reshape(-1, 3)
+        np.testing.assert_allclose(np.corrcoef(asset_returns.T), correlation, atol=0.02)
+
+        returns = model.returns_from_shocks(shocks)
+        covariance = correlation * np.outer(model.std_devs, model.std_devs)
+        assert returns.shape == (20000, 10)
+        assert returns.mean() == pytest.approx(model.weights @ model.means, abs=0.002)
+        assert returns.std() == pytest.approx(np.sqrt(model.weights @ covariance @ model.weights), rel=0.02)
+
+    def test_drifting_weights(self):
+        """Test weights drift with cumulative asset growth when not rebalanced."""
+        model = MultiAssetReturns(
+            means=[0.10, 0.0],
+            std_devs=[0.0, 0.0],
+            correlation=np.eye(2),
+            weights=[0.5, 0.5],
+            rebalance=False
+        )
+
+        returns = model.returns_from_shocks(np.zeros((1, 2, 2)))
+
+        # Year two holds 0.55 / 0.50 of the stock/cash mix
+        assert returns[0, 0] == pytest.approx(0.05)
+        assert returns[0, 1] == pytest.approx(0.10 * 0.55 / 1.05)
+        assert model.serially_independent is False
+
+    def test_historical_data_matches_presets(self):
+        """Test the historical_data block gives each preset its expected return and volatility."""
+        with open('data/portfolios.json') as f:
+            historical_data = json.load(f)['historical_data']
+
+        for portfolio in PortfolioPreset.get_all().values():
+            model = MultiAssetReturns.from_historical_data(historical_data, portfolio.asset_weights())
+            covariance = model.correlation * np.outer(model.std_devs, model.std_devs)
+
+            assert model.asset_names == ['stocks', 'bonds']
+            assert model.weights @ model.means == pytest.approx(portfolio.expected_return)
+            assert np.sqrt(model.weights @ covariance @ model.weights) == pytest.approx(portfolio.std_deviation)
+
+    def test_multi_asset_simulation_with_common_shocks(self):
+        """Test multi-asset models plug into the simulator and share shocks across portfolios."""
+        with open('data/portfolios.json') as f:
+            historical_data = json.load(f)['historical_data']
+        shocks = np.random.default_rng(23).standard_normal((1000, 30, 2))
+
+        results = {}
+        for key, portfolio in PortfolioPreset.get_all().items():
+            sim = MonteCarloSimulator(
+                starting_balance=1000000,
+                annual_return=portfolio.expected_return,
+                annual_std_dev=portfolio.std_deviation,
+                withdrawal_amount=40000,
+                years=30,
+                return_model=MultiAssetReturns.from_historical_data(historical_data, portfolio.asset_weights())
+            )
+            results[key] = sim.run_simulation(1000, shocks=shocks)
+            # Year-by-year matrix products may round differently from the whole-run ones
+            exact = sim.run_simulation(1000, shocks=shocks, percentile_mode='exact')
+            assert exact['success_rate'] == results[key]['success_rate']
+            np.testing.assert_allclose(
+                exact['percentile_paths']['p50'], results[key]['percentile_paths']['p50'], rtol=1e-9
+            )
+
+        assert results['aggressive']['percentile_paths']['p90'][-1] > results['conservative']['percentile_paths']['p90'][-1]
+
+        with pytest.raises(ValueError):
+            sim.run_simulation(1000, shocks=shocks[:, :, 0])
+
+    def test_invalid_models(self):
+        """Test invalid correlation matrices and weights are rejected."""
+        with pytest.raises(ValueError):
+            MultiAssetReturns([0.1, 0.05], [0.2, 0.05], np.array([[1.0, 1.5], [1.5, 1.0]]), [0.6, 0.4])
+        with pytest.raises(ValueError):
+            MultiAssetReturns([0.1, 0.05], [0.2, 0.05], np.eye(2), [0.6, 0.6])
+
+    def test_fat_tailed_models(self):
+        """Test Student-t and lognormal models keep the mean and volatility."""
+        rng = np.random.default_rng(25)
+        student_t = StudentTReturns(0.08, 0.15, degrees_of_freedom=5)
+        lognormal = LognormalReturns(0.08, 0.15)
+
+        t_returns = student_t.returns_from_shocks(student_t.draw_shocks(rng, 100000, 10))
+        log_returns = lognormal.returns_from_shocks(lognormal.draw_shocks(rng, 100000, 10))
+
+        for returns in (t_returns, log_returns):
+            assert returns.shape == (100000, 10)
+            assert returns.mean() == pytest.approx(0.08, abs=0.002)
+            assert returns.std() == pytest.approx(0.15, rel=0.03)
+
+        # Heavier tails than a normal (excess kurtosis 6 / (df - 4) = 6)
+        standardized = (t_returns - t_returns.mean()) / t_returns.std()
+        assert np.mean(standardized ** 4) > 4
+        assert log_returns.min() > -1
+
+        with pytest.raises(ValueError):
+            StudentTReturns(0.08, 0.15, degrees_of_freedom=2)
+
+    def test_historical_series_from_csv(self, tmp_path):
+        """Test CSV returns load into a memory-mapped cache that tracks the file."""
+        path = write_returns_csv(tmp_path / 'returns.csv', [(0.10, 0.02), (-0.20, 0.05), (0.30, 0.01)])
+
+        series = HistoricalSeries.from_csv(path, str(tmp_path / 'cache'))
+
+        assert series.asset_names == ['stocks', 'bonds']
+        assert isinstance(series.returns, np.memmap)
+        np.testing.assert_array_equal(series.returns, [[0.10, 0.02], [-0.20, 0.05], [0.30, 0.01]])
+        np.testing.assert_array_equal(series.weight_vector({'stocks': 0.7}), [0.7, 0.0])
+        with pytest.raises(ValueError):
+            series.weight_vector({'gold': 1.0})
+
+        # The cache is reused until the CSV changes
+        assert HistoricalSeries.from_csv(path, str(tmp_path / 'cache')).digest() == series.digest()
+        write_returns_csv(tmp_path / 'returns.csv', [(0.05, 0.03)])
+        os.utime(path, (time.time() + 10, time.time() + 10))
+        assert len(HistoricalSeries.from_csv(path, str(tmp_path / 'cache')).returns) == 1
+
+    def test_historical_series_unwritable_cache(self, tmp_path):
+        """Test the CSV is parsed in memory when the cache directory can't be written."""
+        path = write_returns_csv(tmp_path / 'returns.csv', [(0.10, 0.02), (-0.20, 0.05)])
+        blocker = tmp_path / 'not-a-directory'
+        blocker.write_text('')
+
+        series = HistoricalSeries.from_csv(path, str(blocker / 'cache'))
+
+        assert not isinstance(series.returns, np.memmap)
+        np.testing.assert_array_equal(series.returns, [[0.10, 0.02], [-0.20, 0.05]])
+
+    def test_bootstrap_replays_historical_years(self, tmp_path):
+        """Test bootstrap returns are weighted historical years, drawn as one index matrix."""
+        path = write_returns_csv(tmp_path / 'returns.csv', [(0.10, 0.02), (-0.20, 0.05), (0.30, 0.01)])
+        series = HistoricalSeries.from_csv(path)
+        model = BootstrapReturns(series, {'stocks': 0.5, 'bonds': 0.5})
+
+        shocks = model.draw_shocks(np.random.default_rng(26), 1000, 20)
+        returns = model.returns_from_shocks(shocks)
+
+        assert shocks.shape == (1000, 20)
+        assert set(np.unique(shocks)) == {0, 1, 2}
+        np.testing.assert_allclose(returns, np.array([0.06, -0.075, 0.155])[shocks])
+
+    def test_block_bootstrap_preserves_runs(self, tmp_path):
+        """Test the stationary bootstrap continues runs with probability 1 - 1 / block length."""
+        rows = [(0.01 * i, 0.0) for i in range(50)]
+        series = HistoricalSeries.from_csv(write_returns_csv(tmp_path / 'returns.csv', rows))
+        model = BlockBootstrapReturns(series, {'stocks': 1.0}, mean_block_length=4)
+
+        indices = model.draw_shocks(np.random.default_rng(27), 5000, 40)
+
+        continued = np.mean(indices[:, 1:] == (indices[:, :-1] + 1) % 50)
+        assert continued == pytest.approx(0.75 + 0.25 / 50, abs=0.01)
+        assert np.bincount(indices.ravel(), minlength=50).min() > 0
+        assert model.serially_independent is False
+
+        sim = MonteCarloSimulator(1000000, 0.07, 0.15, 40000, 40, seed=28, return_model=model)
+        results = sim.run_simulation(500)
+        assert 0 <= results['success_rate'] <= 1
+        with pytest.raises(ValueError):
+            sim.run_simulation(500, percentile_mode='exact')
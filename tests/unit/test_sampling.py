@@ -0,0 +1,56 @@
+"""
+Unit tests for variance-reduction sampling schemes.
+"""
+
+import pytest
+import numpy as np
+from lib.core.sampling import SOBOL_REPLICATES, antithetic_shocks, sample_groups, sobol_normals
+
+
+class TestSampling:
+    """Test suite for shock sampling helpers."""
+
+    def test_antithetic_pairs(self):
+        """Test rows are mirrored across the two halves and groups follow the pairs."""
+        rng = np.random.default_rng(30)
+
+        shocks = antithetic_shocks(lambda rows: rng.standard_normal((rows, 4)), 7)
+        groups = sample_groups('antithetic', 7)
+
+        assert shocks.shape == (7, 4)
+        np.testing.assert_array_equal(shocks[4:], -shocks[:3])
+        np.testing.assert_array_equal(groups, [0, 1, 2, 3, 0, 1, 2])
+
+    @pytest.mark.parametrize('iterations', [1, 5, 9])
+    def test_antithetic_odd_iterations(self, iterations):
+        """Test an odd run leaves only the last row of the first half unpaired."""
+        rng = np.random.default_rng(33)
+        half = (iterations + 1) // 2
+
+        shocks = antithetic_shocks(lambda rows: rng.standard_normal((rows, 3)), iterations)
+        groups = sample_groups('antithetic', iterations)
+
+        assert shocks.shape == (iterations, 3)
+        np.testing.assert_array_equal(shocks[half:], -shocks[:half - 1])
+        assert np.bincount(groups).tolist() == [2] * (half - 1) + [1]
+        assert not np.any(np.all(shocks == -shocks[half - 1], axis=1))
+
+    def test_random_groups_are_paths(self):
+        """Test plain sampling treats every path as its own group."""
+        np.testing.assert_array_equal(sample_groups('random', 5), np.arange(5))
+
+    def test_sobol_normals(self):
+        """Test Sobol normals are standard normal and split into scrambled replicates."""
+        pytest.importorskip('scipy')
+
+        shocks = sobol_normals(np.random.default_rng(31), (4096, 30, 2))
+        groups = sample_groups('sobol', 4096)
+
+        assert shocks.shape == (4096, 30, 2)
+        assert abs(shocks.mean()) < 0.01
+        assert shocks.std() == pytest.approx(1, abs=0.01)
+        assert np.bincount(groups).tolist() == [4096 // SOBOL_REPLICATES] * SOBOL_REPLICATES
+
+        # Quasi-random points fill each dimension far more evenly than random ones
+        column_means = shocks.reshape(4096, -1).mean(axis=0)
+        assert np.abs(column_means).max() < 0.2 / np.sqrt(4096)
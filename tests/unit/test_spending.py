@@ -0,0 +1,97 @@
+"""
+Unit tests for spending policies.
+"""
+
+import pytest
+import numpy as np
+from lib.core import MonteCarloSimulator
+from lib.core.spending import FixedSpending, MovingAverageSpending, YaleTobinSpending
+
+
+class TestSpendingPolicies:
+    """Test suite for array-wise spending policies."""
+
+    def test_fixed_spending_is_the_default(self):
+        """Test an explicit fixed policy reproduces the default simulator."""
+        params = dict(
+            starting_balance=1000000,
+            annual_return=0.07,
+            annual_std_dev=0.15,
+            withdrawal_amount=50000,
+            years=30
+        )
+
+        default = MonteCarloSimulator(**params, seed=51).run_simulation(500)
+        explicit = MonteCarloSimulator(**params, seed=51, spending_policy=FixedSpending()).run_simulation(500)
+
+        assert explicit == default
+        assert FixedSpending().balance_independent
+        assert not FixedSpending(floor_rate=0.03).balance_independent
+
+    def test_moving_average_matches_full_history(self):
+        """Test the ring buffer gives the same trailing average as recomputing from history."""
+        rng = np.random.default_rng(52)
+        history = rng.uniform(5e5, 2e6, size=(20, 100))
+        policy = MovingAverageSpending(0.05, averaging_years=3)
+        state = policy.start(history[0].copy(), 50000, np.ones(20))
+
+        for year in range(1, 21):
+            withdrawal = policy.withdrawal(state, history[year - 1], year)
+            # Years before the first count as the starting balance
+            padded = np.concatenate([np.repeat(history[:1], 2, axis=0), history[:year]])
+            np.testing.assert_allclose(withdrawal, 0.05 * padded[-3:].mean(axis=0), rtol=1e-12)
+
+    def test_yale_tobin_blends_prior_spending(self):
+        """Test Yale/Tobin mixes inflation-grown prior spending with the balance rule."""
+        policy = YaleTobinSpending(0.05, smoothing=0.7)
+        factors = 1.03 ** np.arange(3)
+        state = policy.start(np.full(2, 1000000.0), 50000, factors)
+
+        first = policy.withdrawal(state, np.array([1000000.0, 1000000.0]), 1)
+        second = policy.withdrawal(state, np.array([1200000.0, 800000.0]), 2)
+
+        np.testing.assert_allclose(first, [50000, 50000])
+        np.testing.assert_allclose(second, 0.7 * 50000 * 1.03 + 0.3 * 0.05 * np.array([1200000, 800000]))
+
+    def test_floors_and_caps(self):
+        """Test floors and caps bound spending and feed back into prior spending."""
+        policy = YaleTobinSpending(0.05, smoothing=1.0, floor_rate=0.04, cap_rate=0.06)
+        state = policy.start(np.full(2, 1000000.0), 50000, np.ones(3))
+
+        policy.withdrawal(state, np.array([1000000.0, 1000000.0]), 1)
+        bounded = policy.withdrawal(state, np.array([500000.0, 2000000.0]), 2)
+
+        np.testing.assert_allclose(bounded, [30000, 80000])
+        np.testing.assert_allclose(state['previous'], bounded)
+
+        with pytest.raises(ValueError):
+            FixedSpending(floor_rate=0.06, cap_rate=0.04)
+
+    def test_policies_in_the_simulator(self):
+        """Test balance-based policies run in every mode and reject closed-form shortcuts."""
+        params = dict(
+            starting_balance=1000000,
+            annual_return=0.06,
+            annual_std_dev=0.15,
+            withdrawal_amount=50000,
+            years=30,
+            seed=53
+        )
+        shocks = np.random.default_rng(54).standard_normal((1000, 30))
+
+        fixed = MonteCarloSimulator(**params).run_simulation(1000, shocks=shocks)
+        for policy in (MovingAverageSpending(0.05), YaleTobinSpending(0.05)):
+            sim = MonteCarloSimulator(**params, spending_policy=policy)
+            full = sim.run_simulation(1000, shocks=shocks)
+            exact = sim.run_simulation(1000, shocks=shocks, percentile_mode='exact')
+
+            # Spending falls with the balance, so fewer paths deplete
+            assert full['success_rate'] > fixed['success_rate']
+            assert exact['success_rate'] == full['success_rate']
+            np.testing.assert_allclose(exact['percentile_paths']['p50'], full['percentile_paths']['p50'])
+
+            with pytest.raises(ValueError):
+                sim.solve_sustainable_withdrawal(0.9)
+
+        with pytest.raises(ValueError):
+            MonteCarloSimulator(**params, spending_policy=MovingAverageSpending(0.05), control_variate=True)
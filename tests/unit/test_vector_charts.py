@@ -0,0 +1,63 @@
+"""
+Unit tests for vector (ReportLab graphics) PDF charts.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+from reportlab.graphics import renderPDF
+from reportlab.graphics.shapes import Drawing
+from lib.reporters.chart_renderer import ChartRenderer
+from lib.reporters.vector_charts import projection_drawing, success_rate_drawing
+from lib.simple_pdf_generator import SimplePDFGenerator
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+
+class TestVectorCharts:
+    """Test suite for the vector chart backend."""
+
+    def test_drawings_render(self):
+        """Test both chart kinds build drawings of the requested size that render to PDF."""
+        projection = projection_drawing(
+            {'labels': [0, 10, 20], 'datasets': [{'data': [1e6, 2e6, 3e6]}, {'data': [1e6, 1.5e6, 2e6]}]},
+            'Balanced (70/30)', width=5.5, height=2.8
+        )
+        bars = success_rate_drawing(['A', 'B', 'C'], [0.8, 0.6, 0.3], width=5, height=2.5)
+
+        for drawing in (projection, bars):
+            assert isinstance(drawing, Drawing)
+            assert renderPDF.drawToString(drawing).startswith(b'%PDF')
+        assert (projection.width, projection.height) == (5.5 * 72, 2.8 * 72)
+
+    def test_report_is_smaller_than_raster(self, sample_results):
+        """Test a vector report is smaller than the same report with PNG charts."""
+        generator = SimplePDFGenerator(ChartRenderer(max_workers=0))
+
+        raster = generator.generate_comprehensive_report(sample_results)
+        vector = generator.generate_comprehensive_report(sample_results, chart_backend='vector')
+
+        assert vector.startswith(b'%PDF')
+        assert len(vector) < len(raster)
+
+        with pytest.raises(ValueError):
+            generator.generate_comprehensive_report(sample_results, chart_backend='svg')
+
+    def test_vector_report_skips_matplotlib(self):
+        """Test generating a vector report never imports matplotlib."""
+        script = (
+            "import sys, json\n"
+            "from lib.simple_pdf_generator import SimplePDFGenerator\n"
+            "data = {'labels': [0, 1], 'datasets': [{'data': [1, 2]}]}\n"
+            "portfolio = {'portfolio': {'name': 'P', 'expected_return': 0.07, 'std_deviation': 0.15},\n"
+            "             'success_rate': 0.8, 'median_final_balance': 1, 'projection_data': json.dumps(data)}\n"
+            "details = {'starting_balance': 1, 'annual_withdrawal': 1, 'withdrawal_rate_percent': 4.0,\n"
+            "           'total_withdrawals': 1}\n"
+            "results = {'balance': 1, 'years': 1, 'inflation_rate': 0.03, 'calculation_details': details,\n"
+            "           'portfolios': {'p': portfolio}}\n"
+            "SimplePDFGenerator(chart_backend='vector').generate_comprehensive_report(results)\n"
+            "assert 'matplotlib' not in sys.modules\n"
+        )
+        subprocess.run([sys.executable, '-c', script], cwd=ROOT, check=True)